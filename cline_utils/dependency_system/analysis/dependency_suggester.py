@@ -342,46 +342,29 @@ def suggest_semantic_dependencies(file_path: str,
     # Iterate through all KeyInfo objects to find potential targets (files only)
     target_key_infos = [info for info in path_to_key_info.values() if not info.is_directory and info.key_string != source_key_string]
 
-    # Get necessary context for calculate_similarity (unchanged)
-    code_roots = config.get_code_root_directories()
-    doc_roots = config.get_doc_directories()
-    try: from .embedding_manager import calculate_similarity # Local import
-    except ImportError: logger.error("Could not import calculate_similarity. Semantic suggestions disabled."); return []
-
-    for target_key_info in target_key_infos:
-        target_key_string = target_key_info.key_string
-        # calculate_similarity likely needs key strings and potentially paths or config
-        # Assuming calculate_similarity is adapted or accepts strings and handles lookup if needed
-        try:
-            # Pass necessary info to calculate_similarity.
-            # If it needs paths, look them up: source_path = file_path, target_path = target_key_info.norm_path
-            # If it needs key_map-like structure, we might need to build a temporary one for it.
-            # For now, assume it primarily needs key strings and embeddings_dir.
-            # *** We might need to adapt calculate_similarity later ***
-            confidence = calculate_similarity(
-                source_key_string,
-                target_key_string,
-                embeddings_dir,
-                path_to_key_info, # Pass the full map in case it needs context
-                project_root,
-                code_roots,
-                doc_roots
-            )
-        except Exception as e:
-             logger.warning(f"Error calculating similarity between {source_key_string} and {target_key_string}: {e}")
-             confidence = 0.0
+    try: from .embedding_manager import calculate_similarities # Local import
+    except ImportError: logger.error("Could not import calculate_similarities. Semantic suggestions disabled."); return []
 
-        # --- Read thresholds from config ---
-        threshold_S_strong = config.get_threshold("code_similarity")
-        threshold_s_weak = config.get_threshold("doc_similarity")
-        logger.debug(f"Raw confidence {source_key_string} -> {target_key_string}: {confidence:.4f}")
+    # --- Read thresholds from config (once, not per target) ---
+    threshold_S_strong = config.get_threshold("code_similarity")
+    threshold_s_weak = config.get_threshold("doc_similarity")
+
+    # Score every target in one vectorized pass; targets below the weaker threshold are screened out in bulk
+    try:
+        confidences = calculate_similarities(source_key_string, [info.key_string for info in target_key_infos], embeddings_dir, path_to_key_info, project_root,
+                                             min_similarity=min(threshold_S_strong, threshold_s_weak))
+    except Exception as e:
+        logger.warning(f"Error calculating similarities for {source_key_string}: {e}")
+        confidences = {}
 
+    for target_key_string, confidence in confidences.items():
         # Determine character based on config thresholds
         assigned_char = None
-        if confidence >= threshold_S_strong: assigned_char = 'S'; logger.debug(f"Suggesting {source_key_string} -> {target_key_string} ('S')...")
-        elif confidence >= threshold_s_weak: assigned_char = 's'; logger.debug(f"Suggesting {source_key_string} -> {target_key_string} ('s')...")
+        if confidence >= threshold_S_strong: assigned_char = 'S'
+        elif confidence >= threshold_s_weak: assigned_char = 's'
 
         if assigned_char:
+            logger.debug(f"Suggesting {source_key_string} -> {target_key_string} ('{assigned_char}'), confidence {confidence:.4f}")
             suggested_dependencies.append((target_key_string, assigned_char))
 
     return suggested_dependencies
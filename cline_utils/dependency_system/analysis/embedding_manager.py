@@ -279,6 +279,7 @@ def generate_embeddings(project_paths: List[str],
             except Exception as e: logger.error(f"Failed write metadata {metadata_file}: {e}"); overall_success = False
 
     # --- End Loop ---
+    invalidate_dependent_entries("embedding_matrix", ".*") # Embeddings on disk may have changed
     if overall_success: logger.info(f"Completed embedding generation for paths: {project_paths}")
     else: logger.warning(f"Embedding generation completed with errors for paths: {project_paths}")
     return overall_success
@@ -405,6 +406,91 @@ def calculate_similarity(key1_str: str, # Renamed for clarity
     except Exception as e:
         logger.exception(f"Failed similarity calc for {key1_str} & {key2_str}: {e}"); return 0.0
 
+# --- Batch Similarity ---
+def _normalize_rows_inplace(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalizes each row of a float32 matrix in place (zero rows stay zero), so row dot products are cosine similarities."""
+    row_norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    row_norms[row_norms == 0] = 1.0
+    matrix /= row_norms
+    return matrix
+
+def _embedding_metadata_signature(embeddings_dir: str) -> str:
+    """Cheap change signature for the embeddings store: mtimes of the per-root metadata.json files (rewritten on every generation)."""
+    parts = []
+    try:
+        with os.scandir(embeddings_dir) as entries:
+            for entry in entries:
+                metadata_path = os.path.join(entry.path, "metadata.json")
+                if entry.is_dir() and os.path.exists(metadata_path): parts.append(f"{entry.name}={os.path.getmtime(metadata_path)}")
+    except OSError: return "missing"
+    return ",".join(sorted(parts))
+
+@cached("embedding_matrix",
+        key_func=lambda embeddings_dir, path_to_key_info, project_root: f"embedding_matrix:{normalize_path(embeddings_dir)}:{normalize_path(project_root)}:{len(path_to_key_info)}:{_embedding_metadata_signature(embeddings_dir)}")
+def load_embedding_matrix(embeddings_dir: str,
+                          path_to_key_info: Dict[str, KeyInfo],
+                          project_root: str) -> Tuple[np.ndarray, Dict[str, int], List[str]]:
+    """
+    Loads every file embedding into one contiguous (N, D) float32 matrix with L2-normalized rows.
+    Built once and cached until the embedding metadata changes, so per-source similarity is a single
+    matrix-vector product over contiguous memory instead of N scattered .npy loads.
+
+    Args:
+        embeddings_dir: Base directory containing mirrored embedding .npy files
+        path_to_key_info: Global map from normalized paths to KeyInfo objects.
+        project_root: Root directory of the project
+    Returns:
+        Tuple of (matrix, key_index, row_keys): key_index maps key string -> first row index for that key, row_keys maps row index -> key string.
+    """
+    norm_project_root = normalize_path(project_root)
+    key_index: Dict[str, int] = {}; row_keys: List[str] = []; vectors: List[np.ndarray] = []; embedding_dim: Optional[int] = None
+    for key_info in path_to_key_info.values():
+        if key_info.is_directory or not key_info.norm_path.startswith(norm_project_root): continue
+        try:
+            npy_path = normalize_path(os.path.join(embeddings_dir, os.path.relpath(key_info.norm_path, norm_project_root)) + ".npy")
+            if not os.path.exists(npy_path): continue
+            vector = np.load(npy_path).ravel()
+        except Exception as e: logger.debug(f"Could not load embedding for {key_info.key_string}: {e}"); continue
+        if embedding_dim is None: embedding_dim = vector.shape[0]
+        elif vector.shape[0] != embedding_dim: logger.warning(f"Embedding for {key_info.key_string} has dim {vector.shape[0]}, expected {embedding_dim}. Skipping."); continue
+        key_index.setdefault(key_info.key_string, len(vectors)); row_keys.append(key_info.key_string); vectors.append(vector)
+    if not vectors: return np.zeros((0, 0), dtype=np.float32), {}, []
+    matrix = np.ascontiguousarray(np.vstack(vectors), dtype=np.float32)
+    logger.info(f"Loaded embedding matrix: {matrix.shape[0]} x {matrix.shape[1]} float32 ({matrix.nbytes / 1024:.1f} KiB)")
+    return _normalize_rows_inplace(matrix), key_index, row_keys
+
+def calculate_similarities(source_key_str: str,
+                           target_key_strs: List[str],
+                           embeddings_dir: str,
+                           path_to_key_info: Dict[str, KeyInfo],
+                           project_root: str,
+                           min_similarity: float = 0.0) -> Dict[str, float]:
+    """
+    Batch version of calculate_similarity: scores one source key against many target keys
+    with one matrix-vector product over the cached, row-normalized embedding matrix.
+    Rows below min_similarity are screened out with a vectorized mask, so only candidates
+    are converted to Python floats.
+
+    Args:
+        source_key_str: Key string of the source file
+        target_key_strs: Key strings to compare against
+        embeddings_dir: Base directory containing mirrored embedding .npy files
+        path_to_key_info: Global map from normalized paths to KeyInfo objects.
+        project_root: Root directory of the project
+        min_similarity: Only targets scoring at least this are returned (0.0 returns all)
+    Returns:
+        Dict mapping target key string -> similarity (0.0 to 1.0). Targets without a usable embedding
+        (or below min_similarity) are omitted.
+    """
+    if not os.path.isabs(embeddings_dir): embeddings_dir = normalize_path(os.path.join(project_root, embeddings_dir))
+    matrix, key_index, row_keys = load_embedding_matrix(embeddings_dir, path_to_key_info, project_root)
+    source_idx = key_index.get(source_key_str)
+    if source_idx is None: logger.debug(f"No embedding for source key {source_key_str}. Skipping batch similarity."); return {}
+    all_similarities = np.clip(matrix @ matrix[source_idx], 0.0, 1.0)
+    target_key_set = set(target_key_strs)
+    candidate_rows = np.flatnonzero(all_similarities >= min_similarity) if min_similarity > 0.0 else range(len(row_keys))
+    return {row_keys[row]: float(all_similarities[row]) for row in candidate_rows if row_keys[row] in target_key_set}
+
 # --- File Validation Helper ---
 @cached("file_validation",
        key_func=lambda file_path: f"is_valid_file:{normalize_path(file_path)}:{os.path.getmtime(ConfigManager().config_path)}")
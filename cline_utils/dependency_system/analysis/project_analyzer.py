@@ -1,30 +1,42 @@
 # analysis/project_analyzer.py
 
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import fnmatch
-import json
+import functools
+import hashlib
 import os
-from typing import Any, Dict, Optional, List, Tuple
+from pathlib import Path
+import re
+from typing import Any, Dict, Optional, List, Set, Tuple
 # from cline_utils.dependency_system.core.dependency_grid import decompress
 from cline_utils.dependency_system.io import tracker_io
 from cline_utils.dependency_system.core import key_manager
 
 import logging
+from cline_utils.dependency_system.analysis import dependency_analyzer
 from cline_utils.dependency_system.analysis.dependency_analyzer import analyze_file
 from cline_utils.dependency_system.utils.batch_processor import BatchProcessor, process_items
 from cline_utils.dependency_system.analysis.dependency_suggester import suggest_dependencies
 from cline_utils.dependency_system.analysis.embedding_manager import generate_embeddings
 from cline_utils.dependency_system.utils.cache_manager import cached, file_modified, clear_all_caches
 from cline_utils.dependency_system.utils.config_manager import ConfigManager
-from cline_utils.dependency_system.utils.path_utils import is_subpath, normalize_path, get_project_root
+from cline_utils.dependency_system.utils.json_utils import dump_json_file, load_json_file
+from cline_utils.dependency_system.utils.path_utils import normalize_path, get_project_root, FILENAME_SAFE_TABLE
 from cline_utils.dependency_system.utils.template_generator import generate_final_review_checklist
-from cline_utils.dependency_system.utils.visualize_dependencies import generate_mermaid_diagram
+from cline_utils.dependency_system.utils.visualize_dependencies import DiagramContext, MERMAID_INFO_EMPTY, generate_mermaid_diagram, generate_mermaid_diagram_context
 
 logger = logging.getLogger(__name__)
 
 # Type alias from tracker_io
 PathMigrationInfo = Dict[str, Tuple[Optional[str], Optional[str]]]
 
+# Below this many files the process pool start-up cost outweighs the parallel speedup
+PROCESS_POOL_MIN_ITEMS = 64
+# Persistent analyze_file results keyed on (path, st_mtime_ns, st_size), stored per project under <memory_dir>/cache
+ANALYSIS_STAT_CACHE_FILENAME = "file_analysis_stat_cache.json"
+ANALYSIS_STAT_CACHE_VERSION = 1 # Bump on format changes; edits to the analyzer source invalidate the cache on their own
+
 # Caching for analyze_project (Consider if key_func needs more refinement)
 # @cached("project_analysis",
 #        key_func=lambda force_analysis=False, force_embeddings=False, **kwargs:
@@ -74,7 +86,7 @@ def analyze_project(force_analysis: bool = False, force_embeddings: bool = False
     all_roots_rel = sorted(list(set(code_root_directories_rel + doc_directories_rel)))
     abs_code_roots = {normalize_path(os.path.join(project_root, r)) for r in code_root_directories_rel}; abs_doc_roots = {normalize_path(os.path.join(project_root, r)) for r in doc_directories_rel}; abs_all_roots = {normalize_path(os.path.join(project_root, r)) for r in all_roots_rel}
 
-    old_map_existed_before_gen = False
+    old_map_existed_before_gen = False; old_map_path: Optional[str] = None
     try:
         # Determine the expected path for the old map file RELATIVE to key_manager.py
         # Use the imported key_manager module to find its location
@@ -111,7 +123,9 @@ def analyze_project(force_analysis: bool = False, force_embeddings: bool = False
 
     # --- Build Path Migration Map (Early, after new keys are generated) ---
     logger.info("Building path migration map for analysis and updates...")
-    old_global_map = key_manager.load_old_global_key_map() # Load old map (can be None)
+    # generate_keys rotates the previous current map into the old-map file, so existence must be re-checked here
+    # (not taken from old_map_existed_before_gen). Skip the load entirely on fresh projects.
+    old_global_map = key_manager.load_old_global_key_map() if old_map_path and os.path.exists(old_map_path) else None
     path_migration_info: PathMigrationInfo
     try:
         path_migration_info = tracker_io._build_path_migration_map(old_global_map, path_to_key_info)
@@ -126,78 +140,112 @@ def analyze_project(force_analysis: bool = False, force_embeddings: bool = False
     # --- File Identification and Filtering ---
     logger.info("Identifying files for analysis...")
     files_to_analyze_abs = []
-    for abs_root_dir in abs_all_roots:
+    # Translate the glob patterns once into a single compiled regex and make dir-name lookups O(1)
+    excluded_basename_re = re.compile("(?:" + ")|(?:".join(fnmatch.translate(p) for p in excluded_file_patterns_config) + ")") if excluded_file_patterns_config else None
+    excluded_dir_names_set = set(excluded_dirs_rel)
+    # Directories visited by the walk, and those that had at least one entry - reused later instead of re-listing them
+    scanned_dirs: Set[str] = set(); non_empty_scanned_dirs: Set[str] = set()
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+    # Nested roots (e.g. 'src' and 'src/docs') would be walked twice - only walk the outermost ones
+    walk_roots_abs = sorted(r for r in abs_all_roots if not any(r != other and r.startswith(other + "/") for other in abs_all_roots))
+    for abs_root_dir in walk_roots_abs:
         if not os.path.isdir(abs_root_dir):
             logger.warning(f"Configured root directory not found: {abs_root_dir}")
             continue
-        # Use os.walk - order within walk is OS-dependent but shouldn't affect analysis analysis_results
-        for root, dirs, files in os.walk(abs_root_dir, topdown=True):
-            norm_root = normalize_path(root)
-            dirs[:] = [d for d in dirs if d not in excluded_dirs_rel and normalize_path(os.path.join(norm_root, d)) not in all_excluded_paths_abs_set]
-            is_root_excluded_by_path = False
-            if norm_root in all_excluded_paths_abs_set or \
-               any(is_subpath(norm_root, excluded) for excluded in all_excluded_paths_abs_set):
-                 is_root_excluded_by_path = True
-            if is_root_excluded_by_path:
-                dirs[:] = []; continue
-            for file_name in files:
-                file_path_abs = normalize_path(os.path.join(norm_root, file_name))
-                file_basename = os.path.basename(file_path_abs) # Use file_name directly
-                _, file_ext = os.path.splitext(file_name)
-                file_ext = file_ext.lower()
-                # Check all exclusion criteria
+        if _is_path_or_ancestor_excluded(abs_root_dir, all_excluded_paths_abs_set):
+            continue
+        # Stack-based DFS over os.scandir - DirEntry.is_dir()/is_file() use the d_type cached by the
+        # directory read, avoiding the per-entry stat os.walk performs. Order is OS-dependent but doesn't affect results.
+        dirs_to_scan = [abs_root_dir]
+        while dirs_to_scan:
+            current_dir = dirs_to_scan.pop()
+            try:
+                with os.scandir(current_dir) as entries: dir_entries = list(entries)
+            except OSError as scan_err:
+                logger.warning(f"Could not scan directory {current_dir}: {scan_err}"); continue
+            scanned_dirs.add(current_dir)
+            if dir_entries: non_empty_scanned_dirs.add(current_dir)
+            # current_dir is already normalized, so prefix + name yields a normalized path without calling normalize_path
+            current_dir_prefix = current_dir + "/"
+            for entry in dir_entries:
+                entry_name = entry.name; entry_path_abs = current_dir_prefix + entry_name
+                try: entry_is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError: continue
+                # Every directory on the stack already passed the ancestor check, so only the entry itself needs a set lookup
+                if entry_is_dir:
+                    if entry_name not in excluded_dir_names_set and entry_path_abs not in all_excluded_paths_abs_set:
+                        dirs_to_scan.append(entry_path_abs)
+                    continue
+                try:
+                    if not entry.is_file(): continue
+                except OSError: continue
+                # Cheap name-based checks first, path-based checks last
+                # Same result as os.path.splitext: leading dots (e.g. '.gitignore') don't start an extension
+                dot_idx = entry_name.rfind('.')
+                file_ext = entry_name[dot_idx:].lower() if dot_idx > 0 and entry_name[:dot_idx].lstrip('.') else ""
                 is_excluded = (
-                    file_path_abs in all_excluded_paths_abs_set
-                    or any(is_subpath(file_path_abs, excluded) for excluded in all_excluded_paths_abs_set)
-                    or file_ext in excluded_extensions
-                    or any(fnmatch.fnmatch(file_basename, pattern) for pattern in excluded_file_patterns_config)
+                    file_ext in excluded_extensions
+                    or (excluded_basename_re is not None and excluded_basename_re.match(entry_name) is not None)
+                    or entry_path_abs in all_excluded_paths_abs_set
                 )
                 if is_excluded:
-                    logger.debug(f"Skipping excluded file: {file_path_abs}")
+                    if debug_enabled: logger.debug("Skipping excluded file: %s", entry_path_abs)
                     continue
-                if file_path_abs in path_to_key_info:
-                    files_to_analyze_abs.append(file_path_abs)
+                if entry_path_abs in path_to_key_info:
+                    files_to_analyze_abs.append(entry_path_abs)
                 else:
-                    logger.warning(f"File found but no key generated: {file_path_abs}")
+                    logger.warning("File found but no key generated: %s", entry_path_abs)
+    files_to_analyze_abs = list(dict.fromkeys(files_to_analyze_abs)) # Drop duplicates (order-preserving)
     logger.info(f"Found {len(files_to_analyze_abs)} files to analyze.")
 
     # --- File Analysis ---
     logger.info("Starting file analysis...")
-    # Use process_items for potential parallelization
-    # Pass force_analysis flag down to analyze_file if caching is implemented there
-    analysis_results_list = process_items(
-        files_to_analyze_abs,
-        analyze_file,
-        force=force_analysis
-    )
+    # Only files whose (mtime_ns, size) changed since the last run are re-analyzed; force_analysis ignores the stored results
+    stat_cache_path = _analysis_stat_cache_path(project_root, config)
+    stat_cache = {} if force_analysis else _load_analysis_stat_cache(stat_cache_path)
+    updated_stat_cache: Dict[str, Dict[str, Any]] = {}
+    analysis_by_path: Dict[str, Optional[Dict[str, Any]]] = {}
+    stale_files_abs: List[str] = []; stale_file_stats: Dict[str, os.stat_result] = {}
+    for file_path_abs in files_to_analyze_abs:
+        try: file_stat = os.stat(file_path_abs)
+        except OSError: stale_files_abs.append(file_path_abs); continue
+        cached_entry = stat_cache.get(file_path_abs)
+        if cached_entry and cached_entry.get("mtime_ns") == file_stat.st_mtime_ns and cached_entry.get("size") == file_stat.st_size:
+            analysis_by_path[file_path_abs] = cached_entry["result"]; updated_stat_cache[file_path_abs] = cached_entry
+        else: stale_files_abs.append(file_path_abs); stale_file_stats[file_path_abs] = file_stat
+    logger.info(f"Analysis cache: {len(analysis_by_path)} unchanged files reused, {len(stale_files_abs)} to analyze.")
+    # AST/regex analysis is CPU-bound, so large projects are fanned out across processes (results stay aligned with input)
+    for file_path_abs, analysis_result in zip(stale_files_abs, _analyze_files_parallel(stale_files_abs, force_analysis)):
+        analysis_by_path[file_path_abs] = analysis_result
+        # Record the pre-analysis stat so a file edited mid-run is seen as stale next time
+        file_stat = stale_file_stats.get(file_path_abs)
+        if file_stat and analysis_result and "error" not in analysis_result and "skipped" not in analysis_result:
+            updated_stat_cache[file_path_abs] = {"mtime_ns": file_stat.st_mtime_ns, "size": file_stat.st_size, "result": analysis_result}
+    _save_analysis_stat_cache(stat_cache_path, updated_stat_cache)
     file_analysis_results: Dict[str, Any] = {}
     analyzed_count, skipped_count, error_count = 0, 0, 0
-    for file_path_abs, analysis_result in zip(files_to_analyze_abs, analysis_results_list):
+    for file_path_abs in files_to_analyze_abs:
+        analysis_result = analysis_by_path.get(file_path_abs)
         if analysis_result:
-            if "error" in analysis_result: logger.warning(f"Analysis error for {file_path_abs}: {analysis_result['error']}"); error_count += 1
+            if "error" in analysis_result: logger.warning("Analysis error for %s: %s", file_path_abs, analysis_result['error']); error_count += 1
             elif "skipped" in analysis_result: skipped_count += 1
             else: file_analysis_results[file_path_abs] = analysis_result; analyzed_count += 1
-        else: logger.warning(f"Analysis returned no result for {file_path_abs}"); error_count += 1
+        else: logger.warning("Analysis returned no result for %s", file_path_abs); error_count += 1
     analysis_results["file_analysis"] = file_analysis_results
     logger.info(f"File analysis complete. Analyzed: {analyzed_count}, Skipped: {skipped_count}, Errors: {error_count}")
 
     # --- Create file_to_module mapping (Adapted for path_to_key_info) ---
     # Maps normalized absolute file path -> normalized absolute parent directory path (module path)
     logger.info("Creating file-to-module mapping...")
-    file_to_module: Dict[str, str] = {}
-    # Iterate through all the generated key information from path_to_key_info
-    for key_info_obj in path_to_key_info.values(): # Iterate over KeyInfo objects
-        # We only care about mapping files
-        if not key_info_obj.is_directory:
-            # Ensure the file has a parent path recorded
-            if key_info_obj.parent_path:
-                file_path = key_info_obj.norm_path
-                module_path = key_info_obj.parent_path # Direct parent directory path
-                file_to_module[file_path] = module_path
-                logger.debug(f"Mapped file '{file_path}' to module '{module_path}'") # Optional debug log
-
-            else:
-                logger.warning(f"File '{key_info_obj.norm_path}' (Key: {key_info_obj.key_string}) has no parent path in KeyInfo. Cannot map to a module.")
+    file_to_module: Dict[str, str] = {
+        key_info_obj.norm_path: key_info_obj.parent_path
+        for key_info_obj in path_to_key_info.values() if not key_info_obj.is_directory and key_info_obj.parent_path
+    }
+    # Files without a parent path can't be mapped to a module - only walk the map again if the report would be emitted
+    if logger.isEnabledFor(logging.WARNING):
+        for key_info_obj in path_to_key_info.values():
+            if not key_info_obj.is_directory and not key_info_obj.parent_path:
+                logger.warning("File '%s' (Key: %s) has no parent path in KeyInfo. Cannot map to a module.", key_info_obj.norm_path, key_info_obj.key_string)
     logger.info(f"File-to-module mapping created with {len(file_to_module)} entries.")
 
     # --- Embedding generation ---
@@ -219,23 +267,22 @@ def analyze_project(force_analysis: bool = False, force_embeddings: bool = False
     try:
         # Start with initial suggestions (e.g., from key generation if any)
         # Use defaultdict for easier merging
-        all_suggestions: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+        all_suggestions: Optional[Dict[str, List[Tuple[str, str]]]] = defaultdict(list)
         suggestion_count = 0
         # Use list of keys corresponding to analyzed files
         analyzed_file_paths = list(file_analysis_results.keys())
         # Use configured threshold for doc_similarity
         doc_similarity_threshold = config.get_threshold("doc_similarity")
+        suggestion_file_paths = []
         for file_path_abs in analyzed_file_paths:
-            file_key_info = path_to_key_info.get(file_path_abs)
-            if not file_key_info:
-                logger.warning(f"No key info found for analyzed file {file_path_abs}, skipping suggestion.")
+            if file_path_abs not in path_to_key_info:
+                logger.warning("No key info found for analyzed file %s, skipping suggestion.", file_path_abs)
                 continue
-            file_key_string = file_key_info.key_string # Get the actual key string
-            # Pass path_to_key_info instead of key_map
-            suggestions_for_file = suggest_dependencies(
-                file_path_abs, path_to_key_info, project_root,
-                file_analysis_results, threshold=doc_similarity_threshold
-            )
+            suggestion_file_paths.append(file_path_abs)
+        # Suggestion (similarity + analysis comparison) is CPU-bound and independent per file
+        suggestion_results = _suggest_dependencies_parallel(suggestion_file_paths, path_to_key_info, project_root, file_analysis_results, doc_similarity_threshold)
+        for file_path_abs, suggestions_for_file in zip(suggestion_file_paths, suggestion_results):
+            file_key_string = path_to_key_info[file_path_abs].key_string # Get the actual key string
             if suggestions_for_file:
                 # Suggestions are returned as (target_key_string, dep_char)
                 all_suggestions[file_key_string].extend(suggestions_for_file)
@@ -244,13 +291,15 @@ def analyze_project(force_analysis: bool = False, force_embeddings: bool = False
 
         # --- Combine suggestions within each source key using priority ---
         # This step is crucial before adding reciprocal ones
-        logger.debug("Combining suggestions per source key using priorities...")
-        combined_suggestions_per_source: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
-        # Import helper here to avoid potential circular dependencies at module level
-        from cline_utils.dependency_system.analysis.dependency_suggester import _combine_suggestions_with_char_priority
-        for source_key, suggestion_list in all_suggestions.items():
-             combined_suggestions_per_source[source_key] = _combine_suggestions_with_char_priority(suggestion_list)
-        all_suggestions = combined_suggestions_per_source # Replace raw with combined
+        if suggestion_count:
+            logger.debug("Combining suggestions per source key using priorities...")
+            combined_suggestions_per_source: Dict[str, List[Tuple[str, str]]] = defaultdict(list)
+            # Import helper here to avoid potential circular dependencies at module level
+            from cline_utils.dependency_system.analysis.dependency_suggester import _combine_suggestions_with_char_priority
+            for source_key, suggestion_list in all_suggestions.items():
+                 combined_suggestions_per_source[source_key] = _combine_suggestions_with_char_priority(suggestion_list)
+            all_suggestions = combined_suggestions_per_source # Replace raw with combined
+        else: all_suggestions = None # Nothing to combine; trackers get None, as the main tracker does
         analysis_results["dependency_suggestion"]["status"] = "success"
         logger.info("Dependency suggestion combining completed.")
     except Exception as e:
@@ -262,21 +311,23 @@ def analyze_project(force_analysis: bool = False, force_embeddings: bool = False
     analysis_results["tracker_update"]["mini"] = {}
     mini_tracker_paths_updated = set() # Track paths to avoid duplicates if structure overlaps
 
+    children_by_parent = key_manager.build_children_index(path_to_key_info) # Built once, shared by every tracker update below
     potential_mini_tracker_dirs: Dict[str, key_manager.KeyInfo] = {}
     for code_root_abs in abs_code_roots:
-        for path, key_info_obj in path_to_key_info.items(): # Iterate over KeyInfo objects
-            if key_info_obj.is_directory and key_info_obj.parent_path == code_root_abs:
-               potential_mini_tracker_dirs[path] = key_info_obj
-            elif key_info_obj.is_directory and path == code_root_abs:
-                 potential_mini_tracker_dirs[path] = key_info_obj
+        root_info = path_to_key_info.get(code_root_abs)
+        if root_info is not None and root_info.is_directory: potential_mini_tracker_dirs[code_root_abs] = root_info
+        for key_info_obj in children_by_parent.get(code_root_abs, ()):
+            if key_info_obj.is_directory: potential_mini_tracker_dirs[key_info_obj.norm_path] = key_info_obj
 
     logger.info(f"Identified {len(potential_mini_tracker_dirs)} potential directories for mini-trackers.")
 
     # Iterate through the identified module paths
     for norm_module_path, module_key_info_obj in potential_mini_tracker_dirs.items(): # Iterate over KeyInfo objects
         module_key_string = module_key_info_obj.key_string # Get key string for logging if needed
-        # Check if directory is NOT empty before trying to update/create tracker
-        if os.path.isdir(norm_module_path) and not _is_empty_dir(norm_module_path):
+        # Check if directory is NOT empty before trying to update/create tracker (the file walk already observed most of them)
+        if norm_module_path in scanned_dirs: is_dir, is_non_empty = True, norm_module_path in non_empty_scanned_dirs
+        else: is_dir = os.path.isdir(norm_module_path); is_non_empty = is_dir and not _is_empty_dir(norm_module_path)
+        if is_non_empty:
             if norm_module_path in mini_tracker_paths_updated: continue # Skip if already processed
             mini_tracker_path = tracker_io.get_tracker_path(project_root, tracker_type="mini", module_path=norm_module_path)
             logger.info(f"Updating mini tracker for module '{norm_module_path}' (Key: {module_key_string}) at: {mini_tracker_path}")
@@ -288,17 +339,18 @@ def analyze_project(force_analysis: bool = False, force_embeddings: bool = False
                     output_file_suggestion=mini_tracker_path,
                     path_to_key_info=path_to_key_info, # Pass the main map
                     tracker_type="mini",
-                    suggestions=all_suggestions, # Pass combined & reciprocal suggestions (keyed by key strings)
+                    suggestions=all_suggestions if all_suggestions else None, # Pass combined & reciprocal suggestions (keyed by key strings)
                     file_to_module=file_to_module,
                     new_keys=newly_generated_keys, # Pass list of KeyInfo objects
                     force_apply_suggestions=False,
-                    use_old_map_for_migration=old_map_existed_before_gen
+                    use_old_map_for_migration=old_map_existed_before_gen,
+                    children_by_parent=children_by_parent
                 )
                 analysis_results["tracker_update"]["mini"][norm_module_path] = "success"
             except Exception as mini_err:
                  logger.error(f"Error updating mini tracker {mini_tracker_path}: {mini_err}", exc_info=True)
                  analysis_results["tracker_update"]["mini"][norm_module_path] = "failure"; analysis_results["status"] = "warning"
-        elif os.path.isdir(norm_module_path): logger.debug(f"Skipping mini-tracker update for empty directory: {norm_module_path}")
+        elif is_dir: logger.debug("Skipping mini-tracker update for empty directory: %s", norm_module_path)
 
     # --- Update Doc Tracker ---
     doc_tracker_path = tracker_io.get_tracker_path(project_root, tracker_type="doc") if doc_directories_rel else None
@@ -307,9 +359,9 @@ def analyze_project(force_analysis: bool = False, force_embeddings: bool = False
         try:
             tracker_io.update_tracker(
                 output_file_suggestion=doc_tracker_path, path_to_key_info=path_to_key_info,
-                tracker_type="doc", suggestions=all_suggestions, file_to_module=file_to_module,
+                tracker_type="doc", suggestions=all_suggestions if all_suggestions else None, file_to_module=file_to_module,
                 new_keys=newly_generated_keys, force_apply_suggestions=False,
-                use_old_map_for_migration=old_map_existed_before_gen
+                use_old_map_for_migration=old_map_existed_before_gen, children_by_parent=children_by_parent
             )
             analysis_results["tracker_update"]["doc"] = "success"
         except Exception as doc_err:
@@ -377,58 +429,56 @@ def analyze_project(force_analysis: bool = False, force_embeddings: bool = False
                 os.makedirs(auto_diagram_output_dir_abs, exist_ok=True)
 
             # Find all tracker paths *again* here, as they might have just been created/updated
-            current_tracker_paths = tracker_io.find_all_tracker_paths(config, project_root)
+            # Materialized once and shared by the overview and every module diagram
+            current_tracker_paths_list = list(tracker_io.find_all_tracker_paths(config, project_root))
+
+            # Aggregate tracker dependencies once; the overview and every module diagram only differ in focus keys
+            diagram_context: Optional[DiagramContext] = None
+            try: diagram_context = generate_mermaid_diagram_context(path_to_key_info, path_migration_info, current_tracker_paths_list, config)
+            except Exception as ctx_err: logger.error(f"Could not build shared diagram context: {ctx_err}.")
 
             # --- Generate Project Overview Diagram ---
             logger.info("Generating project overview diagram...")
             overview_filename = "project_overview_dependencies.mermaid"
             overview_path = os.path.join(auto_diagram_output_dir_abs, overview_filename)
             # Pass path_migration_info to generate_mermaid_diagram
-            overview_mermaid_code = generate_mermaid_diagram(
+            overview_result = generate_mermaid_diagram(
                 focus_keys_list=[], global_path_to_key_info_map=path_to_key_info,
                 path_migration_info=path_migration_info, # Pass the map
-                all_tracker_paths_list=list(current_tracker_paths), config_manager_instance=config
+                all_tracker_paths_list=current_tracker_paths_list, config_manager_instance=config,
+                context=diagram_context
             )
-            if overview_mermaid_code and "// No relevant data" not in overview_mermaid_code and "Error:" not in overview_mermaid_code[:20]:
-                with open(overview_path, 'w', encoding='utf-8') as f: f.write(overview_mermaid_code)
+            if overview_result.ok and overview_result.info != MERMAID_INFO_EMPTY:
+                Path(overview_path).write_bytes(overview_result.text.encode('utf-8')) # Encode once, single write; skips the text-mode codec layer
                 logger.info(f"Project overview diagram saved to {overview_path}")
                 analysis_results["auto_visualization"]["overview"] = "success"
             else:
-                logger.warning(f"Skipping save for project overview diagram (no data or failed generation). Error: {overview_mermaid_code if overview_mermaid_code and 'Error:' in overview_mermaid_code[:20] else 'No data'}")
+                logger.warning(f"Skipping save for project overview diagram (no data or failed generation). Error: {overview_result.text if not overview_result.ok else 'No data'}")
                 analysis_results["auto_visualization"]["overview"] = "nodata_or_failed"
 
             # --- Generate Per-Module Diagrams ---
-            module_keys_to_visualize = []
-            for key_info_obj_analyzer in path_to_key_info.values():
-                if key_info_obj_analyzer.is_directory:
-                    is_top_level_module_dir_analyzer = False
-                    for acr_path_analyzer in abs_code_roots: # abs_code_roots defined earlier
-                        if key_info_obj_analyzer.norm_path == acr_path_analyzer: is_top_level_module_dir_analyzer = True; break
-                        if key_info_obj_analyzer.parent_path == acr_path_analyzer: is_top_level_module_dir_analyzer = True; break
-                    if is_top_level_module_dir_analyzer:
-                         module_keys_to_visualize.append(key_info_obj_analyzer.key_string)
-
-            module_keys_unique = sorted(list(set(module_keys_to_visualize)))
+            # Same selection as the mini-tracker dirs (code roots and their direct child directories) - reuse it
+            module_keys_unique = sorted({key_info_obj.key_string for key_info_obj in potential_mini_tracker_dirs.values()})
             logger.info(f"Identified module keys for auto-visualization: {module_keys_unique}")
             analysis_results["auto_visualization"]["modules"] = {mk: "skipped" for mk in module_keys_unique} # Initialize module status
 
-            for module_key_str in module_keys_unique:
-                logger.info(f"Generating diagram for module: {module_key_str}...")
-                module_diagram_filename = f"module_{module_key_str}_dependencies.mermaid".replace("/", "_").replace("\\", "_")
-                module_diagram_path = os.path.join(auto_diagram_output_dir_abs, module_diagram_filename)
-                # Pass path_migration_info here as well
-                module_mermaid_code = generate_mermaid_diagram(
-                    focus_keys_list=[module_key_str], global_path_to_key_info_map=path_to_key_info,
-                    path_migration_info=path_migration_info, # Pass the map
-                    all_tracker_paths_list=list(current_tracker_paths), config_manager_instance=config
-                )
-                if module_mermaid_code and "// No relevant data" not in module_mermaid_code and "Error:" not in module_mermaid_code[:20]:
-                    with open(module_diagram_path, 'w', encoding='utf-8') as f: f.write(module_mermaid_code)
-                    logger.info(f"Module {module_key_str} diagram saved to {module_diagram_path}")
-                    analysis_results["auto_visualization"]["modules"][module_key_str] = "success"
-                else:
-                    logger.warning(f"Skipping save for module {module_key_str} diagram (no data or failed generation). Error: {module_mermaid_code if module_mermaid_code and 'Error:' in module_mermaid_code[:20] else 'No data'}")
-                    analysis_results["auto_visualization"]["modules"][module_key_str] = "nodata_or_failed"
+            # Module diagrams only differ in focus keys, so without the shared context none of them can be drawn
+            if diagram_context is None:
+                if module_keys_unique: logger.warning(f"Skipping {len(module_keys_unique)} module diagrams: the shared diagram context could not be built.")
+                for module_key_str in module_keys_unique: analysis_results["auto_visualization"]["modules"][module_key_str] = "nodata_or_failed"
+            else:
+                for module_key_str in module_keys_unique:
+                    logger.info(f"Generating diagram for module: {module_key_str}...")
+                    module_diagram_filename = f"module_{module_key_str}_dependencies.mermaid".translate(FILENAME_SAFE_TABLE)
+                    module_diagram_path = os.path.join(auto_diagram_output_dir_abs, module_diagram_filename)
+                    module_result = generate_mermaid_diagram(focus_keys_list=[module_key_str], context=diagram_context)
+                    if module_result.ok and module_result.info != MERMAID_INFO_EMPTY:
+                        Path(module_diagram_path).write_bytes(module_result.text.encode('utf-8'))
+                        logger.info(f"Module {module_key_str} diagram saved to {module_diagram_path}")
+                        analysis_results["auto_visualization"]["modules"][module_key_str] = "success"
+                    else:
+                        logger.warning(f"Skipping save for module {module_key_str} diagram (no data or failed generation). Error: {module_result.text if not module_result.ok else 'No data'}")
+                        analysis_results["auto_visualization"]["modules"][module_key_str] = "nodata_or_failed"
         except Exception as viz_err:
             logger.error(f"Error during automatic diagram generation: {viz_err}", exc_info=True)
             analysis_results["auto_visualization"]["status"] = "error"
@@ -444,12 +494,127 @@ def analyze_project(force_analysis: bool = False, force_embeddings: bool = False
     else: print(f"Project analysis failed: {analysis_results.get('message', '')}. Check logs.")
     return analysis_results
 
+def _analysis_stat_cache_path(project_root: str, config: ConfigManager) -> str:
+    """Returns the project's analysis cache file: <project_root>/<memory_dir>/cache/file_analysis_stat_cache.json."""
+    memory_dir_rel = config.get_path("memory_dir", "cline_docs/memory")
+    return normalize_path(os.path.join(project_root, memory_dir_rel, "cache", ANALYSIS_STAT_CACHE_FILENAME))
+
+@functools.lru_cache(maxsize=1)
+def _analysis_stat_cache_version() -> str:
+    """
+    Version tag stored with the analysis cache: the format version plus a hash of the analyzer module's source,
+    so results produced by an older analyze_file are never reused after the analyzer changes.
+    """
+    try:
+        with open(dependency_analyzer.__file__, 'rb') as f: source_hash = hashlib.sha256(f.read()).hexdigest()[:16]
+    except OSError: source_hash = "unknown"
+    return f"{ANALYSIS_STAT_CACHE_VERSION}:{source_hash}"
+
+def _load_analysis_stat_cache(cache_path: str) -> Dict[str, Dict[str, Any]]:
+    """Loads the persistent per-file analysis cache. Returns an empty dict if missing, unreadable, or from another version."""
+    if not os.path.exists(cache_path): return {}
+    try:
+        data = load_json_file(cache_path)
+        if data.get("version") != _analysis_stat_cache_version(): logger.info("Analysis cache version mismatch. Ignoring stored results."); return {}
+        return data.get("entries", {})
+    except (OSError, ValueError, AttributeError) as e:
+        logger.warning(f"Could not load analysis cache {cache_path}: {e}. Re-analyzing all files."); return {}
+
+def _save_analysis_stat_cache(cache_path: str, entries: Dict[str, Dict[str, Any]]) -> None:
+    """Atomically persists the per-file analysis cache (write to temp file, then os.replace)."""
+    tmp_path = cache_path + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        dump_json_file(tmp_path, {"version": _analysis_stat_cache_version(), "entries": entries})
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Could not save analysis cache {cache_path}: {e}")
+        if os.path.exists(tmp_path):
+            try: os.remove(tmp_path)
+            except OSError: pass
+
+def _detach_file_log_handlers() -> None:
+    """
+    Process pool initializer: drops the file handlers (debug.txt / suggestions.log, rotating) inherited from the parent.
+    Forked workers would otherwise append to and rotate the same files independently. The handlers are removed without
+    closing, so nothing the parent had buffered is flushed a second time; worker records still reach the console handler.
+    """
+    root_logger = logging.getLogger()
+    for handler in list(root_logger.handlers):
+        if isinstance(handler, logging.FileHandler): root_logger.removeHandler(handler)
+
+def _analyze_files_parallel(files_to_analyze_abs: List[str], force_analysis: bool) -> List[Optional[Dict[str, Any]]]:
+    """
+    Runs analyze_file over the given files, using a ProcessPoolExecutor for large file sets so
+    CPU-bound parsing isn't serialized by the GIL. Small sets (or a failed pool) fall back to the
+    thread-based process_items. Returned list is index-aligned with the input; failed items are None.
+    """
+    if not files_to_analyze_abs: return []
+    if len(files_to_analyze_abs) >= PROCESS_POOL_MIN_ITEMS:
+        worker_count = os.cpu_count() or 1
+        chunk_size = max(1, len(files_to_analyze_abs) // (worker_count * 4))
+        try:
+            with ProcessPoolExecutor(max_workers=worker_count, initializer=_detach_file_log_handlers) as executor:
+                return list(executor.map(functools.partial(analyze_file, force=force_analysis), files_to_analyze_abs, chunksize=chunk_size))
+        except Exception as pool_err: # BrokenProcessPool, pickling errors, or a worker raising
+            logger.warning(f"Process pool analysis failed ({pool_err}). Falling back to thread-based processing.")
+    # Wrap so a failure yields None instead of being dropped, keeping results aligned for zip()
+    def _safe_analyze(file_path: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        try: return file_path, analyze_file(file_path, force=force_analysis)
+        except Exception as e: logger.error(f"Error analyzing {file_path}: {e}", exc_info=True); return file_path, None
+    results_by_path = dict(process_items(files_to_analyze_abs, _safe_analyze))
+    return [results_by_path.get(file_path) for file_path in files_to_analyze_abs]
+
+# Per-worker state for the suggestion process pool; set once by the initializer so the large maps aren't re-pickled per task
+_suggestion_worker_state: Dict[str, Any] = {}
+
+def _init_suggestion_worker(path_to_key_info: Dict[str, key_manager.KeyInfo], project_root: str, file_analysis_results: Dict[str, Any], threshold: float) -> None:
+    """Process pool initializer: stores the shared, read-only suggestion inputs in the worker."""
+    _detach_file_log_handlers()
+    _suggestion_worker_state.update(path_to_key_info=path_to_key_info, project_root=project_root, file_analysis_results=file_analysis_results, threshold=threshold)
+
+def _suggest_dependencies_worker(file_path: str) -> List[Tuple[str, str]]:
+    """Runs suggest_dependencies for one file inside a pool worker, using the initializer state."""
+    state = _suggestion_worker_state
+    return suggest_dependencies(file_path, state["path_to_key_info"], state["project_root"], state["file_analysis_results"], threshold=state["threshold"])
+
+def _suggest_dependencies_parallel(file_paths: List[str], path_to_key_info: Dict[str, key_manager.KeyInfo], project_root: str,
+                                   file_analysis_results: Dict[str, Any], threshold: float) -> List[List[Tuple[str, str]]]:
+    """
+    Runs suggest_dependencies for each file, using a ProcessPoolExecutor for large file sets.
+    Small sets (or a failed pool) run sequentially. Returned list is index-aligned with file_paths.
+    """
+    if not file_paths: return []
+    if len(file_paths) >= PROCESS_POOL_MIN_ITEMS:
+        worker_count = os.cpu_count() or 1
+        chunk_size = max(1, len(file_paths) // (worker_count * 4))
+        try:
+            with ProcessPoolExecutor(max_workers=worker_count, initializer=_init_suggestion_worker,
+                                     initargs=(path_to_key_info, project_root, file_analysis_results, threshold)) as executor:
+                return list(executor.map(_suggest_dependencies_worker, file_paths, chunksize=chunk_size))
+        except Exception as pool_err: # BrokenProcessPool, pickling errors, or a worker raising
+            logger.warning(f"Process pool suggestion failed ({pool_err}). Falling back to sequential processing.")
+    return [suggest_dependencies(file_path, path_to_key_info, project_root, file_analysis_results, threshold=threshold) for file_path in file_paths]
+
+def _is_path_or_ancestor_excluded(norm_path: str, excluded_paths: Set[str]) -> bool:
+    """
+    Checks if a normalized path, or any of its ancestor directories, is in the excluded set.
+    Walks the path's '/' boundaries (O(depth) set lookups) instead of testing is_subpath against every excluded path.
+    """
+    if norm_path in excluded_paths: return True
+    sep_idx = norm_path.rfind('/')
+    while sep_idx > 0:
+        if norm_path[:sep_idx] in excluded_paths: return True
+        sep_idx = norm_path.rfind('/', 0, sep_idx)
+    return False
+
 def _is_empty_dir(dir_path: str) -> bool:
     """
     Checks if a directory is empty (contains no files or subdirectories).
-    Handles potential permission errors.
+    Handles potential permission errors. Stops at the first entry instead of listing the whole directory.
     """
-    try: return not os.listdir(dir_path)
+    try:
+        with os.scandir(dir_path) as entries: return next(entries, None) is None
     except FileNotFoundError:
         logger.warning(f"Directory not found while checking if empty: {dir_path}")
         return True # Treat non-existent as empty for skipping purposes
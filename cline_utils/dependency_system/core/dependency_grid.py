@@ -7,7 +7,7 @@ Handles grid creation, compression, decompression, and dependency management wit
 
 import os
 import re
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Set, Optional
 from collections import defaultdict # Ensure defaultdict is imported if used (e.g., get_dependencies_from_grid)
 
 
@@ -24,9 +24,13 @@ logger = logging.getLogger(__name__)
 DIAGONAL_CHAR = "o"
 PLACEHOLDER_CHAR = "p"
 EMPTY_CHAR = "."
+STATUS_CHARS = frozenset((PLACEHOLDER_CHAR, 's', 'S')) # Chars marking unverified placeholders/suggestions
 
 # Compile regex pattern for RLE compression scheme (repeating characters, excluding 'o')
 COMPRESSION_PATTERN = re.compile(r'([^o])\1{2,}')
+# Patterns for reading RLE strings: a char followed by an optional count (any char), or by a required count
+RLE_RUN_PATTERN = re.compile(r'(.)(\d*)', re.DOTALL)
+RLE_COUNTED_RUN_PATTERN = re.compile(r'(.)(\d+)', re.DOTALL)
 
 #def _cache_key_for_grid(func_name: str, grid: Dict[str, str], *args) -> str:
 #    """Generate a cache key for grid operations."""
@@ -62,17 +66,8 @@ def decompress(s: str) -> str:
     """
     if not s or (len(s) <= 3 and not any(c.isdigit() for c in s)):
         return s
-
-    result = []
-    i = 0
-    while i < len(s):
-        if i + 1 < len(s) and s[i + 1].isdigit():
-            char = s[i]; j = i + 1
-            while j < len(s) and s[j].isdigit(): j += 1
-            count = int(s[i + 1:j])
-            result += char * count; i = j
-        else: result += s[i]; i += 1
-    return "".join(result)
+    # Expand each run in C (regex sub) rather than walking the string char by char
+    return RLE_COUNTED_RUN_PATTERN.sub(lambda m: m.group(1) * int(m.group(2)), s)
 
 # --- Grid Creation ---
 @cached("initial_grids",
@@ -89,28 +84,18 @@ def create_initial_grid(keys: List[str]) -> Dict[str, str]:
     if not keys or not all(isinstance(k, str) and validate_key(k) for k in keys):
         logger.error(f"Invalid keys provided for initial grid: {keys}")
         raise ValueError("All keys must be valid non-empty strings")
-    grid = {}; num_keys = len(keys)
-    for i, row_key in enumerate(keys):
-        row_list = [PLACEHOLDER_CHAR] * num_keys
-        row_list[i] = DIAGONAL_CHAR
-        grid[row_key] = compress("".join(row_list))
-    return grid
+    num_keys = len(keys)
+    if num_keys <= 3: # compress() leaves strings this short as they are
+        base = PLACEHOLDER_CHAR * num_keys
+        return {row_key: base[:i] + DIAGONAL_CHAR + base[i + 1:] for i, row_key in enumerate(keys)}
+    # Each row is a placeholder run, the diagonal, and another placeholder run: emit its RLE form directly
+    return {row_key: _placeholder_run(i) + DIAGONAL_CHAR + _placeholder_run(num_keys - 1 - i) for i, row_key in enumerate(keys)}
 
-# --- Character Access Helpers (No changes needed) ---
-def _parse_count(s: str, start: int) -> Tuple[int, int]:
-    """Helper function to parse the count from a string.
-    Args:
-        s: The string to parse
-        start: The starting index for parsing
-    Returns:
-        Tuple containing:
-        - The parsed count as an integer
-        - The index after the count
-    """
-    j = start
-    while j < len(s) and s[j].isdigit(): j += 1
-    return int(s[start:j]), j
+def _placeholder_run(length: int) -> str:
+    """Compressed form of a run of placeholders inside a row (runs of 3+ are RLE-encoded, as in compress())."""
+    return f"{PLACEHOLDER_CHAR}{length}" if length >= 3 else PLACEHOLDER_CHAR * length
 
+# --- Character Access Helpers (No changes needed) ---
 def get_char_at(s: str, index: int) -> str:
     """
     Get the character at a specific index in a decompressed string.
@@ -123,18 +108,37 @@ def get_char_at(s: str, index: int) -> str:
     Raises:
         IndexError: If the index is out of range
     """
+    if index < 0: raise IndexError("Index out of range")
     decompressed_index = 0
-    i = 0
-    while i < len(s):
-        if i + 1 < len(s) and s[i + 1].isdigit():
-            char = s[i]; count, i = _parse_count(s, i + 1)
-            if decompressed_index + count > index: return char
-            decompressed_index += count
-        else:
-            if decompressed_index == index: return s[i]
-            decompressed_index += 1; i += 1
+    for char, count_str in RLE_RUN_PATTERN.findall(s): # One (char, count) pair per run; count '' means 1
+        decompressed_index += int(count_str) if count_str else 1
+        if decompressed_index > index: return char
     raise IndexError("Index out of range")
 
+def decompressed_length(s: str) -> int:
+    """
+    Length of the decompressed form of an RLE string, computed from the run counts (O(runs), no decompression).
+
+    Args:
+        s: The compressed string
+    Returns:
+        The length of decompress(s)
+    """
+    return sum(int(count_str) if count_str else 1 for _, count_str in RLE_RUN_PATTERN.findall(s))
+
+def row_status_chars(s: str) -> Set[str]:
+    """
+    Returns which of the unverified status chars ('p', 's', 'S') occur in a row, reading the compressed form directly.
+    RLE counts are digits, so they can never be mistaken for dependency chars and no decompression is needed.
+    One substring search per status char (C memchr over the row) beats hashing every char of the row.
+
+    Args:
+        s: The compressed string
+    Returns:
+        Subset of STATUS_CHARS present in the row
+    """
+    return {ch for ch in STATUS_CHARS if ch in s}
+
 def set_char_at(s: str, index: int, new_char: str) -> str:
     """Set a character at a specific index and return the compressed string.
     Args:
@@ -156,22 +160,20 @@ def set_char_at(s: str, index: int, new_char: str) -> str:
     return compress(decompressed)
 
 # --- Grid Validation ---
-# <<< *** MODIFIED SORTING *** >>>
-@cached("grid_validation", # Caching needs careful review if inputs change frequently or if side effects (logging) matter
-       key_func=lambda grid, keys: f"validate_grid:{hash(str(sorted(grid.items())))}:{':'.join(sort_key_strings_hierarchically(keys))}") # Use hierarchical sort for keys part
-def validate_grid(grid: Dict[str, str], sorted_keys_list: List[str]) -> bool:
+def decompress_validated_grid(grid: Dict[str, str], sorted_keys_list: List[str]) -> Optional[Dict[str, str]]:
     """
-    Validate a dependency grid for consistency with keys.
-    Uses standard sorting for key strings. Provides detailed logging.
+    Validate a dependency grid for consistency with keys, keeping each row's decompressed form.
+    Same checks and logging as validate_grid, but not cached, so writers can reuse the rows
+    instead of decompressing the grid a second time.
 
     Args:
         grid: Dictionary mapping keys to compressed dependency strings
         sorted_keys_list: Pre-sorted list of keys expected in the grid.
     Returns:
-        True if valid, False otherwise
+        Dictionary mapping each key to its decompressed row if valid, None otherwise
     """
-    if not isinstance(grid, dict): logger.error("Grid validation failed: 'grid' not a dict."); return False
-    if not isinstance(sorted_keys_list, list): logger.error("Grid validation failed: 'sorted_keys_list' not a list."); return False
+    if not isinstance(grid, dict): logger.error("Grid validation failed: 'grid' not a dict."); return None
+    if not isinstance(sorted_keys_list, list): logger.error("Grid validation failed: 'sorted_keys_list' not a list."); return None
 
     # <<< *** REMOVE REDUNDANT SORT *** >>>
     # try:
@@ -182,35 +184,53 @@ def validate_grid(grid: Dict[str, str], sorted_keys_list: List[str]) -> bool:
     #     logger.error(f"Grid validation failed: Error processing keys - {e}"); return False
 
     num_keys = len(sorted_keys_list)
-    if num_keys == 0 and not grid: return True # Empty grid and keys is valid
-    if num_keys == 0 and grid: logger.error("Grid validation failed: Grid not empty but keys list is."); return False
+    if num_keys == 0 and not grid: return {} # Empty grid and keys is valid
+    if num_keys == 0 and grid: logger.error("Grid validation failed: Grid not empty but keys list is."); return None
 
+    decompressed_rows: Dict[str, str] = {}
     expected_keys_set = set(sorted_keys_list)
     actual_grid_keys_set = set(grid.keys())
 
     # 1. Check row keys match expected keys
     missing_rows = expected_keys_set - actual_grid_keys_set
     extra_rows = actual_grid_keys_set - expected_keys_set
-    if missing_rows: logger.error(f"Grid validation failed: Missing rows for keys: {sorted(list(missing_rows))}"); return False
-    if extra_rows: logger.error(f"Grid validation failed: Extra rows found for keys: {sorted(list(extra_rows))}"); return False
+    if missing_rows: logger.error(f"Grid validation failed: Missing rows for keys: {sorted(list(missing_rows))}"); return None
+    if extra_rows: logger.error(f"Grid validation failed: Extra rows found for keys: {sorted(list(extra_rows))}"); return None
 
     # 2. Check row lengths and diagonal character
     for idx, key in enumerate(sorted_keys_list):
         compressed_row = grid.get(key)
-        if compressed_row is None: logger.error(f"Grid validation failed: Row missing for key '{key}'."); return False # Should have been caught
+        if compressed_row is None: logger.error(f"Grid validation failed: Row missing for key '{key}'."); return None # Should have been caught
 
         try: decompressed = decompress(compressed_row)
-        except Exception as e: logger.error(f"Grid validation failed: Error decompressing row '{key}': {e}"); return False
+        except Exception as e: logger.error(f"Grid validation failed: Error decompressing row '{key}': {e}"); return None
+        decompressed_rows[key] = decompressed
 
-        if len(decompressed) != num_keys: logger.error(f"Grid validation failed: Row '{key}' length incorrect (Exp:{num_keys}, Got:{len(decompressed)})."); return False
+        if len(decompressed) != num_keys: logger.error(f"Grid validation failed: Row '{key}' length incorrect (Exp:{num_keys}, Got:{len(decompressed)})."); return None
 
         # <<< *** Check character at the current index 'idx' *** >>>
         if decompressed[idx] != DIAGONAL_CHAR:
             logger.error(f"Grid validation failed: Row for key '{key}' has incorrect diagonal character at index {idx} (Expected: '{DIAGONAL_CHAR}', Got: '{decompressed[idx]}'). Row: '{decompressed}'")
-            return False
+            return None
 
     logger.debug("Grid validation successful.")
-    return True
+    return decompressed_rows
+
+# <<< *** MODIFIED SORTING *** >>>
+@cached("grid_validation", # Caching needs careful review if inputs change frequently or if side effects (logging) matter
+       key_func=lambda grid, keys: f"validate_grid:{hash(str(sorted(grid.items())))}:{':'.join(sort_key_strings_hierarchically(keys))}") # Use hierarchical sort for keys part
+def validate_grid(grid: Dict[str, str], sorted_keys_list: List[str]) -> bool:
+    """
+    Validate a dependency grid for consistency with keys.
+    Uses standard sorting for key strings. Provides detailed logging.
+
+    Args:
+        grid: Dictionary mapping keys to compressed dependency strings
+        sorted_keys_list: Pre-sorted list of keys expected in the grid.
+    Returns:
+        True if valid, False otherwise
+    """
+    return decompress_validated_grid(grid, sorted_keys_list) is not None
 
 # --- Grid Modification (No changes needed) ---
 def add_dependency_to_grid(grid: Dict[str, str], source_key: str, target_key: str,
@@ -7,10 +7,10 @@ contextual model with tier promotion for nested subdirectories.
 Persists the global key map to a file and maintains the previous version.
 """
 
+import functools
 import glob
 import os
 import re
-import json # Added for saving/loading map
 import shutil # Added for renaming
 from typing import Dict, List, Tuple, Optional, Set, NamedTuple
 from collections import defaultdict
@@ -19,6 +19,7 @@ from collections import defaultdict
 try:
     from cline_utils.dependency_system.utils.path_utils import get_project_root, normalize_path
     from cline_utils.dependency_system.utils.config_manager import ConfigManager
+    from cline_utils.dependency_system.utils.json_utils import dump_json_file, load_json_file
 
 except ImportError:
     # Handle potential path issues if run standalone or structure changes
@@ -31,6 +32,11 @@ except ImportError:
         def get_excluded_extensions(self): return set()
         def get_excluded_paths(self): return []
         def get_excluded_file_patterns(self): return []
+    import json
+    def load_json_file(p):
+        with open(p, 'r', encoding='utf-8') as f: return json.load(f)
+    def dump_json_file(p, data, indent=False):
+        with open(p, 'w', encoding='utf-8') as f: json.dump(data, f, indent=2 if indent else None)
 
 import logging
 logger = logging.getLogger(__name__)
@@ -46,6 +52,7 @@ ASCII_Z_LOWER = 122 # ASCII value for 'z'
 HIERARCHICAL_KEY_PATTERN = r'^[1-9]\d*[A-Z](?:[a-z](?:[1-9]\d*)?|[1-9]\d*)?$'
 # Pattern for splitting keys into sortable parts (numbers and non-numbers)
 KEY_PATTERN = r'\d+|\D+'
+KEY_PATTERN_RE = re.compile(KEY_PATTERN)
 GLOBAL_KEY_MAP_FILENAME = "global_key_map.json"
 OLD_GLOBAL_KEY_MAP_FILENAME = "global_key_map_old.json" # <<< NEW
 
@@ -380,8 +387,7 @@ def generate_keys(root_paths: List[str], excluded_dirs: Optional[Set[str]] = Non
 
         # Step 2: Save the newly generated map to the current filename
         serializable_map = {path: info._asdict() for path, info in path_to_key_info.items()}
-        with open(current_map_path, 'w', encoding='utf-8') as f:
-            json.dump(serializable_map, f, indent=2)
+        dump_json_file(current_map_path, serializable_map, indent=True)
         logger.info(f"Successfully saved new global key map to: {current_map_path}")
     except IOError as e:
         logger.error(f"I/O Error saving global key map to {current_map_path}: {e}", exc_info=True)
@@ -411,8 +417,7 @@ def load_global_key_map() -> Optional[Dict[str, KeyInfo]]:
             logger.error(f"Global key map file not found at {map_path}. Run project analysis ('analyze-project') first.")
             return None
 
-        with open(map_path, 'r', encoding='utf-8') as f:
-            loaded_data = json.load(f)
+        loaded_data = load_json_file(map_path)
 
         # Convert dictionary data back into KeyInfo objects
         path_to_key_info: Dict[str, KeyInfo] = {}
@@ -426,7 +431,7 @@ def load_global_key_map() -> Optional[Dict[str, KeyInfo]]:
         logger.info(f"Successfully loaded global key map ({len(path_to_key_info)} entries) from: {map_path}")
         return path_to_key_info
 
-    except json.JSONDecodeError as e:
+    except ValueError as e: # json.JSONDecodeError and orjson.JSONDecodeError are both ValueErrors
         logger.error(f"Error decoding JSON from global key map file {map_path}: {e}", exc_info=True)
         return None
     except IOError as e:
@@ -436,15 +441,18 @@ def load_global_key_map() -> Optional[Dict[str, KeyInfo]]:
         logger.exception(f"Unexpected error loading global key map from {map_path}: {e}")
         return None
 
+def old_global_key_map_path() -> str:
+    """Normalized path of the persisted PREVIOUS global key map (alongside key_manager.py)."""
+    return normalize_path(os.path.join(os.path.dirname(os.path.abspath(__file__)), OLD_GLOBAL_KEY_MAP_FILENAME))
+
 def load_old_global_key_map() -> Optional[Dict[str, KeyInfo]]:
     """Loads the persisted PREVIOUS global path_to_key_info map."""
     try:
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        map_path = normalize_path(os.path.join(script_dir, OLD_GLOBAL_KEY_MAP_FILENAME)) # Target old map
+        map_path = old_global_key_map_path() # Target old map
         if not os.path.exists(map_path):
             logger.warning(f"Previous global key map file not found: {map_path}. This may be the first run.")
             return None # Return None gracefully if old map doesn't exist
-        with open(map_path, 'r', encoding='utf-8') as f: loaded_data = json.load(f)
+        loaded_data = load_json_file(map_path)
         path_to_key_info: Dict[str, KeyInfo] = {}
         for path, info_dict in loaded_data.items():
             try: path_to_key_info[path] = KeyInfo(**info_dict)
@@ -519,6 +527,43 @@ def get_key_from_path(path: str, path_to_key_info: Dict[str, KeyInfo]) -> Option
     info = path_to_key_info.get(norm_path)
     return info.key_string if info else None
 
+def build_key_string_index(path_to_key_info: Dict[str, KeyInfo]) -> Dict[str, List[KeyInfo]]:
+    """
+    Builds a key_string -> [KeyInfo, ...] index in one pass over the map.
+    Key strings are not globally unique, so every match is kept (in map order); callers can detect ambiguity in O(1).
+    """
+    key_string_index: Dict[str, List[KeyInfo]] = defaultdict(list)
+    for info in path_to_key_info.values(): key_string_index[info.key_string].append(info)
+    return key_string_index
+
+def build_first_key_info_map(path_to_key_info: Dict[str, KeyInfo]) -> Dict[str, KeyInfo]:
+    """
+    Builds a key_string -> KeyInfo map keeping the FIRST match in map order,
+    i.e. the same result as next(info for info in map.values() if info.key_string == k) for every k.
+    """
+    first_info_by_key: Dict[str, KeyInfo] = {}
+    for info in path_to_key_info.values(): first_info_by_key.setdefault(info.key_string, info)
+    return first_info_by_key
+
+def build_children_index(path_to_key_info: Dict[str, KeyInfo]) -> Dict[str, List[KeyInfo]]:
+    """
+    Builds a parent_path -> [child KeyInfo, ...] index in one pass over the map (children kept in map order).
+    Lets callers that visit many directories find each one's direct children without rescanning the whole map.
+    """
+    children_by_parent: Dict[str, List[KeyInfo]] = defaultdict(list)
+    for info in path_to_key_info.values(): children_by_parent[info.parent_path].append(info)
+    return children_by_parent
+
+@functools.lru_cache(maxsize=8192)
+def hierarchical_sort_key(key_str: str) -> Tuple:
+    """
+    Natural-sort key for a key string (e.g. '1A10' -> (1, 'A', 10)).
+    Memoized: the same key strings are sorted repeatedly across trackers and display sections.
+    """
+    if not key_str or not isinstance(key_str, str): return () # Handle invalid input
+    # Convert numeric parts to integers for correct numerical sorting (tier first)
+    return tuple((int(p) if p.isdigit() else p) for p in KEY_PATTERN_RE.findall(key_str))
+
 def sort_key_strings_hierarchically(keys: List[str]) -> List[str]:
     """
     Sorts a list of key strings hierarchically (natural sort order).
@@ -530,23 +575,9 @@ def sort_key_strings_hierarchically(keys: List[str]) -> List[str]:
     Returns:
         A new list containing the sorted key strings.
     """
-    def sort_key_func(key_str: str):
-        if not key_str or not isinstance(key_str, str): return [] # Handle invalid input
-        parts = re.findall(KEY_PATTERN, key_str)
-        # Convert numeric parts to integers for correct numerical sorting
-        try:
-            # Ensure tier (first part if numeric) is handled correctly
-            # The pattern splits correctly, just need conversion
-            converted_parts = [(int(p) if p.isdigit() else p) for p in parts]
-        except (ValueError, TypeError):
-             logger.warning(f"Could not convert parts for sorting key string '{key_str}', using basic string sort.")
-             converted_parts = parts # Fallback
-        # Return tuple for sorting (implicitly handles tier first if pattern is correct)
-        return converted_parts
-
     # Filter out potential None or non-string elements before sorting
     valid_keys = [k for k in keys if isinstance(k, str) and k]
-    return sorted(valid_keys, key=sort_key_func)
+    return sorted(valid_keys, key=hierarchical_sort_key)
 
 # --- Modify sort_keys to be explicit about KeyInfo ---
 # Rename original sort_keys to avoid confusion if needed, or keep as is
@@ -565,7 +596,7 @@ def sort_keys(key_info_list: List[KeyInfo]) -> List[KeyInfo]:
         # Handle potential None values if list source isn't guaranteed clean
         if key_info is None or not hasattr(key_info, 'key_string'): return (float('inf'), [])
 
-        key = key_info.key_string; parts = re.findall(KEY_PATTERN, key)
+        key = key_info.key_string; parts = KEY_PATTERN_RE.findall(key)
         # Convert numeric parts to integers for correct numerical sorting
         try: converted_parts = [(int(p) if p.isdigit() else p) for p in parts]
         except (ValueError, TypeError):
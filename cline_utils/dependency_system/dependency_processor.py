@@ -6,28 +6,30 @@ Processes command-line arguments and delegates to appropriate handlers.
 """
 
 import argparse
+import functools
 from collections import defaultdict
 import json
 import logging
+import logging.handlers
 import os
 import sys
-import re
 import glob
 from typing import Dict, List, Tuple, Any, Optional, Set
 
 # --- Core Imports ---
 from cline_utils.dependency_system.core.dependency_grid import (
     PLACEHOLDER_CHAR, compress, decompress, get_char_at, set_char_at,
-    add_dependency_to_grid, get_dependencies_from_grid
+    add_dependency_to_grid, get_dependencies_from_grid, row_status_chars
 )
 from cline_utils.dependency_system.core.key_manager import (
-    KeyInfo, KeyGenerationError, load_old_global_key_map, validate_key, sort_key_strings_hierarchically,
+    KeyInfo, KeyGenerationError, load_old_global_key_map, validate_key, sort_key_strings_hierarchically, hierarchical_sort_key,
+    build_key_string_index,
     load_global_key_map
 )
 
 # --- IO Imports ---
 from cline_utils.dependency_system.io.tracker_io import (
-    PathMigrationInfo, _build_path_migration_map, remove_key_from_tracker, merge_trackers, write_tracker_file,
+    FileToModuleView, PathMigrationInfo, _build_path_migration_map, _write_bytes_atomic, classify_tracker, remove_key_from_tracker, merge_trackers, write_tracker_file,
     export_tracker, update_tracker
 )
 
@@ -37,25 +39,30 @@ from cline_utils.dependency_system.analysis.dependency_analyzer import analyze_f
 
 # --- Utility Imports ---
 from cline_utils.dependency_system.utils.path_utils import (
-    get_project_root, normalize_path
+    get_project_root, normalize_path, FILENAME_SAFE_TABLE
 )
 from cline_utils.dependency_system.utils.config_manager import ConfigManager
 from cline_utils.dependency_system.utils.cache_manager import (
-    clear_all_caches, file_modified, invalidate_dependent_entries
+    clear_all_caches, file_modified, invalidate_dependent_entries, invalidate_dependent_entries_bulk
 )
 from cline_utils.dependency_system.utils.tracker_utils import (
-    read_tracker_file, find_all_tracker_paths, aggregate_all_dependencies
+    read_tracker_file, find_all_tracker_paths, aggregate_all_dependencies,
+    KEY_DEFINITIONS_START_MARKER, KEY_DEFINITIONS_END_MARKER
 )
 
 from cline_utils.dependency_system.utils.template_generator import add_code_doc_dependency_to_checklist, _get_item_type as get_item_type_for_checklist
-from cline_utils.dependency_system.utils.visualize_dependencies import generate_mermaid_diagram # Renamed for clarity
+from cline_utils.dependency_system.utils.visualize_dependencies import generate_mermaid_diagram, MERMAID_INFO_EMPTY # Renamed for clarity
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
 # --- Constants ---
-KEY_DEFINITIONS_START_MARKER = "---KEY_DEFINITIONS_START---"
-KEY_DEFINITIONS_END_MARKER = "---KEY_DEFINITIONS_END---"
+ALLOWED_DEP_TYPES = frozenset({'<', '>', 'x', 'd', 'o', 'n', 'p', 's', 'S'}) # Dependency type validation for add-dependency
+ALLOWED_DEP_TYPES_DISPLAY = ', '.join(sorted(ALLOWED_DEP_TYPES))
+
+# Display category of a link seen from its target's side: '>' (target depends on source) shows under
+# Depends On ('<') and vice versa; 'x', 'd', 's', 'S', 'p' remain the same category regardless of direction
+REVERSED_DEP_DIRECTION = {'>': '<', '<': '>'}
 
 # --- Helper Functions ---
 def _load_global_map_or_exit() -> Dict[str, KeyInfo]:
@@ -70,27 +77,14 @@ def _load_global_map_or_exit() -> Dict[str, KeyInfo]:
     logger.info("Global key map loaded successfully.")
     return path_to_key_info
 
-def is_parent_child(key1_str: str, key2_str: str, global_map: Dict[str, KeyInfo]) -> bool:
-    """Checks if two keys represent a direct parent-child directory relationship."""
-    info1 = next((info for path, info in global_map.items() if info.key_string == key1_str), None)
-    info2 = next((info for path, info in global_map.items() if info.key_string == key2_str), None)
-
-    if not info1 or not info2:
-        logger.debug(f"is_parent_child: Could not find KeyInfo for '{key1_str if not info1 else ''}' or '{key2_str if not info2 else ''}'. Returning False.")
-        return False # Cannot determine relationship if info is missing
-
-    # Ensure paths are normalized (they should be from KeyInfo, but double-check)
-    path1 = normalize_path(info1.norm_path)
-    path2 = normalize_path(info2.norm_path)
-    parent1 = normalize_path(info1.parent_path) if info1.parent_path else None
-    parent2 = normalize_path(info2.parent_path) if info2.parent_path else None
+def _current_state_migration_map(global_map: Dict[str, KeyInfo]) -> PathMigrationInfo:
+    """Fallback migration map that treats every current path as unchanged (old key == new key)."""
+    return {info.norm_path: (info.key_string, info.key_string) for info in global_map.values()}
 
-    # Check both directions: info1 is parent of info2 OR info2 is parent of info1
-    is_parent1 = parent2 == path1
-    is_parent2 = parent1 == path2
-
-    logger.debug(f"is_parent_child check: {key1_str}({path1}) vs {key2_str}({path2}). Is Parent1: {is_parent1}, Is Parent2: {is_parent2}")
-    return is_parent1 or is_parent2
+def _first_info_for_key(keystr_index: Dict[str, List[KeyInfo]], key_str: str) -> Optional[KeyInfo]:
+    """Returns the first KeyInfo for key_str (same result as a linear scan of the global map), or None."""
+    infos = keystr_index.get(key_str)
+    return infos[0] if infos else None
 
 # --- Command Handlers ---
 
@@ -188,7 +182,7 @@ def handle_remove_key(args: argparse.Namespace) -> int:
         # Invalidate cache for the modified tracker
         invalidate_dependent_entries('tracker_data', f"tracker_data:{normalize_path(args.tracker_file)}:.*")
         # Broader invalidation might be needed if other caches depend on grid structure
-        invalidate_dependent_entries('grid_decompress', '.*'); invalidate_dependent_entries('grid_validation', '.*'); invalidate_dependent_entries('grid_dependencies', '.*')
+        invalidate_dependent_entries_bulk(('grid_decompress', 'grid_validation', 'grid_dependencies'), '.*')
         return 0
     except FileNotFoundError as e: print(f"Error: {e}"); return 1
     except ValueError as e: print(f"Error: {e}"); return 1 # e.g., key not found in tracker
@@ -198,17 +192,16 @@ def handle_remove_key(args: argparse.Namespace) -> int:
 def handle_add_dependency(args: argparse.Namespace) -> int:
     """Handle the add-dependency command. Allows adding foreign keys to mini-trackers."""
     tracker_path = normalize_path(args.tracker)
-    is_mini_tracker = tracker_path.endswith("_module.md")
+    tracker_type = classify_tracker(tracker_path)
+    is_mini_tracker = tracker_type == "mini"
     source_key_str = args.source_key # Renamed for clarity
     target_keys_str_list = args.target_key # Renamed for clarity
     dep_type = args.dep_type
-    # Dependency type validation
-    ALLOWED_DEP_TYPES = {'<', '>', 'x', 'd', 'o', 'n', 'p', 's', 'S'}
     logger.info(f"Attempting to add dependency: {source_key_str} -> {target_keys_str_list} ({dep_type}) in tracker {tracker_path}")
 
     # --- Basic Validation ---
     if dep_type not in ALLOWED_DEP_TYPES:
-        print(f"Error: Invalid dep type '{dep_type}'. Allowed: {', '.join(sorted(list(ALLOWED_DEP_TYPES)))}")
+        print(f"Error: Invalid dep type '{dep_type}'. Allowed: {ALLOWED_DEP_TYPES_DISPLAY}")
         return 1
 
     # --- Load Local Tracker Data ---
@@ -221,6 +214,13 @@ def handle_add_dependency(args: argparse.Namespace) -> int:
         return 1
     # If it's a mini-tracker and doesn't exist, update_tracker will handle creation.
 
+    # Main/doc trackers can't take foreign keys: reject targets missing locally before paying for the global map load
+    if not is_mini_tracker:
+        missing_local_target = next((t for t in target_keys_str_list if t != source_key_str and t not in local_keys_map), None)
+        if missing_local_target is not None:
+            print(f"Error: Target key '{missing_local_target}' not found in tracker '{tracker_path}' (and it's not a mini-tracker allowing foreign key addition).")
+            return 1
+
     # --- Load global map and config (needed for item type and checklist) ---
     # Load ONCE and use this instance throughout the function.
     loaded_global_path_to_key_info = _load_global_map_or_exit() 
@@ -229,11 +229,12 @@ def handle_add_dependency(args: argparse.Namespace) -> int:
         print("Critical Error: Global key map could not be loaded. Aborting add-dependency.", file=sys.stderr)
         return 1
         
-    config = ConfigManager()
+    config = ConfigManager.get()
     project_root = get_project_root() # Needed by get_item_type_for_checklist
 
-    # Get KeyInfo for source using the loaded map
-    source_key_info = next((info for info in loaded_global_path_to_key_info.values() if info.key_string == source_key_str), None)
+    # Get KeyInfo for source using the loaded map (index built once; replaces per-target linear scans)
+    keystr_index = build_key_string_index(loaded_global_path_to_key_info)
+    source_key_info = _first_info_for_key(keystr_index, source_key_str)
     if not source_key_info:
         print(f"Error: Source key '{source_key_str}' not found in global key map.")
         return 1
@@ -244,38 +245,30 @@ def handle_add_dependency(args: argparse.Namespace) -> int:
     foreign_adds = []     # List of (target_key, dep_type) for valid foreign targets (mini-trackers only)
     checklist_updates_pending = [] # Store (source_key, target_key, dep_type) for checklist
 
-    for target_key_str in target_keys_str_list:
-        if target_key_str == source_key_str:
-             logger.warning(f"Skipping self-dependency: {source_key_str} -> {target_key_str}")
-             continue
-
-        # Use the 'loaded_global_path_to_key_info' which holds the actual map
-        target_key_info = next((info for info in loaded_global_path_to_key_info.values() if info.key_string == target_key_str), None)
-        if not target_key_info:
-            print(f"Error: Target key '{target_key_str}' not found in global key map. Cannot add dependency.")
-            return 1 
-        
-        target_item_type = get_item_type_for_checklist(target_key_info.norm_path, config, project_root)
-
-        # Check if this is a code-doc or doc-code link
-        if (source_item_type == "code" and target_item_type == "doc") or \
-           (source_item_type == "doc" and target_item_type == "code"):
-            checklist_updates_pending.append((source_key_str, target_key_str, dep_type))
-            logger.info(f"Identified code-doc link for checklist: {source_key_str} ({source_item_type}) -> {target_key_str} ({target_item_type})")
-
+    if source_key_str in target_keys_str_list: logger.warning(f"Skipping self-dependency: {source_key_str} -> {source_key_str}")
+    target_keys_to_apply = [t for t in dict.fromkeys(target_keys_str_list) if t != source_key_str] # De-duplicated, order kept
+    # Validate every target up front (one set pass) and report all unknown keys together
+    missing_global_targets = [t for t in target_keys_to_apply if t not in keystr_index]
+    if missing_global_targets:
+        print(f"Error: Target key(s) {', '.join(repr(t) for t in missing_global_targets)} not found in global key map. Cannot add dependency.")
+        return 1
+    # Checklist links only exist between code and doc items; skip per-target typing when the source is neither
+    check_checklist_links = source_item_type in ("code", "doc")
+    for target_key_str in target_keys_to_apply:
+        if check_checklist_links:
+            target_item_type = get_item_type_for_checklist(keystr_index[target_key_str][0].norm_path, config, project_root)
+            # Check if this is a code-doc or doc-code link
+            if target_item_type in ("code", "doc") and target_item_type != source_item_type:
+                checklist_updates_pending.append((source_key_str, target_key_str, dep_type))
+                logger.info(f"Identified code-doc link for checklist: {source_key_str} ({source_item_type}) -> {target_key_str} ({target_item_type})")
 
         if target_key_str in local_keys_map:
             internal_changes.append((target_key_str, dep_type))
-            logger.debug(f"Target '{target_key_str}' found locally. Queued for internal update.")
-        elif is_mini_tracker:
-            # No need to reload or check global_map_loaded anymore.
-            # 'loaded_global_path_to_key_info' is already available and verified.
-            # The target_key_info check above already confirms its global existence.
+        else:
+            # Only reachable for mini-trackers: non-local targets on main/doc trackers were rejected before the map load
             foreign_adds.append((target_key_str, dep_type))
             logger.info(f"Target '{target_key_str}' is valid globally. Queued for foreign key addition to mini-tracker.")
-        else:
-            print(f"Error: Target key '{target_key_str}' not found in tracker '{tracker_path}' (and it's not a mini-tracker allowing foreign key addition).")
-            return 1
+    if internal_changes: logger.debug(f"{len(internal_changes)} target(s) found locally. Queued for internal update.")
 
     # --- Combine all changes ---
     all_targets_for_source = internal_changes + foreign_adds
@@ -285,12 +278,8 @@ def handle_add_dependency(args: argparse.Namespace) -> int:
 
     suggestions_for_update = {source_key_str: all_targets_for_source} if all_targets_for_source else None # Pass None if list is empty
     
-    # Generate file_to_module map using the correctly loaded global map
-    file_to_module_map = {
-        info.norm_path: info.parent_path
-        for info in loaded_global_path_to_key_info.values() # Use the loaded map
-        if not info.is_directory and info.parent_path
-    }
+    # Lazy file_to_module view over the correctly loaded global map (only the looked-up files are touched)
+    file_to_module_map = FileToModuleView(loaded_global_path_to_key_info)
 
     # --- Call update_tracker for ALL cases (mini, main, doc) ---
     # Let update_tracker handle type determination, reading, writing, content preservation
@@ -300,7 +289,7 @@ def handle_add_dependency(args: argparse.Namespace) -> int:
             update_tracker(
                 output_file_suggestion=tracker_path,
                 path_to_key_info=loaded_global_path_to_key_info, # Pass the loaded map
-                tracker_type="mini" if is_mini_tracker else ("doc" if "doc_tracker.md" in tracker_path else "main"),
+                tracker_type=tracker_type,
                 suggestions=suggestions_for_update,
                 file_to_module=file_to_module_map,
                 new_keys=None,
@@ -363,7 +352,7 @@ def handle_export_tracker(args: argparse.Namespace) -> int:
 
 def handle_update_config(args: argparse.Namespace) -> int:
     """Handle the update-config command."""
-    config_manager = ConfigManager()
+    config_manager = ConfigManager.get()
     try:
         # Attempt to parse value as JSON (allows lists/dicts), fall back to string
         try: value = json.loads(args.value)
@@ -375,7 +364,7 @@ def handle_update_config(args: argparse.Namespace) -> int:
 
 def handle_reset_config(args: argparse.Namespace) -> int:
     """Handle the reset-config command."""
-    config_manager = ConfigManager()
+    config_manager = ConfigManager.get()
     try:
         success = config_manager.reset_to_defaults()
         if success: print("Config reset to defaults."); return 0
@@ -390,9 +379,10 @@ def handle_show_dependencies(args: argparse.Namespace) -> int:
     # --- Load CURRENT Global Map ---
     current_global_map = _load_global_map_or_exit() # path_to_key_info
    
-    config = ConfigManager()
+    config = ConfigManager.get()
     project_root = get_project_root()
-    matching_infos = [info for info in current_global_map.values() if info.key_string == target_key_str]
+    keystr_index = build_key_string_index(current_global_map)
+    matching_infos = keystr_index.get(target_key_str, [])
     if not matching_infos:
         print(f"Error: Key string '{target_key_str}' not found in the project.")
         return 1
@@ -418,10 +408,10 @@ def handle_show_dependencies(args: argparse.Namespace) -> int:
     except ValueError as ve:
          logger.error(f"Failed to build migration map for show-dependencies: {ve}. Results may be inaccurate.")
          # Create a dummy "current state only" migration map as a fallback
-         path_migration_info = {info.norm_path: (info.key_string, info.key_string) for info in current_global_map.values()}
+         path_migration_info = _current_state_migration_map(current_global_map)
     except Exception as e:
          logger.error(f"Unexpected error building migration map for show-dependencies: {e}. Results may be inaccurate.", exc_info=True)
-         path_migration_info = {info.norm_path: (info.key_string, info.key_string) for info in current_global_map.values()}
+         path_migration_info = _current_state_migration_map(current_global_map)
 
 
     # --- Use Utility Functions ---
@@ -431,12 +421,13 @@ def handle_show_dependencies(args: argparse.Namespace) -> int:
     # Pass the generated path_migration_info to aggregate_all_dependencies
     aggregated_links_with_origins = aggregate_all_dependencies(
         all_tracker_paths, 
-        path_migration_info # MODIFIED: Pass the migration map
+        path_migration_info, # MODIFIED: Pass the migration map
+        filter_keys={target_key_str} # Only links touching the target are displayed
     )
 
     # --- Process Aggregated Results for Display ---
     all_dependencies_by_type = defaultdict(set) # Store sets of (dep_key_string, dep_path_string) tuples
-    origin_tracker_map_display = defaultdict(lambda: defaultdict(set)) # For p/s/S origins
+    origin_tracker_map_display: Dict[Tuple[str, str], Set[str]] = {} # (display_char, dep_key) -> origins, for p/s/S
 
     logger.debug(f"Filtering aggregated links for target key display: {target_key_str}")
     for (source, target), (dep_char, origins) in aggregated_links_with_origins.items():
@@ -447,20 +438,17 @@ def handle_show_dependencies(args: argparse.Namespace) -> int:
         elif target == target_key_str:
             dep_key_str = source # Source is the dependency shown
             # Adjust display category based on relationship direction relative to target
-            if dep_char == '>': display_char = '<' # Target depends on Source (show Source in Depends On)
-            elif dep_char == '<': display_char = '>' # Source depends on Target (show Source in Depended On By)
-            # 'x', 'd', 's', 'S' remain the same category regardless of direction
-            else: display_char = dep_char
+            display_char = REVERSED_DEP_DIRECTION.get(dep_char, dep_char)
 
         if dep_key_str:
             # Find path for the dependency key
-            dep_info = next((info for info in current_global_map.values() if info.key_string == dep_key_str), None)
+            dep_info = _first_info_for_key(keystr_index, dep_key_str)
             dep_path_str = dep_info.norm_path if dep_info else "PATH_NOT_FOUND_GLOBALLY"
             # Add to the correct category for display
             all_dependencies_by_type[display_char].add((dep_key_str, dep_path_str))
             # Track origins specifically for p/s/S if needed for display
             if display_char in ('p', 's', 'S'):
-                origin_tracker_map_display[display_char][dep_key_str].update(origins)
+                origin_tracker_map_display.setdefault((display_char, dep_key_str), set()).update(origins)
 
     # --- Print results ---
     output_sections = [
@@ -472,22 +460,12 @@ def handle_show_dependencies(args: argparse.Namespace) -> int:
         print(f"\n{section_title}:")
         dep_set = all_dependencies_by_type.get(dep_char_filter)
         if dep_set:
-            # Define helper for hierarchical sorting
-            def _hierarchical_sort_key_func(key_str_local: str): # Renamed key_str
-                KEY_PATTERN = r'\d+|\D+' 
-                if not key_str_local or not isinstance(key_str_local, str): return []
-                parts = re.findall(KEY_PATTERN, key_str_local)
-                try:
-                    return [(int(p) if p.isdigit() else p) for p in parts]
-                except (ValueError, TypeError): # Fallback
-                    logger.warning(f"Could not convert parts for sorting display key '{key_str_local}'")
-                    return parts
-            sorted_deps = sorted(list(dep_set), key=lambda item: _hierarchical_sort_key_func(item[0]))
+            sorted_deps = sorted(dep_set, key=lambda item: hierarchical_sort_key(item[0]))
             for dep_key, dep_path in sorted_deps:
                 # Check for and add origin info for p/s/S
                 origin_info = ""
                 if dep_char_filter in ('p', 's', 'S'):
-                    origins = origin_tracker_map_display.get(dep_char_filter, {}).get(dep_key, set())
+                    origins = origin_tracker_map_display.get((dep_char_filter, dep_key), ())
                     if origins:
                         # Format origin filenames nicely
                         origin_filenames = sorted([os.path.basename(p) for p in origins])
@@ -532,21 +510,18 @@ def handle_show_keys(args: argparse.Namespace) -> int:
 
         # Sort keys hierarchically for consistent output
         sorted_keys = sort_key_strings_hierarchically(list(keys_map.keys()))
-        print(f"--- Keys Defined in {os.path.basename(tracker_path)} ---") # Header for clarity
+        out_lines = [f"--- Keys Defined in {os.path.basename(tracker_path)} ---"] # Header for clarity; output is written in one call
 
+        # Rows come from the grid dict parsed once by read_tracker_file (cached per path/mtime/size); bind lookups once
+        get_path = keys_map.get; get_row = grid_map.get if grid_map else None
         for key_string in sorted_keys:
-            file_path = keys_map.get(key_string, "PATH_UNKNOWN")
+            file_path = get_path(key_string, "PATH_UNKNOWN")
             check_indicator = "" # Renamed for clarity
             # Check the grid for 'p', 's', or 'S' *only if* the grid exists
-            if grid_map:
-                compressed_row = grid_map.get(key_string, "")
+            if get_row is not None:
+                compressed_row = get_row(key_string, "")
                 if compressed_row: # Check if the row string exists and is not empty
-                    found_chars = []
-                    # Check for each character efficiently using 'in'. This is safe
-                    # as 'p', 's', 'S' won't appear in RLE counts (which are digits).
-                    if 'p' in compressed_row: found_chars.append('p')
-                    if 's' in compressed_row: found_chars.append('s')
-                    if 'S' in compressed_row: found_chars.append('S')
+                    found_chars = row_status_chars(compressed_row) # Reads the compressed row; no decompression
                     if found_chars:
                         sorted_chars = sorted(found_chars)
                         chars_str = ", ".join(sorted_chars)
@@ -557,18 +532,16 @@ def handle_show_keys(args: argparse.Namespace) -> int:
                     logger.warning(f"Key '{key_string}' found in definitions but missing from grid in {tracker_path}")
             else: # Grid is missing entirely
                 check_indicator = " (grid missing)"
-            # Print the key, path, and the indicator (if any checks are needed or row is missing)
-            print(f"{key_string}: {file_path}{check_indicator}")
-        print("--- End of Key Definitions ---")
-        try:
-            with open(tracker_path, 'r', encoding='utf-8') as f_check:
-                content = f_check.read()
-                if KEY_DEFINITIONS_START_MARKER not in content:
-                     logger.warning(f"Start marker '{KEY_DEFINITIONS_START_MARKER}' not found in {tracker_path}")
-                if KEY_DEFINITIONS_END_MARKER not in content:
-                     logger.warning(f"End marker '{KEY_DEFINITIONS_END_MARKER}' not found in {tracker_path}")
-        except Exception:
-             logger.warning(f"Could not perform marker check on {tracker_path}")
+            # Emit the key, path, and the indicator (if any checks are needed or row is missing)
+            out_lines.append(f"{key_string}: {file_path}{check_indicator}")
+        out_lines.append("--- End of Key Definitions ---")
+        sys.stdout.write("\n".join(out_lines) + "\n"); sys.stdout.flush()
+        # Marker presence was recorded when the tracker was read; no second read of the file
+        has_start_marker, has_end_marker = tracker_data.get("key_markers", (False, False))
+        if not has_start_marker:
+             logger.warning(f"Start marker '{KEY_DEFINITIONS_START_MARKER}' not found in {tracker_path}")
+        if not has_end_marker:
+             logger.warning(f"End marker '{KEY_DEFINITIONS_END_MARKER}' not found in {tracker_path}")
         return 0
     except IOError as e:
         print(f"Error reading tracker file {tracker_path}: {e}", file=sys.stderr)
@@ -596,7 +569,7 @@ def handle_visualize_dependencies(args: argparse.Namespace) -> int:
     # 3. Load necessary data
     try:
         current_global_map_cli = _load_global_map_or_exit() # Renamed for clarity
-        config_cli = ConfigManager()
+        config_cli = ConfigManager.get()
         project_root_cli = get_project_root()
         # Use find_all_tracker_paths from tracker_io module
         all_tracker_paths_cli = find_all_tracker_paths(config_cli, project_root_cli)
@@ -612,10 +585,10 @@ def handle_visualize_dependencies(args: argparse.Namespace) -> int:
         except ValueError as ve:
             logger.error(f"Failed to build migration map for visualize-dependencies: {ve}. Visualization may be based on current state only or fail.")
             # Fallback to a "current state only" dummy migration map
-            path_migration_info_cli = {info.norm_path: (info.key_string, info.key_string) for info in current_global_map_cli.values()}
+            path_migration_info_cli = _current_state_migration_map(current_global_map_cli)
         except Exception as e:
             logger.error(f"Unexpected error building migration map for visualize-dependencies: {e}. Visualization may be inaccurate.", exc_info=True)
-            path_migration_info_cli = {info.norm_path: (info.key_string, info.key_string) for info in current_global_map_cli.values()}
+            path_migration_info_cli = _current_state_migration_map(current_global_map_cli)
 
     except Exception as e:
         logger.exception("Failed to load data required for visualization.")
@@ -624,7 +597,7 @@ def handle_visualize_dependencies(args: argparse.Namespace) -> int:
 
 
     # 4. Call the core generation function from the new module
-    mermaid_string_generated = generate_mermaid_diagram(
+    mermaid_result = generate_mermaid_diagram(
         focus_keys_list=focus_keys_list_cli,
         global_path_to_key_info_map=current_global_map_cli, # Still pass current map for node info
         path_migration_info=path_migration_info_cli,       # Pass the migration map
@@ -632,14 +605,11 @@ def handle_visualize_dependencies(args: argparse.Namespace) -> int:
         config_manager_instance=config_cli
     )
 
-    # 5. Handle the result (Mermaid string or None)
-    if mermaid_string_generated is None:
-        print("Error: Mermaid diagram generation failed internally. Check logs.", file=sys.stderr)
-        return 1
-    elif "Error:" in mermaid_string_generated[:20]: # Check if the string itself contains an error message
-         print(mermaid_string_generated, file=sys.stderr)
+    # 5. Handle the result (typed: failure and "no data" are flagged, not parsed out of the text)
+    if not mermaid_result.ok:
+         print(mermaid_result.text, file=sys.stderr)
          return 1
-    elif "// No relevant data" in mermaid_string_generated:
+    elif mermaid_result.info == MERMAID_INFO_EMPTY:
          print("Info: No relevant data found to visualize based on focus keys and filters.")
          # Still save the basic mermaid file for consistency? Or just return 0? Let's save it.
     else:
@@ -648,11 +618,12 @@ def handle_visualize_dependencies(args: argparse.Namespace) -> int:
 
     # 6. Determine output path
     output_path_cli = output_path_arg_cli # User-specified output path
-    if not output_path_cli:
+    using_default_path = not output_path_cli
+    if using_default_path:
         # Construct default path
         if focus_keys_list_cli:
             # Create a filename-safe string from potentially multiple keys
-            safe_keys_str = "_".join(sorted(focus_keys_list_cli)).replace("/", "_").replace("\\", "_")
+            safe_keys_str = "_".join(sorted(focus_keys_list_cli)).translate(FILENAME_SAFE_TABLE)
             # Limit filename length
             max_len = 50
             if len(safe_keys_str) > max_len:
@@ -661,21 +632,14 @@ def handle_visualize_dependencies(args: argparse.Namespace) -> int:
         else:
             default_filename = f"project_overview_dependencies.{output_format_cli}"
 
-        # --- Define the default directory ---
-        # Use memory_dir from config, defaulting to 'cline_docs' if not set
+        # Default directory: memory_dir from config (defaulting to 'cline_docs') / dependency_diagrams
         memory_dir_rel = config_cli.get_path('memory_dir', 'cline_docs')
-        default_output_dir_rel = os.path.join(memory_dir_rel, "dependency_diagrams")
-        # --- End Define Default Dir ---
+        output_path_cli = os.path.join(memory_dir_rel, "dependency_diagrams", default_filename)
 
-        # Combine relative default dir with project root and default filename
-        output_path_cli = normalize_path(os.path.join(project_root_cli, default_output_dir_rel, default_filename))
-        logger.info(f"No output path specified, using default: {output_path_cli}")
-
-    # Ensure output path is normalized (if user provided relative path, make it absolute)
-    elif not os.path.isabs(output_path_cli):
-         output_path_cli = normalize_path(os.path.join(project_root_cli, output_path_cli))
-    else:
-         output_path_cli = normalize_path(output_path_cli)
+    # Default and user-given relative paths both resolve against the project root; one join, one normalize
+    if not os.path.isabs(output_path_cli): output_path_cli = os.path.join(project_root_cli, output_path_cli)
+    output_path_cli = normalize_path(output_path_cli)
+    if using_default_path: logger.info(f"No output path specified, using default: {output_path_cli}")
 
 
     # 7. Write the output file
@@ -684,12 +648,11 @@ def handle_visualize_dependencies(args: argparse.Namespace) -> int:
         if output_dir_cli: # Only create if it's not the current directory
             os.makedirs(output_dir_cli, exist_ok=True)
 
-        with open(output_path_cli, 'w', encoding='utf-8') as f_out:
-            f_out.write(mermaid_string_generated)
+        _write_bytes_atomic(output_path_cli, mermaid_result.text.encode('utf-8')) # One encode, one write, then os.replace
 
         logger.info(f"Successfully wrote Mermaid visualization to: {output_path_cli}")
         print(f"\nDependency visualization saved to: {output_path_cli}")
-        if "// No relevant data" not in mermaid_string_generated: # Only print view instructions if there's data
+        if mermaid_result.info != MERMAID_INFO_EMPTY: # Only print view instructions if there's data
              print("You can view this file using Mermaid Live Editor (mermaid.live) or compatible Markdown viewers.")
         return 0
     except IOError as e:
@@ -701,17 +664,14 @@ def handle_visualize_dependencies(args: argparse.Namespace) -> int:
         print(f"Error: An unexpected error occurred while writing output: {e}", file=sys.stderr)
         return 1
 
-def main():
-    """Parse arguments and dispatch to handlers."""
-    parser = argparse.ArgumentParser(description="Dependency tracking system CLI")
-    subparsers = parser.add_subparsers(dest="command", help="Available commands", required=True)
-
-    # --- Analysis Commands ---
+# --- CLI subcommand configuration (one function per subcommand, built only when needed) ---
+def _configure_analyze_file(subparsers):
     analyze_file_parser = subparsers.add_parser("analyze-file", help="Analyze a single file")
     analyze_file_parser.add_argument("file_path", help="Path to the file")
     analyze_file_parser.add_argument("--output", help="Save results to JSON file")
     analyze_file_parser.set_defaults(func=command_handler_analyze_file)
 
+def _configure_analyze_project(subparsers):
     analyze_project_parser = subparsers.add_parser("analyze-project", help="Analyze project, generate keys/embeddings, update trackers")
     analyze_project_parser.add_argument("project_root", nargs='?', default='.', help="Project directory path (default: CWD)")
     analyze_project_parser.add_argument("--output", help="Save analysis summary to JSON file")
@@ -719,20 +679,23 @@ def main():
     analyze_project_parser.add_argument("--force-analysis", action="store_true", help="Force re-analysis and bypass cache")
     analyze_project_parser.set_defaults(func=command_handler_analyze_project)
 
-    # --- Grid Manipulation Commands ---
+def _configure_compress(subparsers):
     compress_parser = subparsers.add_parser("compress", help="Compress RLE string")
     compress_parser.add_argument("string", help="String to compress")
     compress_parser.set_defaults(func=handle_compress)
 
+def _configure_decompress(subparsers):
     decompress_parser = subparsers.add_parser("decompress", help="Decompress RLE string")
     decompress_parser.add_argument("string", help="String to decompress")
     decompress_parser.set_defaults(func=handle_decompress)
 
+def _configure_get_char(subparsers):
     get_char_parser = subparsers.add_parser("get_char", help="Get char at logical index in compressed string")
     get_char_parser.add_argument("string", help="Compressed string")
     get_char_parser.add_argument("index", type=int, help="Logical index")
     get_char_parser.set_defaults(func=handle_get_char)
 
+def _configure_set_char(subparsers):
     set_char_parser = subparsers.add_parser("set_char", help="Set char at logical index in a tracker file")
     set_char_parser.add_argument("tracker_file", help="Path to tracker file")
     set_char_parser.add_argument("key", type=str, help="Row key")
@@ -740,6 +703,7 @@ def main():
     set_char_parser.add_argument("char", type=str, help="New character")
     set_char_parser.set_defaults(func=handle_set_char)
 
+def _configure_add_dependency(subparsers):
     add_dep_parser = subparsers.add_parser("add-dependency", help="Add dependency between keys")
     add_dep_parser.add_argument("--tracker", required=True, help="Path to tracker file")
     add_dep_parser.add_argument("--source-key", required=True, help="Source key")
@@ -747,45 +711,51 @@ def main():
     add_dep_parser.add_argument("--dep-type", default=">", help="Dependency type (e.g., '>', '<', 'x')")
     add_dep_parser.set_defaults(func=handle_add_dependency)
 
-    # --- Tracker File Management ---
+def _configure_remove_key(subparsers):
     remove_key_parser = subparsers.add_parser("remove-key", help="Remove a key and its row/column from a specific tracker")
     remove_key_parser.add_argument("tracker_file", help="Path to the tracker file (.md)")
     remove_key_parser.add_argument("key", type=str, help="The key string to remove from this tracker")
     remove_key_parser.set_defaults(func=handle_remove_key)
 
+def _configure_merge_trackers(subparsers):
     merge_parser = subparsers.add_parser("merge-trackers", help="Merge two tracker files")
     merge_parser.add_argument("primary_tracker_path", help="Primary tracker")
     merge_parser.add_argument("secondary_tracker_path", help="Secondary tracker")
     merge_parser.add_argument("--output", "-o", help="Output path (defaults to primary)")
     merge_parser.set_defaults(func=handle_merge_trackers)
 
+def _configure_export_tracker(subparsers):
     export_parser = subparsers.add_parser("export-tracker", help="Export tracker data")
     export_parser.add_argument("tracker_file", help="Path to tracker file")
     export_parser.add_argument("--format", choices=["json", "csv", "dot"], default="json", help="Export format")
     export_parser.add_argument("--output", "-o", help="Output file path")
     export_parser.set_defaults(func=handle_export_tracker)
 
-    # --- Utility Commands ---
+def _configure_clear_caches(subparsers):
     clear_caches_parser = subparsers.add_parser("clear-caches", help="Clear all internal caches")
     clear_caches_parser.set_defaults(func=handle_clear_caches)
 
+def _configure_reset_config(subparsers):
     reset_config_parser = subparsers.add_parser("reset-config", help="Reset config to defaults")
     reset_config_parser.set_defaults(func=handle_reset_config)
 
+def _configure_update_config(subparsers):
     update_config_parser = subparsers.add_parser("update-config", help="Update a config setting")
     update_config_parser.add_argument("key", help="Config key path (e.g., 'paths.doc_dir')")
     update_config_parser.add_argument("value", help="New value (JSON parse attempted)")
     update_config_parser.set_defaults(func=handle_update_config)
 
+def _configure_show_dependencies(subparsers):
     show_deps_parser = subparsers.add_parser("show-dependencies", help="Show aggregated dependencies for a key")
     show_deps_parser.add_argument("--key", required=True, help="Key string to show dependencies for")
     show_deps_parser.set_defaults(func=handle_show_dependencies)
 
-    # --- Show Keys Command ---
+def _configure_show_keys(subparsers):
     show_keys_parser = subparsers.add_parser("show-keys", help="Show keys from tracker, indicating if checks needed (p, s, S)")
     show_keys_parser.add_argument("--tracker", required=True, help="Path to the tracker file (.md)")
     show_keys_parser.set_defaults(func=handle_show_keys)
 
+def _configure_visualize_dependencies(subparsers):
     visualize_parser = subparsers.add_parser("visualize-dependencies", help="Generate a visualization of dependencies")
     visualize_parser.add_argument(
         "--key",
@@ -805,17 +775,46 @@ def main():
     )
     visualize_parser.set_defaults(func=handle_visualize_dependencies)
 
-    args = parser.parse_args()
-
-    # --- Setup Logging ---
+# Subcommand name -> configure function; order matches the --help listing
+COMMANDS = {
+    # --- Analysis Commands ---
+    "analyze-file": _configure_analyze_file,
+    "analyze-project": _configure_analyze_project,
+    # --- Grid Manipulation Commands ---
+    "compress": _configure_compress,
+    "decompress": _configure_decompress,
+    "get_char": _configure_get_char,
+    "set_char": _configure_set_char,
+    "add-dependency": _configure_add_dependency,
+    # --- Tracker File Management ---
+    "remove-key": _configure_remove_key,
+    "merge-trackers": _configure_merge_trackers,
+    "export-tracker": _configure_export_tracker,
+    # --- Utility Commands ---
+    "clear-caches": _configure_clear_caches,
+    "reset-config": _configure_reset_config,
+    "update-config": _configure_update_config,
+    "show-dependencies": _configure_show_dependencies,
+    "show-keys": _configure_show_keys,
+    "visualize-dependencies": _configure_visualize_dependencies,
+}
+
+# Commands that only transform their arguments; no log files are opened for them
+QUICK_COMMANDS = frozenset({"compress", "decompress", "get_char"})
+LOG_MAX_BYTES = 4_000_000 # Rotate debug/suggestion logs past this size
+LOG_BACKUP_COUNT = 2
+
+@functools.lru_cache(maxsize=None)
+def _init_logging() -> None:
+    """Attach the debug-file, suggestions-file and console handlers to the root logger (once per process)."""
     log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     root_logger = logging.getLogger(); root_logger.setLevel(logging.DEBUG)
     log_file_path = 'debug.txt'; suggestions_log_path = 'suggestions.log'
-    try: # File Handler
-        file_handler = logging.FileHandler(log_file_path, mode='w'); file_handler.setLevel(logging.DEBUG); file_handler.setFormatter(log_formatter); root_logger.addHandler(file_handler)
+    try: # File Handler (appends; rotated instead of truncated on every run)
+        file_handler = logging.handlers.RotatingFileHandler(log_file_path, mode='a', maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'); file_handler.setLevel(logging.DEBUG); file_handler.setFormatter(log_formatter); root_logger.addHandler(file_handler)
     except Exception as e: print(f"Error setting up file logger {log_file_path}: {e}", file=sys.stderr)
     try: # Suggestions Handler
-        suggestion_handler = logging.FileHandler(suggestions_log_path, mode='w'); suggestion_handler.setLevel(logging.DEBUG); suggestion_handler.setFormatter(log_formatter)
+        suggestion_handler = logging.handlers.RotatingFileHandler(suggestions_log_path, mode='a', maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'); suggestion_handler.setLevel(logging.DEBUG); suggestion_handler.setFormatter(log_formatter)
         class SuggestionLogFilter(logging.Filter):
             def filter(self, record): return record.name.startswith('cline_utils.dependency_system.analysis') # Broaden slightly
         suggestion_handler.addFilter(SuggestionLogFilter()); root_logger.addHandler(suggestion_handler)
@@ -823,6 +822,22 @@ def main():
     # Console Handler
     console_handler = logging.StreamHandler(sys.stdout); console_handler.setLevel(logging.INFO); console_handler.setFormatter(log_formatter); root_logger.addHandler(console_handler)
 
+def main():
+    """Parse arguments and dispatch to handlers."""
+    parser = argparse.ArgumentParser(description="Dependency tracking system CLI")
+    subparsers = parser.add_subparsers(dest="command", help="Available commands", required=True)
+
+    # Only build the chosen subcommand's parser; --help, unknown or missing commands get the full listing
+    chosen_command = sys.argv[1] if len(sys.argv) > 1 else None
+    if chosen_command in COMMANDS: COMMANDS[chosen_command](subparsers)
+    else:
+        for configure in COMMANDS.values(): configure(subparsers)
+
+    args = parser.parse_args()
+
+    # --- Setup Logging --- (skipped for quick string utilities; their handlers print errors directly)
+    if args.command not in QUICK_COMMANDS: _init_logging()
+
     # Execute command
     if hasattr(args, 'func'):
         exit_code = args.func(args)
@@ -7,40 +7,47 @@ Relies solely on global key maps for path stability validation.
 """
 
 from collections import defaultdict
+from collections.abc import Mapping
+import contextlib
 import datetime
 import io
 import json
 import os
 import re
 import shutil
-from typing import Dict, List, Tuple, Any, Optional, Set
+import threading
+import numpy as np
+from typing import Dict, FrozenSet, List, Tuple, Any, Optional, Set
 
 # --- Core Imports ---
 from cline_utils.dependency_system.core.key_manager import (
     KeyInfo,
     load_global_key_map,
     load_old_global_key_map,
+    old_global_key_map_path,
     validate_key,
     sort_keys as sort_key_info, # Renamed for clarity - only use for List[KeyInfo]
     get_key_from_path as get_key_string_from_path,
-    sort_key_strings_hierarchically
+    sort_key_strings_hierarchically,
+    build_first_key_info_map,
+    build_children_index
 )
 from cline_utils.dependency_system.core.dependency_grid import (
-    compress, create_initial_grid, decompress, validate_grid,
+    compress, create_initial_grid, decompress, decompress_validated_grid, decompressed_length,
     PLACEHOLDER_CHAR, EMPTY_CHAR, DIAGONAL_CHAR
 )
 
 # --- Utility Imports ---
 from cline_utils.dependency_system.utils.path_utils import get_project_root, is_subpath, normalize_path, join_paths
 from cline_utils.dependency_system.utils.config_manager import ConfigManager
-from cline_utils.dependency_system.utils.cache_manager import cached, check_file_modified, invalidate_dependent_entries
+from cline_utils.dependency_system.utils.cache_manager import cached, check_file_modified, invalidate_dependent_entries, invalidate_dependent_entries_bulk
 from cline_utils.dependency_system.utils.tracker_utils import (
-    aggregate_all_dependencies, find_all_tracker_paths, read_tracker_file
+    aggregate_all_dependencies, find_all_tracker_paths, read_tracker_file, _tracker_file_signature, KEY_LINE_PATTERN, GRID_LINE_PATTERN
 )
 
 # --- IO Imports ---
 from cline_utils.dependency_system.io.update_doc_tracker import doc_tracker_data
-from cline_utils.dependency_system.io.update_mini_tracker import get_mini_tracker_data
+from cline_utils.dependency_system.io.update_mini_tracker import mini_tracker_data
 from cline_utils.dependency_system.io.update_main_tracker import main_tracker_data
 
 
@@ -50,7 +57,67 @@ logger = logging.getLogger(__name__)
 # Type alias for the migration map
 PathMigrationInfo = Dict[str, Tuple[Optional[str], Optional[str]]] # path -> (old_key, new_key)
 
+# Section marker / edit metadata lines (surrounding spaces/tabs allowed, searched in whole-file content) and backup file timestamps, compiled once
+KEY_DEF_START_PATTERN = re.compile(r'^[^\S\n]*---KEY_DEFINITIONS_START---[^\S\n]*$', re.IGNORECASE | re.MULTILINE)
+KEY_DEF_END_PATTERN = re.compile(r'^[^\S\n]*---KEY_DEFINITIONS_END---[^\S\n]*$', re.IGNORECASE | re.MULTILINE)
+GRID_START_PATTERN = re.compile(r'^[^\S\n]*---GRID_START---[^\S\n]*$', re.IGNORECASE | re.MULTILINE)
+GRID_END_PATTERN = re.compile(r'^[^\S\n]*---GRID_END---[^\S\n]*$', re.IGNORECASE | re.MULTILINE)
+LAST_KEY_EDIT_PATTERN = re.compile(r'^[^\S\n]*last_key_edit[^:\n]*:(.*)$', re.IGNORECASE | re.MULTILINE)
+LAST_GRID_EDIT_PATTERN = re.compile(r'^[^\S\n]*last_grid_edit[^:\n]*:(.*)$', re.IGNORECASE | re.MULTILINE)
+# Mini-tracker marker lines; matched exactly (surrounding whitespace aside), like the line.strip() == marker checks they replace
+MINI_START_PATTERN = re.compile(r'^[^\S\n]*' + re.escape(mini_tracker_data["markers"][0]) + r'[^\S\n]*$', re.MULTILINE)
+MINI_END_PATTERN = re.compile(r'^[^\S\n]*' + re.escape(mini_tracker_data["markers"][1]) + r'[^\S\n]*$', re.MULTILINE)
+BACKUP_TIMESTAMP_PATTERN = re.compile(r'\.(\d{8}_\d{6}_\d{6})\.bak$')
+PLACEHOLDER_ORD = ord(PLACEHOLDER_CHAR); DIAGONAL_ORD = ord(DIAGONAL_CHAR) # Byte values used by the uint8 grid matrices in _merge_grids
+
+class FileToModuleView(Mapping):
+    """
+    Read-only norm_file_path -> module (parent) path mapping backed by a global key map.
+    Equivalent to {info.norm_path: info.parent_path for files with a parent} without building it up front;
+    lookups go straight to the path-keyed map, so CLI commands touching a few files don't pay for the whole project.
+    """
+    __slots__ = ("_path_to_key_info",)
+
+    def __init__(self, path_to_key_info: Dict[str, KeyInfo]):
+        self._path_to_key_info = path_to_key_info
+
+    def __getitem__(self, file_path: str) -> str:
+        info = self._path_to_key_info.get(file_path)
+        if info is None or info.is_directory or not info.parent_path: raise KeyError(file_path)
+        return info.parent_path
+
+    def __iter__(self):
+        return (info.norm_path for info in self._path_to_key_info.values() if not info.is_directory and info.parent_path)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __bool__(self) -> bool:
+        return any(True for _ in self) # Stops at the first file instead of counting all of them
+
+def classify_tracker(tracker_path: str) -> str:
+    """Returns the tracker type ('mini', 'doc' or 'main') implied by a tracker file name (suffix checks only)."""
+    if tracker_path.endswith("_module.md"): return "mini"
+    if tracker_path.endswith("doc_tracker.md"): return "doc"
+    return "main"
+
 # --- Migration Map Builder ---
+def _key_map_fingerprint(global_map: Optional[Dict[str, KeyInfo]]) -> str:
+    """Cheap content fingerprint of a key map (path -> key_string pairs); 'none' for a missing/empty map."""
+    if not global_map: return "none"
+    return f"{len(global_map)}:{hash(tuple((path, info.key_string) for path, info in global_map.items()))}"
+
+# The old map only changes when key generation rotates it, so one parse serves every update_tracker call in a run.
+# Callers only read the returned map.
+@cached("old_global_key_map", key_func=lambda: f"old_global_key_map:{_tracker_file_signature(old_global_key_map_path())}")
+def _load_old_global_key_map_cached() -> Optional[Dict[str, KeyInfo]]:
+    """load_old_global_key_map, reused until the old map file changes (mtime_ns/size). A missing map (None) is not cached."""
+    return load_old_global_key_map()
+
+# Pure function of the two maps; reused across the many update_tracker calls in one analysis run.
+# Callers treat the returned map as read-only.
+@cached("path_migration",
+        key_func=lambda old_global_map, new_global_map: f"migration:{_key_map_fingerprint(old_global_map)}:{_key_map_fingerprint(new_global_map)}")
 def _build_path_migration_map(
     old_global_map: Optional[Dict[str, KeyInfo]],
     new_global_map: Dict[str, KeyInfo]
@@ -69,74 +136,67 @@ def _build_path_migration_map(
     path_migration_info: PathMigrationInfo = {}
     logger.info("Building path migration map based on global key maps...")
 
-    # Create reverse lookups (Path -> Key)
-    old_path_to_key: Dict[str, str] = {}
-    new_path_to_key: Dict[str, str] = {}
-    old_paths: Set[str] = set()
-    new_paths: Set[str] = set()
-
+    # Single pass per map, writing (old_key, new_key) slots directly; a filled slot on the same side is a duplicate
+    old_count = 0
     if old_global_map:
         duplicates_old = set()
-        for path, info in old_global_map.items():
-            norm_p = normalize_path(path) # Ensure normalization
-            if norm_p in old_path_to_key:
+        for info in old_global_map.values():
+            norm_p = info.norm_path # Normalized when the KeyInfo was built; no per-entry re-normalization
+            existing = path_migration_info.get(norm_p)
+            if existing is not None:
                  if norm_p not in duplicates_old: # Log only once per duplicate
-                    logger.critical(f"CRITICAL ERROR: Duplicate path '{norm_p}' found in OLD global key map! Keys: '{old_path_to_key[norm_p]}' and '{info.key_string}'. Aborting migration map build.")
+                    logger.critical(f"CRITICAL ERROR: Duplicate path '{norm_p}' found in OLD global key map! Keys: '{existing[0]}' and '{info.key_string}'. Aborting migration map build.")
                     duplicates_old.add(norm_p)
             else:
-                 old_path_to_key[norm_p] = info.key_string
-                 old_paths.add(norm_p)
+                 path_migration_info[norm_p] = (info.key_string, None)
         if duplicates_old:
             raise ValueError("Duplicate paths found in old global key map. Cannot proceed.")
-        logger.debug(f"Old global map: Found {len(old_paths)} unique paths.")
+        old_count = len(path_migration_info)
+        logger.debug(f"Old global map: Found {old_count} unique paths.")
     else:
         logger.warning("Old global map not provided or loaded. Path stability relies only on new map.")
 
-    duplicates_new = set()
-    for path, info in new_global_map.items():
-        norm_p = normalize_path(path) # Ensure normalization
-        if norm_p in new_path_to_key:
+    duplicates_new = set(); new_count = 0; stable_count = 0
+    for info in new_global_map.values():
+        norm_p = info.norm_path # Normalized when the KeyInfo was built
+        existing = path_migration_info.get(norm_p)
+        if existing is None: path_migration_info[norm_p] = (None, info.key_string); new_count += 1
+        elif existing[1] is not None:
              if norm_p not in duplicates_new:
-                 logger.critical(f"CRITICAL ERROR: Duplicate path '{norm_p}' found in NEW global key map! Keys: '{new_path_to_key[norm_p]}' and '{info.key_string}'. Aborting migration map build.")
+                 logger.critical(f"CRITICAL ERROR: Duplicate path '{norm_p}' found in NEW global key map! Keys: '{existing[1]}' and '{info.key_string}'. Aborting migration map build.")
                  duplicates_new.add(norm_p)
-        else:
-            new_path_to_key[norm_p] = info.key_string
-            new_paths.add(norm_p)
+        else: path_migration_info[norm_p] = (existing[0], info.key_string); new_count += 1; stable_count += 1
     if duplicates_new:
         raise ValueError("Duplicate paths found in new global key map. Cannot proceed.")
-    logger.debug(f"New global map: Found {len(new_paths)} unique paths.")
-
-
-    # Determine stable, removed, added paths
-    stable_paths = old_paths.intersection(new_paths) if old_global_map else new_paths # If no old map, only "new" paths are considered stable relative to themselves
-    removed_paths = old_paths - new_paths if old_global_map else set()
-    added_paths = new_paths - old_paths if old_global_map else set() # If no old map, all new paths are treated as 'added' for migration context
+    logger.debug(f"New global map: Found {new_count} unique paths.")
 
-    logger.info(f"Path comparison: Stable={len(stable_paths)}, Removed={len(removed_paths)}, Added={len(added_paths)}")
-
-    # Populate the migration map
-    for path in stable_paths:
-        old_key = old_path_to_key.get(path) # Will be None if old_global_map is None
-        new_key = new_path_to_key.get(path) # Should always exist if path is in new_paths
-        path_migration_info[path] = (old_key, new_key)
-
-    for path in removed_paths:
-        old_key = old_path_to_key.get(path) # Should exist
-        path_migration_info[path] = (old_key, None)
-
-    for path in added_paths:
-        new_key = new_path_to_key.get(path) # Should exist
-        path_migration_info[path] = (None, new_key)
+    # Without an old map every new path counts as stable relative to itself (old_key None)
+    if old_global_map: removed_count = old_count - stable_count; added_count = new_count - stable_count
+    else: stable_count = new_count; removed_count = added_count = 0
+    logger.info(f"Path comparison: Stable={stable_count}, Removed={removed_count}, Added={added_count}")
 
     logger.info(f"Path migration map built with {len(path_migration_info)} total path entries.")
     return path_migration_info
 
 
 # --- Path Finding ---
+def _config_mtime() -> float:
+    """mtime of the config file (0 if it does not exist), for cache keys that must change when the config does."""
+    try: return os.path.getmtime(ConfigManager.get().config_path)
+    except OSError: return 0
+
+@cached("excluded_abs_paths",
+        key_func=lambda project_root: f"excluded_abs_paths:{normalize_path(project_root)}:{_config_mtime()}")
+def _excluded_abs_paths(project_root: str) -> FrozenSet[str]:
+    """Absolute excluded directories and files from the config as one set (rebuilt only when the config file changes)."""
+    config = ConfigManager.get()
+    excluded_dirs_abs = {normalize_path(os.path.join(project_root, p)) for p in config.get_excluded_dirs()}
+    return frozenset(excluded_dirs_abs.union(config.get_excluded_paths()))
+
 # Caching for get_tracker_path (consider config mtime)
 @cached("tracker_paths",
         key_func=lambda project_root, tracker_type="main", module_path=None:
-         f"tracker_path:{normalize_path(project_root)}:{tracker_type}:{normalize_path(module_path) if module_path else 'none'}:{(os.path.getmtime(ConfigManager().config_path) if os.path.exists(ConfigManager().config_path) else 0)}")
+         f"tracker_path:{normalize_path(project_root)}:{tracker_type}:{normalize_path(module_path) if module_path else 'none'}:{_config_mtime()}")
 def get_tracker_path(project_root: str, tracker_type: str = "main", module_path: Optional[str] = None) -> str:
     """
     Get the path to the appropriate tracker file based on type. Ensures path uses forward slashes.
@@ -159,8 +219,8 @@ def get_tracker_path(project_root: str, tracker_type: str = "main", module_path:
         if not norm_module_path:
             raise ValueError("module_path must be provided for mini-trackers")
         # Use the dedicated function from the mini tracker data structure if available
-        if "get_tracker_path" in get_mini_tracker_data():
-             return normalize_path(get_mini_tracker_data()["get_tracker_path"](norm_module_path))
+        if "get_tracker_path" in mini_tracker_data:
+             return normalize_path(mini_tracker_data["get_tracker_path"](norm_module_path))
         else:
              # Fallback logic if get_tracker_path is not in mini_tracker_data
              module_name = os.path.basename(norm_module_path)
@@ -170,11 +230,53 @@ def get_tracker_path(project_root: str, tracker_type: str = "main", module_path:
         raise ValueError(f"Unknown tracker type: {tracker_type}")
 
 # --- File Writing ---
-def write_tracker_file(tracker_path: str,
-                       key_defs_to_write: Dict[str, str], # Key string -> Path string map
-                       grid_to_write: Dict[str, str], # Key string -> Compressed row map
-                       last_key_edit: str,
-                       last_grid_edit: str = "") -> bool:
+def _write_bytes_atomic(file_path: str, data: bytes) -> None:
+    """Writes data to a sibling temp file, then os.replace()s it over file_path so readers never see a partial file."""
+    tmp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o666)
+    try:
+        with os.fdopen(fd, 'wb') as f: f.write(data) # Single buffered write of the whole file
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try: os.remove(tmp_path)
+        except OSError: pass
+        raise
+
+def _file_has_bytes(file_path: str, data: bytes) -> bool:
+    """True if file_path exists with exactly data as its content. A size mismatch costs only a stat."""
+    try:
+        if os.stat(file_path).st_size != len(data): return False
+        with open(file_path, 'rb') as f: return f.read() == data
+    except OSError: return False
+
+class _TrackerBuffer(io.StringIO):
+    """In-memory tracker text; after the writer exits, written tells whether the file was actually replaced."""
+    written = False
+
+@contextlib.contextmanager
+def _atomic_tracker_writer(file_path: str, backup: bool = False):
+    """
+    Context manager yielding an in-memory text buffer; on normal exit the whole content is encoded once and
+    written atomically to file_path. If the block raises, the existing file is left untouched.
+    Byte-identical content is not rewritten (no backup either), so the file's mtime (and tracker_data cache key)
+    stays put and buffer.written stays False; callers skip their cache invalidation in that case.
+    With backup=True an existing file is backed up right before it is replaced.
+    """
+    buffer = _TrackerBuffer()
+    yield buffer
+    data = buffer.getvalue().encode('utf-8')
+    if _file_has_bytes(file_path, data): logger.debug(f"Tracker unchanged, skipping write: {file_path}"); return
+    if backup and os.path.exists(file_path): backup_tracker_file(file_path)
+    _write_bytes_atomic(file_path, data)
+    buffer.written = True
+
+def _write_tracker(tracker_path: str,
+                   key_defs_to_write: Dict[str, str], # Key string -> Path string map
+                   grid_to_write: Dict[str, str], # Key string -> Compressed row map
+                   last_key_edit: str,
+                   last_grid_edit: str = "",
+                   sorted_keys_list: Optional[List[str]] = None,
+                   backup: bool = False) -> Optional[bool]:
     """
     Write tracker data to a file in markdown format. Ensures directory exists.
     Performs validation before writing. Uses standard sorting for key strings.
@@ -185,42 +287,28 @@ def write_tracker_file(tracker_path: str,
         grid_to_write: Dictionary of grid rows (compressed strings), keyed by key strings.
         last_key_edit: Last key edit identifier
         last_grid_edit: Last grid edit identifier
+        sorted_keys_list: The keys of key_defs_to_write already in hierarchical order; sorted here if None.
+        backup: Back up the existing file first, if the content actually changes.
     Returns:
-        True if successful, False otherwise
+        True if the file was rewritten, False if it already had this content, None on failure
     """
     tracker_path = normalize_path(tracker_path)
     try:
         dirname = os.path.dirname(tracker_path); os.makedirs(dirname, exist_ok=True)
 
-        # Sort key strings using standard sorting
-        sorted_keys_list = sort_key_strings_hierarchically(list(key_defs_to_write.keys()))
+        # Sort key strings using standard sorting (unless the caller already did)
+        if sorted_keys_list is None: sorted_keys_list = sort_key_strings_hierarchically(list(key_defs_to_write.keys()))
 
         # --- Validate grid before writing ---
-        if not validate_grid(grid_to_write, sorted_keys_list):
+        if decompress_validated_grid(grid_to_write, sorted_keys_list) is None:
             logger.error(f"Aborting write to {tracker_path} due to grid validation failure.")
-            return False
+            return None
 
-        # Rebuild/Fix Grid to ensure consistency with sorted_keys_list
-        final_grid = {}
-        expected_len = len(sorted_keys_list)
-        key_to_idx = {key: i for i, key in enumerate(sorted_keys_list)}
-        for row_key in sorted_keys_list:
-            compressed_row = grid_to_write.get(row_key); row_list = None
-            if compressed_row is not None:
-                try:
-                    decompressed_row = decompress(compressed_row)
-                    if len(decompressed_row) == expected_len: row_list = list(decompressed_row)
-                    else: logger.warning(f"Correcting grid row length for key '{row_key}' in {tracker_path} (expected {expected_len}, got {len(decompressed_row)}).")
-                except Exception as decomp_err: logger.warning(f"Error decompressing row for key '{row_key}' in {tracker_path}: {decomp_err}. Re-initializing.")
-            if row_list is None:
-                row_list = [PLACEHOLDER_CHAR] * expected_len
-                row_idx = key_to_idx.get(row_key)
-                if row_idx is not None: row_list[row_idx] = DIAGONAL_CHAR
-                else: logger.error(f"Key '{row_key}' not found in index map during grid rebuild!")
-            final_grid[row_key] = compress("".join(row_list))
+        # Validation guarantees one full-length row per key, so the compressed rows are written as given (no re-compress)
+        final_grid = grid_to_write
 
         # --- Write Content ---
-        with open(tracker_path, 'w', encoding='utf-8', newline='\n') as f:
+        with _atomic_tracker_writer(tracker_path, backup=backup) as f: # Buffered; replaces the file in one step on success
             f.write("---KEY_DEFINITIONS_START---\n"); f.write("Key Definitions:\n")
             for key in sorted_keys_list:
                 f.write(f"{key}: {normalize_path(key_defs_to_write[key])}\n") # Ensure path uses forward slashes
@@ -238,14 +326,30 @@ def write_tracker_file(tracker_path: str,
             else: f.write("X \n")
             f.write("---GRID_END---\n")
 
+        if not f.written: return False
         logger.info(f"Successfully wrote tracker file: {tracker_path} with {len(sorted_keys_list)} keys.")
         # Invalidate cache for this specific tracker file after writing
         invalidate_dependent_entries('tracker_data', f"tracker_data:{tracker_path}:.*")
         return True
     except IOError as e:
-        logger.error(f"I/O Error writing tracker file {tracker_path}: {e}", exc_info=True); return False
+        logger.error(f"I/O Error writing tracker file {tracker_path}: {e}", exc_info=True); return None
     except Exception as e:
-        logger.exception(f"Unexpected error writing tracker file {tracker_path}: {e}"); return False
+        logger.exception(f"Unexpected error writing tracker file {tracker_path}: {e}"); return None
+
+def write_tracker_file(tracker_path: str,
+                       key_defs_to_write: Dict[str, str], # Key string -> Path string map
+                       grid_to_write: Dict[str, str], # Key string -> Compressed row map
+                       last_key_edit: str,
+                       last_grid_edit: str = "",
+                       sorted_keys_list: Optional[List[str]] = None) -> bool:
+    """
+    Write tracker data to a file in markdown format (see _write_tracker).
+    An unchanged tracker is left as is and counts as success.
+
+    Returns:
+        True if successful, False otherwise
+    """
+    return _write_tracker(tracker_path, key_defs_to_write, grid_to_write, last_key_edit, last_grid_edit, sorted_keys_list) is not None
 
 # --- Backup ---
 def backup_tracker_file(tracker_path: str) -> str:
@@ -268,24 +372,22 @@ def backup_tracker_file(tracker_path: str) -> str:
         base_name = os.path.basename(tracker_path)
         backup_filename = f"{base_name}.{timestamp}.bak"
         backup_path = os.path.join(backup_dir_abs, backup_filename)
-        shutil.copy2(tracker_path, backup_path)
+        shutil.copy2(tracker_path, backup_path) # A real copy: trackers may be edited in place, which would also rewrite a hardlink
         logger.info(f"Backed up tracker '{base_name}' to: {os.path.basename(backup_path)}")
         # --- Cleanup old backups ---
         try:
             # Find all backups for this specific base name
-            backup_files = []
-            for filename in os.listdir(backup_dir_abs):
-                if filename.startswith(base_name + ".") and filename.endswith(".bak"):
+            # Order comes from the name's timestamp, not st_mtime: copy2 keeps the tracker's mtime
+            backup_prefix = base_name + "."; backup_files = []
+            with os.scandir(backup_dir_abs) as entries:
+                for entry in entries:
+                    filename = entry.name
+                    if not (filename.startswith(backup_prefix) and filename.endswith(".bak")): continue
                     # Extract timestamp (handle potential variations if needed)
                     # Assuming format base_name.YYYYMMDD_HHMMSS_ffffff.bak
-                    match = re.search(r'\.(\d{8}_\d{6}_\d{6})\.bak$', filename)
-                    if match:
-                        timestamp_str = match.group(1)
-                        try:
-                            # Use timestamp object for reliable sorting
-                            file_timestamp = datetime.datetime.strptime(timestamp_str, "%Y%m%d_%H%M%S_%f")
-                            backup_files.append((file_timestamp, os.path.join(backup_dir_abs, filename)))
-                        except ValueError: logger.warning(f"Could not parse timestamp for backup: {filename}")
+                    match = BACKUP_TIMESTAMP_PATTERN.search(filename)
+                    # Fixed-width, zero-padded timestamps sort lexicographically in time order; no strptime needed
+                    if match: backup_files.append((match.group(1), entry.path))
             backup_files.sort(key=lambda x: x[0], reverse=True)
             if len(backup_files) > 2:
                 files_to_delete = backup_files[2:]
@@ -304,50 +406,36 @@ def _merge_grids(primary_grid: Dict[str, str], secondary_grid: Dict[str, str],
                  primary_keys_list: List[str], secondary_keys_list: List[str],
                  merged_keys_list: List[str]) -> Dict[str, str]:
     """Merges two decompressed grids based on the merged key list. Primary overwrites secondary."""
-    merged_decompressed_grid = {}; merged_size = len(merged_keys_list)
-    key_to_merged_idx = {key: i for i, key in enumerate(merged_keys_list)}
-    # Initialize merged grid with placeholders and diagonal
-    for i, row_key in enumerate(merged_keys_list):
-        row = [PLACEHOLDER_CHAR] * merged_size; row[i] = DIAGONAL_CHAR
-        merged_decompressed_grid[row_key] = row
-    config = ConfigManager(); get_priority = config.get_char_priority
+    merged_size = len(merged_keys_list)
     # Decompress input grids (handle potential errors)
-    def safe_decompress(grid_data, keys_list):
-        decomp_grid = {}; key_to_idx = {k: i for i, k in enumerate(keys_list)}; expected_len = len(keys_list)
+    key_to_primary_idx = _index_map(primary_keys_list)
+    key_to_secondary_idx = _index_map(secondary_keys_list)
+    def safe_decompress(grid_data, key_to_idx):
+        decomp_grid = {}; expected_len = len(key_to_idx)
         for key, compressed in grid_data.items():
             if key not in key_to_idx: continue
             try:
-                decomp = list(decompress(compressed))
-                if len(decomp) == expected_len: decomp_grid[key] = decomp
+                decomp = decompress(compressed)
+                if len(decomp) == expected_len: decomp_grid[key] = decomp.encode('ascii') # Dependency chars are ASCII; anything else fails here
                 else: logger.warning(f"Merge Prep: Incorrect length for key '{key}' (expected {expected_len}, got {len(decomp)}). Skipping row.")
             except Exception as e: logger.warning(f"Merge Prep: Failed to decompress row for key '{key}': {e}. Skipping row.")
         return decomp_grid
-    primary_decomp = safe_decompress(primary_grid, primary_keys_list)
-    secondary_decomp = safe_decompress(secondary_grid, secondary_keys_list)
-    key_to_primary_idx = {key: i for i, key in enumerate(primary_keys_list)}
-    key_to_secondary_idx = {key: i for i, key in enumerate(secondary_keys_list)}
-    # Apply values based on merged keys
-    for row_key in merged_keys_list:
-        merged_row_idx = key_to_merged_idx[row_key]
-        for col_key in merged_keys_list:
-            merged_col_idx = key_to_merged_idx[col_key]
-            if merged_row_idx == merged_col_idx: continue # Skip diagonal
-            # Get values from original grids if they exist
-            primary_val = None
-            if row_key in primary_decomp and col_key in key_to_primary_idx:
-                 pri_col_idx = key_to_primary_idx[col_key]
-                 if pri_col_idx < len(primary_decomp[row_key]): primary_val = primary_decomp[row_key][pri_col_idx]
-            secondary_val = None
-            if row_key in secondary_decomp and col_key in key_to_secondary_idx:
-                 sec_col_idx = key_to_secondary_idx[col_key]
-                 if sec_col_idx < len(secondary_decomp[row_key]): secondary_val = secondary_decomp[row_key][sec_col_idx]
-            # Determine final value (primary takes precedence over secondary, ignore placeholders)
-            final_val = PLACEHOLDER_CHAR
-            if primary_val is not None and primary_val != PLACEHOLDER_CHAR: final_val = primary_val
-            elif secondary_val is not None and secondary_val != PLACEHOLDER_CHAR: final_val = secondary_val
-            merged_decompressed_grid[row_key][merged_col_idx] = final_val
-    compressed_grid = {key: compress("".join(row_list)) for key, row_list in merged_decompressed_grid.items()}
-    return compressed_grid
+    def merged_view(grid_data, keys_list, key_to_idx) -> np.ndarray:
+        """The source grid as a (merged_size x merged_size) uint8 matrix in merged key order; absent rows/columns are placeholders."""
+        size = len(keys_list); decomp_grid = safe_decompress(grid_data, key_to_idx)
+        # One extra all-placeholder row and column (index size) stand in for keys the source does not have
+        matrix = np.full((size + 1, size + 1), PLACEHOLDER_ORD, dtype=np.uint8)
+        for key, row_bytes in decomp_grid.items(): matrix[key_to_idx[key], :size] = np.frombuffer(row_bytes, dtype=np.uint8)
+        rows = np.fromiter((key_to_idx[k] if k in decomp_grid else size for k in merged_keys_list), dtype=np.intp, count=merged_size)
+        cols = np.fromiter((key_to_idx.get(k, size) for k in merged_keys_list), dtype=np.intp, count=merged_size)
+        return matrix[np.ix_(rows, cols)]
+    primary_matrix = merged_view(primary_grid, primary_keys_list, key_to_primary_idx)
+    secondary_matrix = merged_view(secondary_grid, secondary_keys_list, key_to_secondary_idx)
+    # Primary takes precedence over secondary; placeholders never overwrite a real value
+    merged_matrix = np.where(primary_matrix != PLACEHOLDER_ORD, primary_matrix, secondary_matrix)
+    np.fill_diagonal(merged_matrix, DIAGONAL_ORD) # Diagonal always wins
+    merged_text = merged_matrix.tobytes().decode('ascii')
+    return {row_key: compress(merged_text[i * merged_size:(i + 1) * merged_size]) for i, row_key in enumerate(merged_keys_list)}
 
 # merge_trackers: Replace sort_keys with sort_key_strings_hierarchically
 def merge_trackers(primary_tracker_path: str, secondary_tracker_path: str, output_path: Optional[str] = None) -> Optional[Dict[str, Any]]:
@@ -374,19 +462,13 @@ def merge_trackers(primary_tracker_path: str, secondary_tracker_path: str, outpu
     if not current_global_map:
         logger.error("Merge failed: Cannot load current global key map.")
         return None
-    current_path_to_key = {info.norm_path: info.key_string for info in current_global_map.values()}
-    current_key_to_path = {info.key_string: info.norm_path for info in current_global_map.values()}
     logger.debug(f"Loaded current global map for merge ({len(current_global_map)} entries).")
 
-    # --- Backup ---
-    backup_made = False
-    if output_path == primary_tracker_path and os.path.exists(primary_tracker_path): backup_tracker_file(primary_tracker_path); backup_made = True
-    elif output_path == secondary_tracker_path and os.path.exists(secondary_tracker_path): backup_tracker_file(secondary_tracker_path); backup_made = True
-    if backup_made: logger.info(f"Backed up target file before merge: {os.path.basename(output_path)}")
     # Read both trackers (using cached read)
     primary_data = read_tracker_file(primary_tracker_path); secondary_data = read_tracker_file(secondary_tracker_path)
     # Check if data is valid
     primary_keys = primary_data.get("keys", {}); secondary_keys = secondary_data.get("keys", {})
+    merged_sorted_keys: Optional[List[str]] = None # Set when both trackers contribute keys
     if not primary_keys and not secondary_keys: logger.warning("Both trackers are empty or unreadable. Cannot merge."); return None
     elif not primary_keys: logger.info(f"Primary tracker {os.path.basename(primary_tracker_path)} empty/unreadable. Using secondary tracker."); merged_data = secondary_data
     elif not secondary_keys: logger.info(f"Secondary tracker {os.path.basename(secondary_tracker_path)} empty/unreadable. Using primary tracker."); merged_data = primary_data
@@ -396,10 +478,12 @@ def merge_trackers(primary_tracker_path: str, secondary_tracker_path: str, outpu
         merged_keys_map = {**secondary_keys, **primary_keys}
         # <<< *** Use HIERARCHICAL SORT DIRECTLY *** >>>
         merged_keys_list = sort_key_strings_hierarchically(list(merged_keys_map.keys()))
+        # Each tracker's keys are a subset of the merged keys; filtering the sorted union keeps their order without re-sorting
+        merged_sorted_keys = merged_keys_list
         merged_compressed_grid = _merge_grids(
             primary_data.get("grid", {}), secondary_data.get("grid", {}),
-            sort_key_strings_hierarchically(list(primary_keys.keys())),
-            sort_key_strings_hierarchically(list(secondary_keys.keys())),
+            [k for k in merged_keys_list if k in primary_keys],
+            [k for k in merged_keys_list if k in secondary_keys],
             merged_keys_list
         )
         # Merge metadata (simple precedence for now, consider timestamp comparison?)
@@ -410,73 +494,84 @@ def merge_trackers(primary_tracker_path: str, secondary_tracker_path: str, outpu
             "keys": merged_keys_map, "grid": merged_compressed_grid,
             "last_key_edit": merged_last_key_edit, "last_grid_edit": merged_last_grid_edit,
         }
-    # Write the merged tracker
-    if write_tracker_file(output_path, merged_data["keys"], merged_data["grid"], merged_data["last_key_edit"], merged_data["last_grid_edit"]):
-        logger.info(f"Successfully merged trackers into: {output_path}")
-        # Invalidate caches related to the output file AND potentially source files if output overwrites
-        invalidate_dependent_entries('tracker_data', f"tracker_data:{output_path}:.*")
-        if output_path == primary_tracker_path: invalidate_dependent_entries('tracker_data', f"tracker_data:{primary_tracker_path}:.*")
-        if output_path == secondary_tracker_path: invalidate_dependent_entries('tracker_data', f"tracker_data:{secondary_tracker_path}:.*")
-        invalidate_dependent_entries('grid_decompress', '.*'); invalidate_dependent_entries('grid_validation', '.*'); invalidate_dependent_entries('grid_dependencies', '.*')
-        return merged_data
-    else:
-        logger.error(f"Failed to write merged tracker to: {output_path}"); return None
+    # Write the merged tracker; a source tracker being overwritten is backed up first, unless the merge leaves it unchanged
+    written = _write_tracker(output_path, merged_data["keys"], merged_data["grid"], merged_data["last_key_edit"], merged_data["last_grid_edit"], merged_sorted_keys,
+                             backup=output_path in (primary_tracker_path, secondary_tracker_path))
+    if written is None: logger.error(f"Failed to write merged tracker to: {output_path}"); return None
+    logger.info(f"Successfully merged trackers into: {output_path}")
+    # _write_tracker already dropped tracker_data for output_path (the only file changed, even when it is a source)
+    if written: invalidate_dependent_entries_bulk(('grid_decompress', 'grid_validation', 'grid_dependencies'), '.*')
+    return merged_data
 
 # --- Read/Write Helpers ---
-def _read_existing_keys(lines: List[str]) -> Dict[str, str]:
-    """Reads existing key definitions from lines."""
-    key_map = {}; in_section = False; key_def_start_pattern = re.compile(r'^---KEY_DEFINITIONS_START---$', re.IGNORECASE); key_def_end_pattern = re.compile(r'^---KEY_DEFINITIONS_END---$', re.IGNORECASE)
-    for line in lines:
-        if key_def_end_pattern.match(line.strip()): # Check stripped line for end marker
-            break # Stop processing after end marker
-        if in_section:
-            line_content = line.strip()
-            if not line_content or line_content.lower().startswith("key definitions:"): continue
-            match = re.match(r'^([a-zA-Z0-9]+)\s*:\s*(.*)$', line_content)
-            if match:
-                k, v = match.groups()
-                if validate_key(k): key_map[k] = normalize_path(v.strip())
-        elif key_def_start_pattern.match(line.strip()): in_section = True
+def _index_map(keys: List[str]) -> Dict[str, int]:
+    """key -> position map for a key list (zip/range builds it at C level instead of an enumerate comprehension)."""
+    return dict(zip(keys, range(len(keys))))
+
+def _section_body(content: str, start_pattern: re.Pattern, end_pattern: re.Pattern) -> str:
+    """Text between the first start-marker line and the next end-marker line ('' if there is no start marker)."""
+    start_match = start_pattern.search(content)
+    if not start_match: return ""
+    end_match = end_pattern.search(content, start_match.end())
+    return content[start_match.end():end_match.start() if end_match else len(content)]
+
+def _read_existing_keys(content: str) -> Dict[str, str]:
+    """Reads existing key definitions from the tracker content (only the section body is split into lines)."""
+    key_map = {}
+    for line in _section_body(content, KEY_DEF_START_PATTERN, KEY_DEF_END_PATTERN).splitlines():
+        line_content = line.strip()
+        if not line_content or line_content[:16].lower() == "key definitions:": continue
+        match = KEY_LINE_PATTERN.match(line_content)
+        if match:
+            k, v = match.groups()
+            if validate_key(k): key_map[k] = normalize_path(v.strip())
     return key_map
 
-def _read_existing_grid(lines: List[str]) -> Dict[str, str]:
-    """Reads the existing compressed grid data from lines."""
-    grid_map = {}; in_section = False; grid_start_pattern = re.compile(r'^---GRID_START---$', re.IGNORECASE); grid_end_pattern = re.compile(r'^---GRID_END---$', re.IGNORECASE)
-    for line in lines:
-        if grid_end_pattern.match(line.strip()): break
-        if in_section:
-            line_content = line.strip()
-            if line_content.upper().startswith("X ") or line_content == "X": continue
-            match = re.match(r'^([a-zA-Z0-9]+)\s*=\s*(.*)$', line_content)
-            if match:
-                k, v = match.groups()
-                if validate_key(k): grid_map[k] = v.strip()
-        elif grid_start_pattern.match(line.strip()): in_section = True
+def _read_existing_tracker(content: str) -> Tuple[Dict[str, str], Dict[str, str], str, str]:
+    """
+    Reads key definitions, compressed grid rows and the last_KEY_edit / last_GRID_edit values from the tracker content.
+    Each part is located by a regex search over the content, so the file is never walked line by line.
+    Edit values are 'Unknown' if their line is missing.
+    """
+    key_edit_match = LAST_KEY_EDIT_PATTERN.search(content); grid_edit_match = LAST_GRID_EDIT_PATTERN.search(content)
+    return (_read_existing_keys(content), _read_existing_grid(content),
+            key_edit_match.group(1).strip() if key_edit_match else "Unknown",
+            grid_edit_match.group(1).strip() if grid_edit_match else "Unknown")
+
+def _read_existing_grid(content: str) -> Dict[str, str]:
+    """Reads the existing compressed grid data from the tracker content (only the section body is split into lines)."""
+    grid_map = {}
+    for line in _section_body(content, GRID_START_PATTERN, GRID_END_PATTERN).splitlines():
+        line_content = line.strip()
+        if line_content.upper().startswith("X ") or line_content == "X": continue
+        match = GRID_LINE_PATTERN.match(line_content)
+        if match:
+            k, v = match.groups()
+            if validate_key(k): grid_map[k] = v.strip()
     return grid_map
-
-# _write_key_definitions, _write_grid: Replace sort_keys with sort_key_strings_hierarchically
-def _write_key_definitions(file_obj: io.TextIOBase, key_map: Dict[str, str], sorted_keys_list: List[str]):
-    """Writes the key definitions section using the pre-sorted list."""
-    file_obj.write("---KEY_DEFINITIONS_START---\n"); file_obj.write("Key Definitions:\n")
+# _key_definitions_text, _grid_text: Replace sort_keys with sort_key_strings_hierarchically
+def _key_definitions_text(key_map: Dict[str, str], sorted_keys_list: List[str]) -> str:
+    """Renders the key definitions section using the pre-sorted list (callers join it with the rest of the file)."""
+    lines = ["---KEY_DEFINITIONS_START---", "Key Definitions:"]
     for k in sorted_keys_list: # Iterate pre-sorted list
         v = key_map.get(k, "PATH_ERROR")
-        if v != "PATH_ERROR": file_obj.write(f"{k}: {normalize_path(v)}\n")
+        if v != "PATH_ERROR": lines.append(f"{k}: {normalize_path(v)}")
         else: logger.error(f"Path error writing key def: {k}")
-    file_obj.write("---KEY_DEFINITIONS_END---\n")
+    lines.append("---KEY_DEFINITIONS_END---\n")
+    return "\n".join(lines)
 
-def _write_grid(file_obj: io.TextIOBase, sorted_keys_list: List[str], grid: Dict[str, str]):
-    """Writes the grid section to the provided file object, ensuring correctness."""
-    file_obj.write("---GRID_START---\n")
-    if not sorted_keys_list: file_obj.write("X \n")
+def _grid_text(sorted_keys_list: List[str], grid: Dict[str, str]) -> str:
+    """Renders the grid section, ensuring correctness (rows of the wrong length are rebuilt as placeholders)."""
+    lines = ["---GRID_START---"]
+    if not sorted_keys_list: lines.append("X ")
     else:
-        file_obj.write(f"X {' '.join(sorted_keys_list)}\n")
-        expected_len = len(sorted_keys_list); key_to_idx = {key: i for i, key in enumerate(sorted_keys_list)}
+        lines.append(f"X {' '.join(sorted_keys_list)}")
+        expected_len = len(sorted_keys_list); key_to_idx = _index_map(sorted_keys_list)
         for row_key in sorted_keys_list:
             compressed_row = grid.get(row_key); final_compressed_row = None
             if compressed_row is not None:
                 try:
-                    decompressed = decompress(compressed_row)
-                    if len(decompressed) == expected_len: final_compressed_row = compressed_row
+                    if decompressed_length(compressed_row) == expected_len: final_compressed_row = compressed_row # Length from run counts; no decompression
                     else: logger.warning(f"Correcting grid row length for key '{row_key}' before write...")
                 except Exception: logger.warning(f"Error decompressing row for key '{row_key}' before write...")
             if final_compressed_row is None:
@@ -484,8 +579,9 @@ def _write_grid(file_obj: io.TextIOBase, sorted_keys_list: List[str], grid: Dict
                  row_idx = key_to_idx.get(row_key)
                  if row_idx is not None: row_list[row_idx] = DIAGONAL_CHAR
                  final_compressed_row = compress("".join(row_list))
-            file_obj.write(f"{row_key} = {final_compressed_row}\n")
-    file_obj.write("---GRID_END---\n")
+            lines.append(f"{row_key} = {final_compressed_row}")
+    lines.append("---GRID_END---\n")
+    return "\n".join(lines)
 
 # --- Helper Function ---
 def _is_file_key(key_string: str) -> bool:
@@ -493,15 +589,14 @@ def _is_file_key(key_string: str) -> bool:
     if not key_string:
         return False
     # Simple check: does the key string end with one or more digits?
-    return bool(re.search(r'\d+$', key_string))
+    return key_string[-1].isdigit() # Same as re.search(r'\d+$'), without the regex
 
 # --- Mini Tracker Specific Functions ---
 def get_mini_tracker_path(module_path: str) -> str:
     """Gets the path to the mini tracker file using the function from mini_tracker_data."""
     norm_module_path = normalize_path(module_path)
-    mini_data = get_mini_tracker_data()
-    if "get_tracker_path" in mini_data:
-        return normalize_path(mini_data["get_tracker_path"](norm_module_path))
+    if "get_tracker_path" in mini_tracker_data:
+        return normalize_path(mini_tracker_data["get_tracker_path"](norm_module_path))
     else:
         # Fallback if function is missing
         module_name = os.path.basename(norm_module_path)
@@ -514,18 +609,18 @@ def create_mini_tracker(module_path: str,
                         relevant_keys_for_grid: List[str], # Key strings needed in grid
                         new_key_strings_for_this_tracker: Optional[List[str]] = None): # Relevant NEW key STRINGS
     """Creates a new mini-tracker file with the template."""
-    mini_tracker_info = get_mini_tracker_data()
-    template = mini_tracker_info["template"]
-    marker_start, marker_end = mini_tracker_info["markers"]
+    template = mini_tracker_data["template"]
+    marker_start, marker_end = mini_tracker_data["markers"]
     norm_module_path = normalize_path(module_path)
     module_name = os.path.basename(norm_module_path)
     output_file = get_mini_tracker_path(norm_module_path)
 
     # Definitions include keys relevant to the grid, get paths from global map
     keys_to_write_defs: Dict[str, str] = {}
+    first_info_by_key = build_first_key_info_map(path_to_key_info) # One pass instead of a scan per key
     for k_str in relevant_keys_for_grid:
          # Find the KeyInfo object associated with this key string in the CURRENT map
-         found_info = next((info for info in path_to_key_info.values() if info.key_string == k_str), None)
+         found_info = first_info_by_key.get(k_str)
          if found_info:
               keys_to_write_defs[k_str] = found_info.norm_path
          else:
@@ -544,22 +639,23 @@ def create_mini_tracker(module_path: str,
     sorted_relevant_keys_list = sort_key_strings_hierarchically(relevant_keys_for_grid)
     try:
         dirname = os.path.dirname(output_file); os.makedirs(dirname, exist_ok=True)
-        with open(output_file, "w", encoding="utf-8", newline='\n') as f:
-            try: f.write(template.format(module_name=module_name))
-            except KeyError: f.write(template)
-            if marker_start not in template: f.write("\n" + marker_start + "\n")
-            f.write("\n")
-            # --- Write the tracker data section ---
-            _write_key_definitions(f, keys_to_write_defs, sorted_relevant_keys_list)
-            f.write("\n")
-            last_key_edit_msg = f"Assigned keys: {', '.join(new_key_strings_for_this_tracker)}" if new_key_strings_for_this_tracker else (f"Initial key: {module_key_string}" if module_key_string else "Initial creation")
-            f.write(f"last_KEY_edit: {last_key_edit_msg}\n")
-            f.write(f"last_GRID_edit: Initial creation\n\n")
-            # Write the grid using the relevant keys and an initial empty grid
-            initial_grid = create_initial_grid(sorted_relevant_keys_list)
-            _write_grid(f, sorted_relevant_keys_list, initial_grid)
-            f.write("\n")
-            if marker_end not in template: f.write(marker_end + "\n")
+        parts: List[str] = [] # Whole file collected first and written in one call
+        try: parts.append(template.format(module_name=module_name))
+        except KeyError: parts.append(template)
+        if marker_start not in template: parts.append("\n" + marker_start + "\n")
+        parts.append("\n")
+        # --- Tracker data section ---
+        parts.append(_key_definitions_text(keys_to_write_defs, sorted_relevant_keys_list))
+        parts.append("\n")
+        last_key_edit_msg = f"Assigned keys: {', '.join(new_key_strings_for_this_tracker)}" if new_key_strings_for_this_tracker else (f"Initial key: {module_key_string}" if module_key_string else "Initial creation")
+        parts.append(f"last_KEY_edit: {last_key_edit_msg}\n")
+        parts.append(f"last_GRID_edit: Initial creation\n\n")
+        # The grid uses the relevant keys and an initial empty grid
+        initial_grid = create_initial_grid(sorted_relevant_keys_list)
+        parts.append(_grid_text(sorted_relevant_keys_list, initial_grid))
+        parts.append("\n")
+        if marker_end not in template: parts.append(marker_end + "\n")
+        with _atomic_tracker_writer(output_file) as f: f.write("".join(parts))
         logger.info(f"Created new mini tracker: {output_file}")
         return True
     except IOError as e: logger.error(f"I/O Error creating mini tracker {output_file}: {e}", exc_info=True); return False
@@ -574,7 +670,8 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
                    new_keys: Optional[List[KeyInfo]] = None, # GLOBAL list of new KeyInfo objects
                    force_apply_suggestions: bool = False,
                    keys_to_explicitly_remove: Optional[Set[str]] = None,
-                   use_old_map_for_migration: bool = True # Flag to attempt loading old map
+                   use_old_map_for_migration: bool = True, # Flag to attempt loading old map
+                   children_by_parent: Optional[Dict[str, List[KeyInfo]]] = None # parent path -> child KeyInfos (build_children_index); built here if None
                   ):
     """
     Updates or creates a tracker file based on type using contextual keys.
@@ -582,10 +679,12 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
     Performs path stability checks before migrating grid data.
     Calls tracker-specific logic for filtering, aggregation (main), and path determination.
     Uses hierarchical sorting for key strings.
+    Callers updating many mini-trackers should build children_by_parent once and pass it to every call.
     """
     project_root = get_project_root()
     config = ConfigManager()
     get_priority = config.get_char_priority
+    new_key_strings_all: Set[str] = {k_info.key_string for k_info in new_keys} if new_keys else set() # Intersected with this tracker's keys below
 
     # --- Determine Type-Specific Settings and Paths ---
     output_file: str = "" # Final path determined within type block
@@ -664,6 +763,7 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
     elif tracker_type == "mini":
         if not file_to_module: logger.error("file_to_module mapping required for mini-tracker updates."); return
         if not path_to_key_info: logger.warning("Global path_to_key_info is empty."); return
+        first_info_by_key = build_first_key_info_map(path_to_key_info) # key_string -> KeyInfo, built once for all lookups below
         # Determine module path from the output file suggestion
         potential_module_path = os.path.dirname(normalize_path(output_file_suggestion))
         # Find the KeyInfo for this directory path
@@ -683,15 +783,17 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
         tracker_exists_mini = os.path.exists(output_file)
         if tracker_exists_mini:
             try:
-                with open(output_file, "r", encoding="utf-8") as f_mini: mini_lines = f_mini.readlines()
+                with open(output_file, "r", encoding="utf-8") as f_mini: mini_content = f_mini.read()
                 # Use helper functions that read tracker file format but don't validate keys yet
-                existing_key_defs_mini = _read_existing_keys(mini_lines) # key_str -> path_str from file
-                existing_grid_mini = _read_existing_grid(mini_lines) # key_str -> compressed_row from file
+                existing_key_defs_mini = _read_existing_keys(mini_content) # key_str -> path_str from file
+                existing_grid_mini = _read_existing_grid(mini_content) # key_str -> compressed_row from file
             except Exception as e: logger.error(f"Mini Read Error: {e}"); tracker_exists_mini = False
 
         # --- Determine Relevant Keys (Revised Logic) ---
         # 1. Identify Internal Keys
-        internal_keys_info: Dict[str, KeyInfo] = { p: info for p, info in path_to_key_info.items() if info.parent_path == module_path or p == module_path }
+        if children_by_parent is None: children_by_parent = build_children_index(path_to_key_info)
+        internal_keys_info: Dict[str, KeyInfo] = {info.norm_path: info for info in children_by_parent.get(module_path, ())}
+        internal_keys_info[module_path] = module_key_info # The module directory itself
         internal_keys_set = {info.key_string for info in internal_keys_info.values()}
         # Definitions include only internal keys/paths for writing later
         final_key_defs_internal = {info.key_string: info.norm_path for info in internal_keys_info.values()}
@@ -701,91 +803,76 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
 
         # --- Scan Existing Grid for Relevant Foreign Keys (File-File only) ---
         # This uses the potentially stale keys read from the file. We need path stability later.
-        if tracker_exists_mini and existing_grid_mini and existing_key_defs_mini:
+        # The scan can only add foreign FILE keys of the old tracker; without any (e.g. an untouched module) it is skipped.
+        has_foreign_file_keys = any(k not in internal_keys_set and _is_file_key(k) for k in existing_key_defs_mini)
+        if tracker_exists_mini and existing_grid_mini and has_foreign_file_keys:
         # 3. Scan Existing Grid for Relevant Foreign Keys
             logger.debug(f"Scanning existing grid of '{os.path.basename(output_file)}' for relevant foreign keys (File-File links only)...") # Updated log message
             old_keys_list_mini = sort_key_strings_hierarchically(list(existing_key_defs_mini.keys()))
-            old_key_to_idx_mini = {k: i for i, k in enumerate(old_keys_list_mini)}
+            old_key_to_idx_mini = _index_map(old_keys_list_mini)
+            # Per-key and per-char results reused by every cell of the scan (K lookups instead of K^2 calls)
+            is_file_by_key = {k: _is_file_key(k) for k in old_keys_list_mini}; priority_by_char: Dict[str, int] = {'n': -1}
             for row_key, compressed_row in existing_grid_mini.items():
                 if row_key not in old_key_to_idx_mini: continue
                 try:
-                    decomp_row = list(decompress(compressed_row))
+                    decomp_row = decompress(compressed_row) # Iterated as a str; no per-char list
                     if len(decomp_row) != len(old_keys_list_mini):
                        logger.warning(f"Scan Existing: Length mismatch for row '{row_key}'. Skipping row scan.")
                        continue
 
                     row_is_internal = row_key in internal_keys_set
-                    for col_idx, dep_char in enumerate(decomp_row):
-                        if col_idx >= len(old_keys_list_mini): break # Safety break
-                        col_key = old_keys_list_mini[col_idx]
+                    for col_key, dep_char in zip(old_keys_list_mini, decomp_row): # Lengths checked above
                         if row_key == col_key: continue # Skip diagonal
                         col_is_internal = col_key in internal_keys_set
 
                         # --- Check if relationship should trigger foreign key persistence ---
-                        # Condition 1: Not an 'n' relationship
-                        if dep_char != 'n':
-                            try:
-                                dep_priority = get_priority(dep_char)
-                                # Condition2: Link involves one internal and one external key,
-                                # AND the priority meets the threshold for relevance (e.g., 's' or higher)
-                                if dep_priority >= min_positive_priority:
-                                    # Condition 3: Both keys represent files
-                                    if _is_file_key(row_key) and _is_file_key(col_key):
-                                        # Condition 4: One key is internal, the other is external
-                                        if row_is_internal and not col_is_internal:
-                                            if col_key not in relevant_keys_strings_set:
-                                                logger.debug(f"  Adding persisted foreign FILE key '{col_key}' due to link from internal FILE '{row_key}' ('{dep_char}')")
-                                                relevant_keys_strings_set.add(col_key)
-                                        elif not row_is_internal and col_is_internal:
-                                            if row_key not in relevant_keys_strings_set:
-                                                 logger.debug(f"  Adding persisted foreign FILE key '{row_key}' due to link to internal FILE '{col_key}' ('{dep_char}')")
-                                                 relevant_keys_strings_set.add(row_key)
-                                    else: logger.debug(f" Skipping link ({row_key}, {col_key}): Not a file-file relationship.") # Optional detailed logging
-                            except KeyError:
-                                # Ignore characters not in the priority map during this scan
-                                pass
+                        # Conditions 1+2: Not an 'n' relationship ('n' is seeded below any threshold),
+                        # and the priority meets the threshold for relevance (e.g., 's' or higher)
+                        dep_priority = priority_by_char.get(dep_char)
+                        if dep_priority is None: dep_priority = priority_by_char[dep_char] = get_priority(dep_char) # Unknown chars get the default priority, no KeyError
+                        if dep_priority < min_positive_priority: continue
+                        # Condition 3: Both keys represent files
+                        if is_file_by_key[row_key] and is_file_by_key[col_key]:
+                            # Condition 4: One key is internal, the other is external
+                            if row_is_internal and not col_is_internal:
+                                if col_key not in relevant_keys_strings_set:
+                                    logger.debug(f"  Adding persisted foreign FILE key '{col_key}' due to link from internal FILE '{row_key}' ('{dep_char}')")
+                                    relevant_keys_strings_set.add(col_key)
+                            elif not row_is_internal and col_is_internal:
+                                if row_key not in relevant_keys_strings_set:
+                                     logger.debug(f"  Adding persisted foreign FILE key '{row_key}' due to link to internal FILE '{col_key}' ('{dep_char}')")
+                                     relevant_keys_strings_set.add(row_key)
+                        else: logger.debug(f" Skipping link ({row_key}, {col_key}): Not a file-file relationship.") # Optional detailed logging
 
                 except Exception as e:
                     logger.warning(f"Scan Existing: Error processing row '{row_key}': {e}. Skipping row scan.")
             logger.debug(f"Mini Tracker ({module_key_string}): Relevant keys after scanning existing grid: {len(relevant_keys_strings_set)}")
 
         # 4. Process Incoming Suggestions
-        config = ConfigManager(); project_root_for_exclude = get_project_root()
-        excluded_dirs_abs = {normalize_path(os.path.join(project_root_for_exclude, p)) for p in config.get_excluded_dirs()}
-        excluded_files_abs = set(config.get_excluded_paths())
-        all_excluded_abs = excluded_dirs_abs.union(excluded_files_abs)
-        abs_doc_roots: Set[str] = {normalize_path(os.path.join(project_root, p)) for p in config.get_doc_directories()}
+        all_excluded_abs = _excluded_abs_paths(project_root) # Shared across mini-tracker updates until the config changes
         # Identify relevant external keys based on suggestions
         raw_suggestions = suggestions if suggestions else {}
         if raw_suggestions:
             logger.debug("Processing incoming suggestions to augment relevant keys...")
+            def internal_not_excluded(k_str: str) -> bool:
+                if k_str not in internal_keys_set: return False
+                internal_path = final_key_defs_internal.get(k_str)
+                return not (internal_path and internal_path in all_excluded_abs)
+            # One sweep over the edges: an internal source pulls in its targets, an internal target pulls in its sources
             for src_key_str, deps in raw_suggestions.items():
-                source_is_internal = src_key_str in internal_keys_set
-                if source_is_internal:
-                    src_path = final_key_defs_internal.get(src_key_str)
-                    if src_path and src_path in all_excluded_abs: continue
-                    # Don't strictly need to add internal source again, but doesn't hurt
-                    # relevant_keys_strings_set.add(src_key_str)
-                    for target_key_str, dep_char in deps:
-                        if get_priority(dep_char) >= min_positive_priority: # Only consider meaningful suggestions
-                            target_info = next((info for info in path_to_key_info.values() if info.key_string == target_key_str), None)
-                            if target_info and target_info.norm_path not in all_excluded_abs:
-                                if target_key_str not in relevant_keys_strings_set:
-                                    logger.debug(f"  Adding suggested foreign key '{target_key_str}' linked from internal '{src_key_str}'")
-                                    relevant_keys_strings_set.add(target_key_str)
-
-            all_target_keys_in_suggestions = {tgt for deps in raw_suggestions.values() for tgt, dep in deps if get_priority(dep) >= min_positive_priority}
-            for target_key_str in all_target_keys_in_suggestions:
-                if target_key_str in internal_keys_set:
-                    target_path = final_key_defs_internal.get(target_key_str)
-                    if target_path and target_path in all_excluded_abs: continue
-                    for src_key_str, deps in raw_suggestions.items():
-                        if any(t == target_key_str and get_priority(c) >= min_positive_priority for t, c in deps):
-                            source_info = next((info for info in path_to_key_info.values() if info.key_string == src_key_str), None)
-                            if source_info and source_info.norm_path not in all_excluded_abs:
-                                if src_key_str not in relevant_keys_strings_set:
-                                     logger.debug(f"  Adding suggested foreign key '{src_key_str}' linked to internal '{target_key_str}'")
-                                     relevant_keys_strings_set.add(src_key_str)
+                source_pulls_targets = internal_not_excluded(src_key_str)
+                source_info = first_info_by_key.get(src_key_str)
+                source_is_valid = source_info is not None and source_info.norm_path not in all_excluded_abs
+                for target_key_str, dep_char in deps:
+                    if get_priority(dep_char) < min_positive_priority: continue # Only consider meaningful suggestions
+                    if source_pulls_targets and target_key_str not in relevant_keys_strings_set:
+                        target_info = first_info_by_key.get(target_key_str)
+                        if target_info and target_info.norm_path not in all_excluded_abs:
+                            logger.debug(f"  Adding suggested foreign key '{target_key_str}' linked from internal '{src_key_str}'")
+                            relevant_keys_strings_set.add(target_key_str)
+                    if source_is_valid and src_key_str not in relevant_keys_strings_set and internal_not_excluded(target_key_str):
+                        logger.debug(f"  Adding suggested foreign key '{src_key_str}' linked to internal '{target_key_str}'")
+                        relevant_keys_strings_set.add(src_key_str)
 
             logger.debug(f"Mini Tracker ({module_key_string}): Relevant keys after processing suggestions: {len(relevant_keys_strings_set)}")
 
@@ -795,8 +882,7 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
         logger.debug(f"Validating {len(relevant_keys_strings_set)} relevant keys against provided path_to_key_info map...")
         for k_str in relevant_keys_strings_set:
             # Check if key exists in the *input* path_to_key_info map
-            # Using a generator expression for potentially better memory efficiency
-            info = next((info for path, info in path_to_key_info.items() if info.key_string == k_str), None)
+            info = first_info_by_key.get(k_str)
             if info:
                 validated_relevant_keys_set.add(k_str)
             else:
@@ -820,7 +906,7 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
         final_key_defs = {} # Definitions map for THIS tracker (internal + relevant VALID foreign)
         for k_str in relevant_keys_for_grid: # Iterate only validated keys
              # We know the key exists in the input map now, find its info again
-             info = next((info for path, info in path_to_key_info.items() if info.key_string == k_str), None)
+             info = first_info_by_key.get(k_str)
              if info: # Should always find info here now
                   final_key_defs[k_str] = info.norm_path
              # else: # This case should no longer happen
@@ -837,18 +923,19 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
         if raw_suggestions and file_to_module:
             logger.debug(f"Filtering mini-tracker suggestions against final valid keys ({os.path.basename(output_file)})...")
             filtered_suggestions_for_apply = defaultdict(list) # Create a new dict for filtered suggestions
+            relevant_keys_for_grid_set = set(relevant_keys_for_grid) # O(1) membership in the nested loop
             for src_key_str, deps in raw_suggestions.items():
                  # Check if source is valid and not excluded
-                 source_info = next((info for info in path_to_key_info.values() if info.key_string == src_key_str), None)
+                 source_info = first_info_by_key.get(src_key_str)
                  if not source_info or source_info.norm_path in all_excluded_abs: continue
                  # Add source to final_suggestions_to_apply only if it's in the final grid keys
-                 if src_key_str not in relevant_keys_for_grid: continue
+                 if src_key_str not in relevant_keys_for_grid_set: continue
                  valid_targets_for_source = []
                  for target_key_str, dep_char in deps:
                      # Check if target is valid for the final grid and not excluded
-                     if target_key_str not in relevant_keys_for_grid: continue
+                     if target_key_str not in relevant_keys_for_grid_set: continue
                      if src_key_str == target_key_str or dep_char == PLACEHOLDER_CHAR: continue
-                     target_info = next((info for info in path_to_key_info.values() if info.key_string == target_key_str), None)
+                     target_info = first_info_by_key.get(target_key_str)
                      # Path should exist if key is in relevant_keys_for_grid, but check defensively
                      if not target_info or target_info.norm_path in all_excluded_abs: continue
                      valid_targets_for_source.append((target_key_str, dep_char))
@@ -867,30 +954,30 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
 
     # --- Read Existing Data (Common Logic) ---
     check_file_modified(output_file)
-    existing_key_defs = {}; existing_grid = {}; current_last_key_edit = ""; current_last_grid_edit = ""; lines = []
+    existing_key_defs = {}; existing_grid = {}; current_last_key_edit = ""; current_last_grid_edit = ""; existing_content = ""
     tracker_exists = os.path.exists(output_file)
     if tracker_exists:
         try:
-            with open(output_file, "r", encoding="utf-8") as f: lines = f.readlines()
-            existing_key_defs = _read_existing_keys(lines); existing_grid = _read_existing_grid(lines)
-            last_key_edit_line = next((l for l in lines if l.strip().lower().startswith("last_key_edit")), None)
-            last_grid_edit_line = next((l for l in lines if l.strip().lower().startswith("last_grid_edit")), None)
-            current_last_key_edit = last_key_edit_line.split(":", 1)[1].strip() if last_key_edit_line else "Unknown"
-            current_last_grid_edit = last_grid_edit_line.split(":", 1)[1].strip() if last_grid_edit_line else "Unknown"
+            with open(output_file, "r", encoding="utf-8") as f: content = f.read()
+            existing_key_defs, existing_grid, current_last_key_edit, current_last_grid_edit = _read_existing_tracker(content)
+            existing_content = content # Mini trackers keep the text around their markers (sliced at write time, never split into lines)
             logger.debug(f"Read existing tracker {os.path.basename(output_file)}: {len(existing_key_defs)} keys, {len(existing_grid)} grid rows.")
-        except Exception as e: logger.error(f"Failed read existing tracker {output_file}: {e}. Proceeding cautiously.", exc_info=True); existing_key_defs={}; existing_grid={}; current_last_key_edit=""; current_last_grid_edit=""; lines=[]; tracker_exists=False
+        except Exception as e: logger.error(f"Failed read existing tracker {output_file}: {e}. Proceeding cautiously.", exc_info=True); existing_key_defs={}; existing_grid={}; current_last_key_edit=""; current_last_grid_edit=""; existing_content=""; tracker_exists=False
 
     # ========================================================================
     # --- Build Path Migration Map ---
     # ========================================================================
+    # A tracker about to be created fresh has no old grid values to migrate (its initial grid holds only
+    # placeholders and the diagonal, which the copy below skips). Main still needs the map for aggregation.
+    needs_migration_map = tracker_exists or tracker_type == "main"
     old_global_map = None
-    if use_old_map_for_migration:
-        old_global_map = load_old_global_key_map() # Returns None if fails
+    if use_old_map_for_migration and needs_migration_map:
+        old_global_map = _load_old_global_key_map_cached() # Returns None if fails
 
     # This function now encapsulates the core path stability logic
     # It raises ValueError on critical duplicate path errors in global maps
     try:
-        path_migration_info = _build_path_migration_map(old_global_map, path_to_key_info)
+        path_migration_info = _build_path_migration_map(old_global_map, path_to_key_info) if needs_migration_map else {}
     except ValueError as ve:
          logger.critical(f"Failed to build migration map: {ve}. Aborting update.")
          return # Stop update if maps are inconsistent
@@ -905,17 +992,14 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
         logger.info(f"Tracker file not found: {output_file}. Creating new file.")
         created_ok = False
         # Ensure keys for creation are sorted hierarchically
-        # Use relevant_keys_for_grid determined by the type-specific logic earlier
-        sorted_keys_list_for_create = sort_key_strings_hierarchically(relevant_keys_for_grid)
+        # Use relevant_keys_for_grid determined by the type-specific logic earlier (the mini branch already sorted it)
+        sorted_keys_list_for_create = relevant_keys_for_grid if tracker_type == "mini" else sort_key_strings_hierarchically(relevant_keys_for_grid)
 
         # Determine relevant new keys (key STRINGS) for the creation message
         relevant_new_keys_str_list = []
-        if new_keys:
+        if new_key_strings_all:
             check_set = relevant_keys_strings_set if tracker_type == "mini" else set(relevant_keys_for_grid)
-            relevant_new_keys_str_list = sort_key_strings_hierarchically([
-                k_info.key_string for k_info in new_keys
-                if k_info.key_string in check_set # Check against the set derived for this tracker
-            ])
+            relevant_new_keys_str_list = sort_key_strings_hierarchically(list(new_key_strings_all & check_set)) # Check against the set derived for this tracker
 
         # --- Variable to hold the newly created grid ---
         grid_after_creation = None
@@ -949,13 +1033,13 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
 
     # --- Update Existing Tracker ---
     logger.debug(f"Updating tracker: {output_file}")
-    # Backup existing file (use the output_file determined correctly earlier)
-    if tracker_exists: backup_tracker_file(output_file)
+    # No backup here: the final write is atomic (temp file + os.replace), so a crash never leaves a half-written tracker.
+    # Snapshots are kept for merge_trackers and remove_key_from_tracker, which discard data.
 
     # --- Key Definition Update & Sorting ---
     # Use hierarchical sort for the final list of keys determined for this tracker
     final_sorted_keys_list = sort_key_strings_hierarchically(list(final_key_defs.keys()))
-    final_key_to_idx = {k: i for i, k in enumerate(final_sorted_keys_list)} # Index map for NEW grid
+    final_key_to_idx = _index_map(final_sorted_keys_list) # Index map for NEW grid
 
     # --- Determine Key Changes for Metadata ---
     # Use existing_key_defs read from file (or after creation)
@@ -964,12 +1048,7 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
     added_keys = keys_in_final_grid_set - existing_keys_in_file_set
     removed_keys = existing_keys_in_file_set - keys_in_final_grid_set
     # Determine relevant new keys (key STRINGS) for metadata message
-    relevant_new_keys_str_list = []
-    if new_keys:
-        relevant_new_keys_str_list = sort_key_strings_hierarchically([
-            k_info.key_string for k_info in new_keys
-            if k_info.key_string in keys_in_final_grid_set # Check against FINAL set
-        ])
+    relevant_new_keys_str_list = sort_key_strings_hierarchically(list(new_key_strings_all & keys_in_final_grid_set)) # Check against FINAL set
     # Update metadata message logic
     final_last_key_edit = current_last_key_edit
     if relevant_new_keys_str_list: final_last_key_edit = f"Assigned keys: {', '.join(relevant_new_keys_str_list)}" # Prioritize message about NEW keys added globally
@@ -985,9 +1064,6 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
     final_last_grid_edit = current_last_grid_edit # Start with existing
     if grid_structure_changed: final_last_grid_edit = f"Grid structure updated ({datetime.datetime.now().isoformat()})"
     temp_decomp_grid = {}
-    # Use hierarchical sort for the list of keys that were in the old file
-    old_keys_list = sort_key_strings_hierarchically(list(existing_key_defs.keys()))
-    old_key_to_idx = {k: i for i, k in enumerate(old_keys_list)}; final_key_to_idx = {k: i for i, k in enumerate(final_sorted_keys_list)}
 
     # Initialize new grid structure based on the FINAL sorted list
     for row_key in final_sorted_keys_list:
@@ -1010,7 +1086,7 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
     # This map is potentially stale but needed to link grid keys to paths for the migration map lookup.
     old_key_to_path: Dict[str, str] = existing_key_defs
 
-    # Get the list of OLD keys sorted according to the OLD structure (from file)
+    # Get the list of OLD keys sorted according to the OLD structure (from file); sorted once per update
     old_keys_list_sorted = sort_key_strings_hierarchically(list(existing_key_defs.keys()))
 
     # Iterate through the OLD grid data read from the file
@@ -1044,7 +1120,7 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
         logger.debug(f"  Grid Copy Processing Stable Row: Path '{old_row_path}' (OldKeyFromFile: '{old_row_key}') -> NewKey '{new_row_key}' (Idx {new_row_idx})")
 
         try:
-            decomp_row = list(decompress(compressed_row))
+            decomp_row = decompress(compressed_row) # Read-only; iterated as a str
             # Check length against the OLD key list *from the file*
             if len(decomp_row) != len(old_keys_list_sorted):
                 logger.warning(f"  Grid Copy Skip Row: Length mismatch for old key '{old_row_key}'! Expected {len(old_keys_list_sorted)}, Got {len(decomp_row)}.")
@@ -1158,9 +1234,6 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
     if tracker_type == "mini" and module_path:
         logger.debug(f"Mini Tracker ({module_key_string}): Importing established relationships (Path Based)...")
 
-        # Reverse map for current global state: Path -> Current Key
-        current_path_to_key_global = {info.norm_path: info.key_string for info in path_to_key_info.values()}
-
         # Identify native and foreign keys IN THE CURRENT GRID based on path
         native_keys_in_grid: Dict[str, str] = {} # Path -> Current Key
         foreign_keys_in_grid: Dict[str, str] = {} # Path -> Current Key
@@ -1216,8 +1289,10 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
                     if not home_grid or not home_keys_from_file: continue
 
                     # Find the keys used in the home tracker for our native and foreign paths *currently*
-                    home_key_for_native = current_path_to_key_global.get(native_path)
-                    home_key_for_foreign = current_path_to_key_global.get(foreign_path)
+                    # path_to_key_info is keyed by norm_path, so it answers Path -> Current Key directly
+                    native_info = path_to_key_info.get(native_path); foreign_info = path_to_key_info.get(foreign_path)
+                    home_key_for_native = native_info.key_string if native_info else None
+                    home_key_for_foreign = foreign_info.key_string if foreign_info else None
 
                     if not home_key_for_native or not home_key_for_foreign: continue # Paths must exist globally
 
@@ -1236,7 +1311,7 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
                     home_char_foreign_native = PLACEHOLDER_CHAR
 
                     stale_home_keys_list = sort_key_strings_hierarchically(list(home_keys_from_file.keys()))
-                    stale_home_key_to_idx = {k: i for i, k in enumerate(stale_home_keys_list)}
+                    stale_home_key_to_idx = _index_map(stale_home_keys_list)
 
                     stale_native_idx = stale_home_key_to_idx.get(stale_home_key_native)
                     stale_foreign_idx = stale_home_key_to_idx.get(stale_home_key_foreign)
@@ -1337,7 +1412,7 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
 
                      home_char_12 = PLACEHOLDER_CHAR; home_char_21 = PLACEHOLDER_CHAR
                      stale_home_keys_list = sort_key_strings_hierarchically(list(home_keys_from_file.keys()))
-                     stale_home_key_to_idx = {k: i for i, k in enumerate(stale_home_keys_list)}
+                     stale_home_key_to_idx = _index_map(stale_home_keys_list)
                      stale_idx1 = stale_home_key_to_idx.get(stale_home_key1)
                      stale_idx2 = stale_home_key_to_idx.get(stale_home_key2)
 
@@ -1622,38 +1697,37 @@ def update_tracker(output_file_suggestion: str, # Path suggestion (may be ignore
 
     # --- Write updated content to file ---
     try:
-        is_mini = tracker_type == "mini"; mini_tracker_start_index = -1; mini_tracker_end_index = -1; marker_start, marker_end = "", ""
-        if is_mini and lines:
-            mini_tracker_info = get_mini_tracker_data(); marker_start, marker_end = mini_tracker_info["markers"]
-            try:
-                mini_tracker_start_index = next(i for i, l in enumerate(lines) if l.strip() == marker_start)
-                mini_tracker_end_index = next(i for i, l in enumerate(lines) if l.strip() == marker_end)
-                if mini_tracker_start_index >= mini_tracker_end_index: raise ValueError("Start marker after end marker.")
-            except (StopIteration, ValueError) as e: logger.warning(f"Mini markers invalid in {output_file}: {e}. Overwriting."); mini_tracker_start_index = -1
-
-        with open(output_file, "w", encoding="utf-8", newline='\n') as f:
-            # Preserve content before start marker
-            if is_mini and mini_tracker_start_index != -1:
-                for i in range(mini_tracker_start_index + 1): f.write(lines[i])
-                if not lines[mini_tracker_start_index].endswith('\n'): f.write('\n')
-                f.write("\n")
-            # Write definitions and metadata using CURRENT keys/info
-            _write_key_definitions(f, final_key_defs, final_sorted_keys_list)
-            f.write("\n"); f.write(f"last_KEY_edit: {final_last_key_edit}\n"); f.write(f"last_GRID_edit: {final_last_grid_edit}\n\n")
-            # Write the final grid using CURRENT keys
-            _write_grid(f, final_sorted_keys_list, final_grid)
-            if is_mini and mini_tracker_end_index != -1 and mini_tracker_start_index != -1:
-                 f.write("\n")
-                 for i in range(mini_tracker_end_index, len(lines)): f.write(lines[i])
-                 if not lines[-1].endswith('\n'): f.write('\n')
-            elif is_mini and mini_tracker_start_index == -1:
-                 f.write("\n" + marker_end + "\n")
+        is_mini = tracker_type == "mini"; mini_start_match = mini_end_match = None; marker_start, marker_end = "", ""
+        if is_mini and existing_content:
+            marker_start, marker_end = mini_tracker_data["markers"]
+            mini_start_match = MINI_START_PATTERN.search(existing_content); mini_end_match = MINI_END_PATTERN.search(existing_content)
+            if not (mini_start_match and mini_end_match): logger.warning(f"Mini markers invalid in {output_file}: marker not found. Overwriting."); mini_start_match = None
+            elif mini_start_match.start() >= mini_end_match.start(): logger.warning(f"Mini markers invalid in {output_file}: Start marker after end marker. Overwriting."); mini_start_match = None
+
+        parts: List[str] = [] # Whole file collected first and written in one call
+        # Preserve content up to and including the start marker line
+        if mini_start_match:
+            head_end = mini_start_match.end()
+            parts.append(existing_content[:head_end + 1] if existing_content[head_end:head_end + 1] == "\n" else existing_content[:head_end] + "\n")
+            parts.append("\n")
+        # Definitions and metadata using CURRENT keys/info
+        parts.append(_key_definitions_text(final_key_defs, final_sorted_keys_list))
+        parts.append("\n"); parts.append(f"last_KEY_edit: {final_last_key_edit}\n"); parts.append(f"last_GRID_edit: {final_last_grid_edit}\n\n")
+        # The final grid using CURRENT keys
+        parts.append(_grid_text(final_sorted_keys_list, final_grid))
+        if mini_start_match: # Valid markers: preserve content from the end marker line on
+             parts.append("\n")
+             parts.append(existing_content[mini_end_match.start():])
+             if not existing_content.endswith('\n'): parts.append('\n')
+        elif is_mini:
+             parts.append("\n" + marker_end + "\n")
+        with _atomic_tracker_writer(output_file) as f: f.write("".join(parts)) # Replaced in one step
+        if not f.written: return # Unchanged tracker: nothing on disk moved, so every cache entry is still valid
         logger.info(f"Successfully updated tracker: {output_file}")
         # Invalidate caches
         invalidate_dependent_entries('tracker_data', f"tracker_data:{output_file}:.*")
-        invalidate_dependent_entries('grid_decompress', '.*'); invalidate_dependent_entries('grid_validation', '.*'); invalidate_dependent_entries('grid_dependencies', '.*')
-        # Invalidate aggregation cache as content changed
-        invalidate_dependent_entries('aggregation', '.*')
+        # Grid caches and the aggregation cache (content changed) are all cleared with one match-all call
+        invalidate_dependent_entries_bulk(('grid_decompress', 'grid_validation', 'grid_dependencies', 'aggregation'), '.*')
     except IOError as e: logger.error(f"I/O Error updating tracker file {output_file}: {e}", exc_info=True)
     except Exception as e: logger.exception(f"Unexpected error updating tracker file {output_file}: {e}")
 
@@ -1686,7 +1760,7 @@ def export_tracker(tracker_path: str, output_format: str = "json", output_path:
         elif output_format == "csv":
              with open(output_path, 'w', encoding='utf-8', newline='') as f:
                 import csv; writer = csv.writer(f); writer.writerow(["Source Key", "Source Path", "Target Key", "Target Path", "Dependency Type"])
-                key_to_idx = {k: i for i, k in enumerate(sorted_keys_list)}
+                key_to_idx = _index_map(sorted_keys_list)
                 for source_key in sorted_keys_list:
                     compressed_row = grid.get(source_key)
                     if compressed_row:
@@ -1704,7 +1778,7 @@ def export_tracker(tracker_path: str, output_format: str = "json", output_path:
                 f.write("digraph Dependencies {\n  rankdir=LR;\n"); f.write('  node [shape=box, style="filled", fillcolor="#EFEFEF", fontname="Arial"];\n'); f.write('  edge [fontsize=10, fontname="Arial"];\n\n')
                 for key in sorted_keys_list: label_path = os.path.basename(keys_map.get(key, '')).replace('\\', '/').replace('"', '\\"'); label = f"{key}\\n{label_path}"; f.write(f'  "{key}" [label="{label}"];\n')
                 f.write("\n")
-                key_to_idx = {k: i for i, k in enumerate(sorted_keys_list)}
+                key_to_idx = _index_map(sorted_keys_list)
                 for source_key in sorted_keys_list:
                      compressed_row = grid.get(source_key)
                      if compressed_row:
@@ -1795,15 +1869,10 @@ def remove_key_from_tracker(output_file: str, key_to_remove: str):
         logger.warning(f"Path '{path_removed}' (from key '{key_to_remove}' in {output_file}) not found as a key in the loaded global map. Proceeding, but this might indicate an inconsistency.")
 
     # 4. Prepare Arguments for update_tracker
-    is_mini_tracker = output_file.endswith("_module.md")
-    tracker_type = "mini" if is_mini_tracker else ("doc" if "doc_tracker.md" in output_file else "main")
-
-    # Generate file_to_module map (use original map is fine)
-    file_to_module_map = {
-        info.norm_path: info.parent_path
-        for info in global_path_to_key_info.values() # Use original is safe
-        if not info.is_directory and info.parent_path
-    }
+    tracker_type = classify_tracker(output_file)
+
+    # Lazy file_to_module view (use original map is fine)
+    file_to_module_map = FileToModuleView(global_path_to_key_info)
 
     # 5. Call update_tracker
     try:
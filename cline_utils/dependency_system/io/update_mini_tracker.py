@@ -45,3 +45,6 @@ def get_mini_tracker_data() -> Dict[str, any]:
 """,
         "markers": ("---mini_tracker_start---", "---mini_tracker_end---")
     }
+
+# Built once at import; the structure is static, so callers share it instead of rebuilding the template dict per call
+mini_tracker_data = get_mini_tracker_data()
@@ -8,7 +8,7 @@ import os
 import time
 import re
 import json
-from typing import Dict, Any, Callable, TypeVar, Optional, List, Tuple
+from typing import Dict, Any, Callable, Iterable, TypeVar, Optional, List, Tuple, Union
 import logging
 
 from .path_utils import normalize_path
@@ -21,6 +21,7 @@ F = TypeVar('F', bound=Callable[..., Any])
 CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
 DEFAULT_MAX_SIZE = 1000  # Default max items per cache
 DEFAULT_TTL = 600  # 10 minutes in seconds
+MATCH_ALL_PATTERN = ".*"  # Invalidation pattern that matches every key
 CACHE_SIZES = {
     "embeddings_generation": 100,  # Smaller for heavy data
     "key_generation": 5000,        # Larger for key maps
@@ -41,16 +42,14 @@ class Cache:
         self.misses = 0
 
     def get(self, key: str) -> Any:
-        if key in self.data:
-            value, _, expiry = self.data[key]
+        entry = self.data.get(key)
+        if entry is not None:
+            value, _, expiry = entry
             if expiry is None or time.time() < expiry:
                 self.data[key] = (value, time.time(), expiry)  # Update access time
                 self.hits += 1
                 return value
-            else:
-                del self.data[key]
-                if key in self.reverse_deps:
-                    del self.reverse_deps[key]
+            self._remove_key(key)  # Expired; also unlinks it from the dependency lists
         self.misses += 1
         return None
 
@@ -94,9 +93,10 @@ class Cache:
     def is_expired(self) -> bool:
         return (time.time() - self.creation_time) > self.default_ttl and not self.data
 
-    def invalidate(self, key_pattern: str) -> None:
-        """Invalidate entries matching a key pattern (supports regex)."""
-        compiled_pattern = re.compile(key_pattern)
+    def invalidate(self, key_pattern: Union[str, re.Pattern]) -> None:
+        """Invalidate entries matching a key pattern (supports regex, plain or precompiled)."""
+        if key_pattern == MATCH_ALL_PATTERN: self.clear(); return # Everything matches; skip the per-key regex scan
+        compiled_pattern = re.compile(key_pattern) # No-op for an already compiled pattern
         keys_to_remove = [k for k in self.data if compiled_pattern.match(k)]
         for key in keys_to_remove:
             self._remove_key(key)
@@ -105,6 +105,10 @@ class Cache:
                 for dep_key in dependent_keys:
                     self._remove_key(dep_key)
 
+    def clear(self) -> None:
+        """Drop all entries and dependency links."""
+        self.data.clear(); self.dependencies.clear(); self.reverse_deps.clear()
+
     def stats(self) -> Dict[str, int]:
         return {"hits": self.hits, "misses": self.misses, "size": len(self.data)}
 
@@ -185,6 +189,16 @@ def invalidate_dependent_entries(cache_name: str, key: str) -> None:
     cache = cache_manager.get_cache(cache_name)
     cache.invalidate(key)
 
+def invalidate_dependent_entries_bulk(cache_names: Iterable[str], key: str) -> None:
+    """
+    Invalidate entries matching one key pattern across several caches.
+    The pattern is compiled once, and caches that were never created are skipped rather than spun up.
+    """
+    compiled_pattern = key if key == MATCH_ALL_PATTERN else re.compile(key)
+    for cache_name in cache_names:
+        cache = cache_manager.caches.get(cache_name)
+        if cache is not None: cache.invalidate(compiled_pattern)
+
 def file_modified(file_path: str, project_root: str, cache_type: str = "all") -> None:
     """Invalidate caches when a file is modified."""
     norm_path = normalize_path(file_path)
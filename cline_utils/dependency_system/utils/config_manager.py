@@ -179,6 +179,19 @@ class ConfigManager:
 
         self._initialized = True
 
+    @classmethod
+    def get(cls) -> 'ConfigManager':
+        """
+        Returns the shared instance, constructing it only on first use.
+        Unlike ConfigManager(), repeat calls skip the __new__/__init__ round trip.
+
+        Returns:
+            ConfigManager instance
+        """
+        instance = cls._instance
+        if instance is not None and instance._initialized: return instance
+        return cls()
+
     def get_compute_setting(self, setting_name: str, default: Any = None) -> Any:
         """Gets a setting from the 'compute' section of the config."""
         compute_settings = self.config.get("compute", {})
@@ -0,0 +1,58 @@
+"""
+JSON file I/O helpers for the dependency tracking system.
+Uses orjson when it is installed and falls back to the standard json module otherwise.
+"""
+
+import json
+import mmap
+import os
+from typing import Any
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Files at least this large are memory-mapped instead of read into a bytes object (orjson only)
+MMAP_MIN_BYTES = 1024 * 1024
+
+def load_json_file(file_path: str) -> Any:
+    """
+    Loads and parses a JSON file.
+
+    Args:
+        file_path: Path to the JSON file
+    Returns:
+        The parsed JSON value
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the content is not valid JSON (json.JSONDecodeError / orjson.JSONDecodeError)
+    """
+    if orjson is None:
+        with open(file_path, 'r', encoding='utf-8') as f: return json.load(f)
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_MIN_BYTES: return orjson.loads(f.read()) # mmap cannot map empty files; small files are cheaper to read
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as view: return orjson.loads(view)
+
+def dump_json_file(file_path: str, data: Any, indent: bool = False) -> None:
+    """
+    Serializes data as UTF-8 JSON and writes it to file_path.
+
+    Args:
+        file_path: Destination path (overwritten)
+        data: JSON-serializable value (dict keys must be strings)
+        indent: Pretty-print with 2-space indentation
+    Raises:
+        OSError: If the file cannot be written
+        TypeError: If the data is not serializable
+    """
+    if orjson is None:
+        with open(file_path, 'w', encoding='utf-8') as f: json.dump(data, f, indent=2 if indent else None)
+        return
+    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    with open(file_path, 'wb') as f: f.write(payload)
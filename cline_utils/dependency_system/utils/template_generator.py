@@ -2,6 +2,7 @@
 import os
 import shutil
 import datetime
+import functools
 import re
 from collections import defaultdict
 from typing import Dict, List, Tuple, Optional, Set
@@ -74,9 +75,15 @@ CHECKLIST_TEMPLATE_CONTENT = f"""
 # --- Helper to determine if a path is code or doc ---
 def _get_item_type(item_path: str, config: ConfigManager, project_root: str) -> Optional[str]:
     """Determines if a given path is a 'code' or 'doc' item based on configuration."""
-    norm_item_path = normalize_path(item_path)
-    code_root_dirs_abs = [normalize_path(os.path.join(project_root, cr)) for cr in config.get_code_root_directories()]
-    doc_dirs_abs = [normalize_path(os.path.join(project_root, dd)) for dd in config.get_doc_directories()]
+    # The configured roots are part of the memo key, so config/.clinerules edits invalidate naturally
+    return _classify_item_path(normalize_path(item_path), tuple(config.get_code_root_directories()),
+                               tuple(config.get_doc_directories()), project_root)
+
+@functools.lru_cache(maxsize=16384)
+def _classify_item_path(norm_item_path: str, code_roots: Tuple[str, ...], doc_dirs: Tuple[str, ...], project_root: str) -> Optional[str]:
+    """Memoized body of _get_item_type: pure function of the path, the configured roots and the project root."""
+    code_root_dirs_abs = [normalize_path(os.path.join(project_root, cr)) for cr in code_roots]
+    doc_dirs_abs = [normalize_path(os.path.join(project_root, dd)) for dd in doc_dirs]
     for code_root in code_root_dirs_abs:
         if is_subpath(norm_item_path, code_root) or norm_item_path == code_root:
             return "code"
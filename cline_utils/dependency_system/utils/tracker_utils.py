@@ -4,10 +4,11 @@ import os
 import glob
 import logging
 import re
-from typing import Any, Dict, Set, Tuple, List, Optional
+from typing import Any, Dict, Iterable, Set, Tuple, List, Optional
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 
-from .cache_manager import cached
+from .cache_manager import cache_manager, cached
 from .config_manager import ConfigManager
 from .path_utils import normalize_path, get_project_root
 from cline_utils.dependency_system.core.key_manager import KeyInfo, sort_key_strings_hierarchically, validate_key
@@ -19,37 +20,59 @@ logger = logging.getLogger(__name__)
 PathMigrationInfo = Dict[str, Tuple[Optional[str], Optional[str]]] # path -> (old_key, new_key)
 
 
-@cached("tracker_data",
-        key_func=lambda tracker_path:
-        f"tracker_data:{normalize_path(tracker_path)}:{(os.path.getmtime(tracker_path) if os.path.exists(tracker_path) else 0)}")
-def read_tracker_file(tracker_path: str) -> Dict[str, Any]:
-    """
-    Read a tracker file and parse its contents. Caches based on path and mtime.
-    Args:
-        tracker_path: Path to the tracker file
-    Returns:
-        Dictionary with keys, grid, and metadata, or empty structure on failure.
-    """
-    tracker_path = normalize_path(tracker_path)
-    if not os.path.exists(tracker_path):
-        logger.debug(f"Tracker file not found: {tracker_path}. Returning empty structure.")
-        return {"keys": {}, "grid": {}, "last_key_edit": "", "last_grid_edit": ""}
+TRACKER_READ_MAX_WORKERS = 32 # Upper bound on threads used to read tracker files concurrently
+KEY_DEFINITIONS_START_MARKER = "---KEY_DEFINITIONS_START---"
+KEY_DEFINITIONS_END_MARKER = "---KEY_DEFINITIONS_END---"
+
+# Tracker section/line patterns, compiled once rather than looked up per file and per line
+KEY_SECTION_PATTERN = re.compile(r'---KEY_DEFINITIONS_START---\n(.*?)\n---KEY_DEFINITIONS_END---', re.DOTALL | re.IGNORECASE)
+GRID_SECTION_PATTERN = re.compile(r'---GRID_START---\n(.*?)\n---GRID_END---', re.DOTALL | re.IGNORECASE)
+KEY_LINE_PATTERN = re.compile(r'^([a-zA-Z0-9]+)\s*:\s*(.*)$')
+GRID_LINE_PATTERN = re.compile(r'^([a-zA-Z0-9]+)\s*=\s*(.*)$')
+LAST_KEY_EDIT_PATTERN = re.compile(r'^last_KEY_edit\s*:\s*(.*)$', re.MULTILINE | re.IGNORECASE)
+LAST_GRID_EDIT_PATTERN = re.compile(r'^last_GRID_edit\s*:\s*(.*)$', re.MULTILINE | re.IGNORECASE)
+
+def _tracker_file_signature(tracker_path: str) -> str:
+    """(mtime_ns, size) of a tracker file from a single stat call; '0:0' if missing. Catches same-second rewrites."""
+    try: st = os.stat(tracker_path)
+    except OSError: return "0:0"
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+def _empty_tracker_data() -> Dict[str, Any]:
+    """Structure returned for a missing or unreadable tracker."""
+    return {"keys": {}, "grid": {}, "last_key_edit": "", "last_grid_edit": "", "key_markers": (False, False)}
+
+def _tracker_data_cache_key(tracker_path: str) -> str:
+    """tracker_data cache key; the file signature is taken before the file is read, so a later rewrite gets a new key."""
+    return f"tracker_data:{normalize_path(tracker_path)}:{_tracker_file_signature(tracker_path)}"
+
+def _read_tracker_text(tracker_path: str) -> Optional[str]:
+    """Reads a tracker file's raw text. Returns None if it is missing or unreadable."""
+    try:
+        with open(tracker_path, 'r', encoding='utf-8') as f: return f.read()
+    except FileNotFoundError:
+        logger.debug(f"Tracker file not found: {tracker_path}. Returning empty structure."); return None
+    except Exception as e:
+        logger.exception(f"Error reading tracker file {tracker_path}: {e}"); return None
+
+def _parse_tracker_content(tracker_path: str, content: Optional[str]) -> Dict[str, Any]:
+    """Parses tracker text into keys, grid, and metadata. None content yields the empty structure."""
+    if content is None: return _empty_tracker_data()
     try:
-        with open(tracker_path, 'r', encoding='utf-8') as f: content = f.read()
         keys = {}; grid = {}; last_key_edit = ""; last_grid_edit = ""
-        key_section_match = re.search(r'---KEY_DEFINITIONS_START---\n(.*?)\n---KEY_DEFINITIONS_END---', content, re.DOTALL | re.IGNORECASE)
+        key_section_match = KEY_SECTION_PATTERN.search(content)
         if key_section_match:
             key_section_content = key_section_match.group(1)
             for line in key_section_content.splitlines():
                 line = line.strip()
                 if not line or line.lower().startswith("key definitions:"): continue
-                match = re.match(r'^([a-zA-Z0-9]+)\s*:\s*(.*)$', line)
+                match = KEY_LINE_PATTERN.match(line)
                 if match:
                     k, v = match.groups()
                     if validate_key(k): keys[k] = normalize_path(v.strip())
                     else: logger.warning(f"Skipping invalid key format in {tracker_path}: '{k}'")
 
-        grid_section_match = re.search(r'---GRID_START---\n(.*?)\n---GRID_END---', content, re.DOTALL | re.IGNORECASE)
+        grid_section_match = GRID_SECTION_PATTERN.search(content)
         if grid_section_match:
             grid_section_content = grid_section_match.group(1)
             lines = grid_section_content.strip().splitlines()
@@ -57,22 +80,65 @@ def read_tracker_file(tracker_path: str) -> Dict[str, Any]:
             if lines and (lines[0].strip().upper().startswith("X ") or lines[0].strip() == "X"): lines = lines[1:]
             for line in lines:
                 line = line.strip()
-                match = re.match(r'^([a-zA-Z0-9]+)\s*=\s*(.*)$', line)
+                match = GRID_LINE_PATTERN.match(line)
                 if match:
                     k, v = match.groups()
                     if validate_key(k): grid[k] = v.strip()
                     else: logger.warning(f"Grid row key '{k}' in {tracker_path} has invalid format. Skipping.")
 
-        last_key_edit_match = re.search(r'^last_KEY_edit\s*:\s*(.*)$', content, re.MULTILINE | re.IGNORECASE)
+        last_key_edit_match = LAST_KEY_EDIT_PATTERN.search(content)
         if last_key_edit_match: last_key_edit = last_key_edit_match.group(1).strip()
-        last_grid_edit_match = re.search(r'^last_GRID_edit\s*:\s*(.*)$', content, re.MULTILINE | re.IGNORECASE)
+        last_grid_edit_match = LAST_GRID_EDIT_PATTERN.search(content)
         if last_grid_edit_match: last_grid_edit = last_grid_edit_match.group(1).strip()
 
         logger.debug(f"Read tracker '{os.path.basename(tracker_path)}': {len(keys)} keys, {len(grid)} grid rows")
-        return {"keys": keys, "grid": grid, "last_key_edit": last_key_edit, "last_grid_edit": last_grid_edit}
+        key_markers = (KEY_DEFINITIONS_START_MARKER in content, KEY_DEFINITIONS_END_MARKER in content)
+        return {"keys": keys, "grid": grid, "last_key_edit": last_key_edit, "last_grid_edit": last_grid_edit, "key_markers": key_markers}
     except Exception as e:
-        logger.exception(f"Error reading tracker file {tracker_path}: {e}")
-        return {"keys": {}, "grid": {}, "last_key_edit": "", "last_grid_edit": ""}
+        logger.exception(f"Error parsing tracker file {tracker_path}: {e}")
+        return _empty_tracker_data()
+
+@cached("tracker_data", key_func=_tracker_data_cache_key)
+def read_tracker_file(tracker_path: str) -> Dict[str, Any]:
+    """
+    Read a tracker file and parse its contents. Caches based on path, mtime and size.
+    Args:
+        tracker_path: Path to the tracker file
+    Returns:
+        Dictionary with keys, grid, and metadata, or empty structure on failure.
+        'key_markers' is (start marker present, end marker present), taken from the same read.
+    """
+    tracker_path = normalize_path(tracker_path)
+    return _parse_tracker_content(tracker_path, _read_tracker_text(tracker_path))
+
+def read_tracker_files(tracker_paths: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Reads several tracker files, overlapping their disk reads in a thread pool.
+    Only the raw reads of uncached files run on the pool; parsing and the tracker_data cache stay on the
+    calling thread, since the cache has no locking and parsing holds the GIL anyway.
+
+    Args:
+        tracker_paths: Paths of the tracker files to read
+    Returns:
+        Dictionary mapping each given path to its parsed tracker data
+    """
+    paths = list(dict.fromkeys(tracker_paths))
+    if len(paths) <= 1: return {path: read_tracker_file(path) for path in paths}
+    cache = cache_manager.get_cache("tracker_data")
+    cache_keys = {path: _tracker_data_cache_key(path) for path in paths} # Signatures taken before any read
+    results: Dict[str, Dict[str, Any]] = {}
+    for path in paths:
+        tracker_data = cache.get(cache_keys[path])
+        if tracker_data is not None: results[path] = tracker_data
+    missed_paths = [path for path in paths if path not in results]
+    if missed_paths:
+        norm_missed_paths = [normalize_path(path) for path in missed_paths]
+        with ThreadPoolExecutor(max_workers=min(TRACKER_READ_MAX_WORKERS, len(missed_paths))) as executor:
+            contents = list(executor.map(_read_tracker_text, norm_missed_paths))
+        for path, norm_path, content in zip(missed_paths, norm_missed_paths, contents):
+            results[path] = _parse_tracker_content(norm_path, content)
+            cache.set(cache_keys[path], results[path])
+    return {path: results[path] for path in paths}
 
 def find_all_tracker_paths(config: ConfigManager, project_root: str) -> Set[str]:
     """Finds all main, doc, and mini tracker files in the project."""
@@ -117,10 +183,11 @@ def find_all_tracker_paths(config: ConfigManager, project_root: str) -> Set[str]
     return all_tracker_paths
 
 # --- Modified Aggregation Function ---
-@cached("aggregation", key_func=lambda paths, pmi: f"agg:{':'.join(sorted(list(paths)))}:{hash(tuple(sorted(pmi.items())))}", ttl=300)
+@cached("aggregation", key_func=lambda paths, pmi, filter_keys=None: f"agg:{':'.join(sorted(list(paths)))}:{hash(tuple(sorted(pmi.items())))}:{':'.join(sorted(filter_keys)) if filter_keys is not None else '*'}", ttl=300)
 def aggregate_all_dependencies(
     tracker_paths: Set[str],
-    path_migration_info: PathMigrationInfo # Use the pre-built migration map
+    path_migration_info: PathMigrationInfo, # Use the pre-built migration map
+    filter_keys: Optional[Set[str]] = None
 ) -> Dict[Tuple[str, str], Tuple[str, Set[str]]]:
     """
     Reads all specified tracker files and aggregates dependencies, validating keys
@@ -131,6 +198,8 @@ def aggregate_all_dependencies(
         tracker_paths: A set of normalized paths to the tracker files.
         path_migration_info: The authoritative map linking paths to their
                              old and new keys, derived from global maps.
+        filter_keys: Optional set of CURRENT key strings. When given, only links whose
+                     source or target is in the set are aggregated (e.g. show-dependencies).
 
     Returns:
         A dictionary where:
@@ -158,9 +227,10 @@ def aggregate_all_dependencies(
                   old_key_to_stable_path[old_key] = path
 
     processed_trackers = 0
+    tracker_data_by_path = read_tracker_files(tracker_paths) # Concurrent reads; uses cache
     for tracker_path in tracker_paths:
         logger.debug(f"Processing tracker for aggregation: {os.path.basename(tracker_path)}")
-        tracker_data = read_tracker_file(tracker_path) # Uses cache
+        tracker_data = tracker_data_by_path[tracker_path]
         grid_from_file = tracker_data.get("grid")
         keys_from_file = tracker_data.get("keys") # Stale key -> path
 
@@ -173,6 +243,14 @@ def aggregate_all_dependencies(
 
         processed_rows = 0
         skipped_unstable = 0
+        all_col_indices = range(len(old_keys_list_from_file))
+        filtered_col_indices = all_col_indices
+        if filter_keys is not None:
+            # Columns whose current key is filtered; rows outside filter_keys only need these cells
+            filtered_col_indices = []
+            for col_idx, old_col_key in enumerate(old_keys_list_from_file):
+                col_migration = path_migration_info.get(old_key_to_stable_path.get(old_col_key))
+                if col_migration and col_migration[1] in filter_keys: filtered_col_indices.append(col_idx)
         for old_row_key_from_file, compressed_row in grid_from_file.items():
 
             # --- VALIDATION 1: Check Row Key Stability ---
@@ -189,6 +267,8 @@ def aggregate_all_dependencies(
                  skipped_unstable += 1
                  continue
             current_row_key = migration_tuple_row[1] # Get the CURRENT key
+            col_indices = all_col_indices if filter_keys is None or current_row_key in filter_keys else filtered_col_indices
+            if not col_indices: continue # Row can't touch any filtered key
 
             try:
                 decompressed_row = decompress(compressed_row)
@@ -196,7 +276,8 @@ def aggregate_all_dependencies(
                      logger.warning(f"Aggregation: Row length mismatch for old key '{old_row_key_from_file}' in {os.path.basename(tracker_path)}. Skipping row.")
                      continue
 
-                for old_col_idx, dep_char in enumerate(decompressed_row):
+                for old_col_idx in col_indices:
+                    dep_char = decompressed_row[old_col_idx]
                     # Skip diagonal, no-dependency, empty
                     if dep_char in (DIAGONAL_CHAR, EMPTY_CHAR): continue
 
@@ -8,7 +8,7 @@ import os
 import logging
 import re
 from collections import defaultdict
-from typing import List, Optional, Dict, Tuple, Set
+from typing import List, NamedTuple, Optional, Dict, Tuple, Set
 
 # Assuming these are the correct relative import paths based on the new file location
 from ..core.key_manager import KeyInfo, sort_key_strings_hierarchically # Assuming global_path_to_key_info_type is Dict[str, KeyInfo]
@@ -21,29 +21,99 @@ logger = logging.getLogger(__name__)
 
 PathMigrationInfo = Dict[str, Tuple[Optional[str], Optional[str]]]
 
+MERMAID_INFO_EMPTY = "empty" # MermaidResult.info when nothing was left to draw
+
+class MermaidResult(NamedTuple):
+    """Outcome of generate_mermaid_diagram. On failure ok is False and text holds the error diagram."""
+    ok: bool
+    text: str
+    info: str = "" # MERMAID_INFO_EMPTY for a valid but empty diagram
+
+class DiagramContext(NamedTuple):
+    """Focus-independent inputs for generate_mermaid_diagram, built once and shared across diagram calls."""
+    global_path_to_key_info_map: Dict[str, KeyInfo]
+    path_migration_info: PathMigrationInfo
+    all_tracker_paths_list: List[str]
+    config_manager_instance: ConfigManager
+    intermediate_edges: List[Tuple[str, str, str]] # Aggregated, direction-resolved edges (source, target, char)
+    key_string_to_info_lookup: Dict[str, KeyInfo]
+    norm_path_to_info_lookup: Dict[str, KeyInfo]
+
 def _is_direct_parent_child_key_relationship(
     key1_str: str,
     key2_str: str,
-    global_path_to_key_info_map: Dict[str, KeyInfo]
+    global_path_to_key_info_map: Dict[str, KeyInfo],
+    key_string_to_info_lookup: Optional[Dict[str, KeyInfo]] = None
 ) -> bool:
     """
     Checks if one key's path is the direct parent_path of the other key's path.
+    Pass key_string_to_info_lookup to avoid scanning the global map.
     """
-    key1_info = next((info for info in global_path_to_key_info_map.values() if info.key_string == key1_str), None)
-    key2_info = next((info for info in global_path_to_key_info_map.values() if info.key_string == key2_str), None)
+    if key_string_to_info_lookup is not None:
+        key1_info = key_string_to_info_lookup.get(key1_str); key2_info = key_string_to_info_lookup.get(key2_str)
+    else:
+        key1_info = next((info for info in global_path_to_key_info_map.values() if info.key_string == key1_str), None)
+        key2_info = next((info for info in global_path_to_key_info_map.values() if info.key_string == key2_str), None)
     if not key1_info or not key2_info: return False
     if key2_info.parent_path and normalize_path(key1_info.norm_path) == normalize_path(key2_info.parent_path): return True
     if key1_info.parent_path and normalize_path(key2_info.norm_path) == normalize_path(key1_info.parent_path): return True
     return False
 
 
-def generate_mermaid_diagram(
-    focus_keys_list: List[str],
+def generate_mermaid_diagram_context(
     global_path_to_key_info_map: Dict[str, KeyInfo],
-    path_migration_info: PathMigrationInfo, # Note: renamed from path_migration_info_param
+    path_migration_info: PathMigrationInfo,
     all_tracker_paths_list: List[str],
     config_manager_instance: ConfigManager
-) -> Optional[str]:
+) -> DiagramContext:
+    """
+    Aggregates tracker dependencies and prepares the direction-resolved edge list and key lookups
+    that every diagram needs, independent of the focus keys. Build once, then pass as `context`
+    to generate_mermaid_diagram for the overview and each module.
+
+    Raises:
+        ValueError: If dependency aggregation fails.
+    """
+    aggregated_links_with_origins = tracker_io.aggregate_all_dependencies(
+        set(all_tracker_paths_list), path_migration_info
+    )
+    consolidated_directed_links: Dict[Tuple[str, str], str] = {
+        link: char_and_origins[0]
+        for link, char_and_origins in aggregated_links_with_origins.items()
+    }
+    logger.debug(f"Aggregated {len(consolidated_directed_links)} consolidated directed links using current keys.")
+
+    # --- Edge Preparation ---
+    intermediate_edges = []; processed_pairs_for_intermediate = set()
+    non_n_links = {(s, t): char for (s, t), char in consolidated_directed_links.items() if char != 'n'}
+    for (source, target), forward_char in sorted(non_n_links.items()):
+        pair_tuple = tuple(sorted((source, target)))
+        if pair_tuple in processed_pairs_for_intermediate: continue
+        reverse_char = non_n_links.get((target, source))
+        if forward_char == 'x' or reverse_char == 'x': intermediate_edges.append((source, target, 'x'))
+        elif forward_char == '<' and reverse_char == '>': intermediate_edges.append((source, target, '<'))
+        elif forward_char == '>' and reverse_char == '<': intermediate_edges.append((target, source, '<'))
+        else: intermediate_edges.append((source, target, forward_char))
+        processed_pairs_for_intermediate.add(pair_tuple)
+
+    return DiagramContext(
+        global_path_to_key_info_map=global_path_to_key_info_map,
+        path_migration_info=path_migration_info,
+        all_tracker_paths_list=all_tracker_paths_list,
+        config_manager_instance=config_manager_instance,
+        intermediate_edges=intermediate_edges,
+        key_string_to_info_lookup={info.key_string: info for info in global_path_to_key_info_map.values()},
+        norm_path_to_info_lookup={info.norm_path: info for info in global_path_to_key_info_map.values()}
+    )
+
+def generate_mermaid_diagram(
+    focus_keys_list: List[str],
+    global_path_to_key_info_map: Optional[Dict[str, KeyInfo]] = None,
+    path_migration_info: Optional[PathMigrationInfo] = None, # Note: renamed from path_migration_info_param
+    all_tracker_paths_list: Optional[List[str]] = None,
+    config_manager_instance: Optional[ConfigManager] = None,
+    context: Optional[DiagramContext] = None
+) -> MermaidResult:
     """
     Core logic to generate a Mermaid string for given focus keys or overall project.
 
@@ -53,35 +123,37 @@ def generate_mermaid_diagram(
         path_migration_info: The authoritative map linking paths to their old/new keys.
         all_tracker_paths_list: List of paths to all tracker files.
         config_manager_instance: Instance of ConfigManager.
+        context: Precomputed DiagramContext. When given, the four arguments above are ignored
+                 and aggregation is not repeated.
 
     Returns:
-        The Mermaid diagram string or None on critical failure.
-        Returns a simple "no data" Mermaid string if no relevant items are found.
+        MermaidResult with the Mermaid diagram string; ok=False (text carries the error) on failure,
+        info=MERMAID_INFO_EMPTY with a simple "no data" diagram if no relevant items are found.
     """
     logger.info(f"Generating Mermaid diagram. Focus Keys: {focus_keys_list or 'Project Overview'}")
 
-    try:
-        aggregated_links_with_origins = tracker_io.aggregate_all_dependencies(
-            set(all_tracker_paths_list), path_migration_info
-        )
-    except ValueError as ve:
-        logger.error(f"Mermaid generation failed: Error during dependency aggregation: {ve}")
-        return f"flowchart TB\n\n// Error: Could not aggregate dependencies: {ve}"
-    except Exception as e:
-        logger.error(f"Mermaid generation failed: Unexpected error during aggregation: {e}", exc_info=True)
-        return f"flowchart TB\n\n// Error: Unexpected error aggregating: {e}"
-
-    consolidated_directed_links: Dict[Tuple[str, str], str] = {
-        link: char_and_origins[0]
-        for link, char_and_origins in aggregated_links_with_origins.items()
-    }
-    logger.debug(f"Aggregated {len(consolidated_directed_links)} consolidated directed links using current keys.")
+    if context is None:
+        try:
+            context = generate_mermaid_diagram_context(
+                global_path_to_key_info_map or {}, path_migration_info or {}, all_tracker_paths_list or [],
+                config_manager_instance or ConfigManager()
+            )
+        except ValueError as ve:
+            logger.error(f"Mermaid generation failed: Error during dependency aggregation: {ve}")
+            return MermaidResult(False, f"flowchart TB\n\n// Error: Could not aggregate dependencies: {ve}")
+        except Exception as e:
+            logger.error(f"Mermaid generation failed: Unexpected error during aggregation: {e}", exc_info=True)
+            return MermaidResult(False, f"flowchart TB\n\n// Error: Unexpected error aggregating: {e}")
+    global_path_to_key_info_map = context.global_path_to_key_info_map
+    config_manager_instance = context.config_manager_instance
+    intermediate_edges = context.intermediate_edges
+    key_string_to_info_lookup = context.key_string_to_info_lookup
 
     # --- Scope Determination ---
     keys_in_module_scope = set(); is_module_view = False; focus_keys_valid = set()
     if len(focus_keys_list) == 1:
         focus_key_str = focus_keys_list[0]
-        focus_info = next((info for info in global_path_to_key_info_map.values() if info.key_string == focus_key_str), None)
+        focus_info = key_string_to_info_lookup.get(focus_key_str)
         if focus_info and focus_info.is_directory:
             is_module_view = True; module_path_prefix = focus_info.norm_path + "/"
             keys_in_module_scope.add(focus_key_str)
@@ -93,22 +165,9 @@ def generate_mermaid_diagram(
         else: logger.warning(f"Focus key '{focus_key_str}' not found. Overview."); focus_keys_list = []
     elif len(focus_keys_list) > 0:
          for fk_str in focus_keys_list:
-             if any(info.key_string == fk_str for info in global_path_to_key_info_map.values()): focus_keys_valid.add(fk_str)
+             if fk_str in key_string_to_info_lookup: focus_keys_valid.add(fk_str)
              else: logger.warning(f"Multi-focus key '{fk_str}' not found. Ignoring.")
-         if not focus_keys_valid: logger.error("No valid focus keys."); return "flowchart TB\n\n// Error: No valid focus keys."
-
-    # --- Edge Preparation ---
-    intermediate_edges = []; processed_pairs_for_intermediate = set()
-    non_n_links = {(s, t): char for (s, t), char in consolidated_directed_links.items() if char != 'n'}
-    for (source, target), forward_char in sorted(non_n_links.items()):
-        pair_tuple = tuple(sorted((source, target)))
-        if pair_tuple in processed_pairs_for_intermediate: continue
-        reverse_char = non_n_links.get((target, source))
-        if forward_char == 'x' or reverse_char == 'x': intermediate_edges.append((source, target, 'x'))
-        elif forward_char == '<' and reverse_char == '>': intermediate_edges.append((source, target, '<'))
-        elif forward_char == '>' and reverse_char == '<': intermediate_edges.append((target, source, '<'))
-        else: intermediate_edges.append((source, target, forward_char))
-        processed_pairs_for_intermediate.add(pair_tuple)
+         if not focus_keys_valid: logger.error("No valid focus keys."); return MermaidResult(False, "flowchart TB\n\n// Error: No valid focus keys.")
 
     # --- Edge Filtering by Scope ---
     edges_within_scope = []; relevant_keys_for_nodes = set()
@@ -129,12 +188,11 @@ def generate_mermaid_diagram(
 
     # --- Final Edge Filtering ---
     final_edges_to_draw = []
-    key_string_to_info_lookup = {info.key_string: info for info in global_path_to_key_info_map.values()}
     for k1, k2, char_val in edges_within_scope:
         if char_val == 'p': continue
         info1 = key_string_to_info_lookup.get(k1); info2 = key_string_to_info_lookup.get(k2)
         if not info1 or not info2: continue
-        if char_val == 'x' and _is_direct_parent_child_key_relationship(k1, k2, global_path_to_key_info_map): continue
+        if char_val == 'x' and _is_direct_parent_child_key_relationship(k1, k2, global_path_to_key_info_map, key_string_to_info_lookup): continue
         if char_val != 'd' and info1.is_directory != info2.is_directory: continue
         final_edges_to_draw.append((k1, k2, char_val))
     logger.info(f"Final count of edges to draw: {len(final_edges_to_draw)}")
@@ -142,7 +200,7 @@ def generate_mermaid_diagram(
     nodes_to_render = {k for edge_tuple in final_edges_to_draw for k in edge_tuple[:2]}
     if focus_keys_valid: nodes_to_render.update(focus_keys_valid)
 
-    if not nodes_to_render: return "flowchart TB\n\n// No relevant data to visualize."
+    if not nodes_to_render: return MermaidResult(True, "flowchart TB\n\n// No relevant data to visualize.", MERMAID_INFO_EMPTY)
     logger.info(f"Final count of distinct nodes to render: {len(nodes_to_render)}")
 
     parent_to_children_map: Dict[Optional[str], List[KeyInfo]] = defaultdict(list)
@@ -153,7 +211,7 @@ def generate_mermaid_diagram(
         if not info_q: continue
         parent_to_children_map[info_q.parent_path].append(info_q)
         if info_q.parent_path:
-            parent_key_info = next((ki for ki in global_path_to_key_info_map.values() if ki.norm_path == info_q.parent_path), None)
+            parent_key_info = context.norm_path_to_info_lookup.get(info_q.parent_path)
             if parent_key_info and parent_key_info.key_string not in visited_for_parents_build:
                  all_keys_in_hierarchy.add(parent_key_info.key_string); visited_for_parents_build.add(parent_key_info.key_string); queue_for_parents.append(parent_key_info.key_string)
 
@@ -276,4 +334,4 @@ def generate_mermaid_diagram(
             source_node_link_id, target_node_link_id = node2_link_id, node1_link_id
         mermaid_string_parts.append(f'  {source_node_link_id} {arrow_style}|"{label_text}"| {target_node_link_id}')
 
-    return "\n".join(mermaid_string_parts)
+    return MermaidResult(True, "\n".join(mermaid_string_parts))
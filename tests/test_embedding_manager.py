@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+
+from cline_utils.dependency_system.analysis.embedding_manager import calculate_similarities, load_embedding_matrix
+from cline_utils.dependency_system.core.key_manager import KeyInfo
+from cline_utils.dependency_system.utils.path_utils import normalize_path
+
+
+def _make_file(project_root, embeddings_dir, rel_path, vector):
+    norm_path = normalize_path(os.path.join(project_root, rel_path))
+    npy_path = os.path.join(embeddings_dir, rel_path + ".npy")
+    os.makedirs(os.path.dirname(npy_path), exist_ok=True)
+    np.save(npy_path, np.asarray(vector, dtype=np.float32))
+    return norm_path
+
+
+def test_duplicate_key_string_keeps_first_row(tmp_path):
+    project_root = str(tmp_path / "project")
+    embeddings_dir = str(tmp_path / "embeddings")
+    path_a = _make_file(project_root, embeddings_dir, "src/a.py", [1.0, 0.0])
+    path_b = _make_file(project_root, embeddings_dir, "src/b.py", [0.0, 1.0])
+    path_dup = _make_file(project_root, embeddings_dir, "lib/a.py", [0.6, 0.8])
+    parent_src = normalize_path(os.path.join(project_root, "src"))
+    parent_lib = normalize_path(os.path.join(project_root, "lib"))
+    path_to_key_info = {
+        path_a: KeyInfo("1A1", path_a, parent_src, 1, False),
+        path_b: KeyInfo("1A2", path_b, parent_src, 1, False),
+        path_dup: KeyInfo("1A1", path_dup, parent_lib, 1, False),
+    }
+
+    matrix, key_index, row_keys = load_embedding_matrix(embeddings_dir, path_to_key_info, project_root)
+
+    assert matrix.shape == (3, 2)
+    assert row_keys == ["1A1", "1A2", "1A1"]
+    assert key_index == {"1A1": 0, "1A2": 1}
+    np.testing.assert_allclose(matrix[key_index["1A1"]], [1.0, 0.0])
+
+    similarities = calculate_similarities("1A1", ["1A2"], embeddings_dir, path_to_key_info, project_root)
+    assert similarities == {"1A2": pytest.approx(0.0)}
@@ -0,0 +1,81 @@
+import random
+
+from cline_utils.dependency_system.core.dependency_grid import DIAGONAL_CHAR, PLACEHOLDER_CHAR, compress, decompress
+from cline_utils.dependency_system.io.tracker_io import _merge_grids
+
+GRID_CHARS = "<>xdsSnp"
+
+
+def _reference_merge(primary_grid, secondary_grid, primary_keys, secondary_keys, merged_keys):
+    """Cell-by-cell merge, as the tracker merge worked before it moved to NumPy."""
+    def rows(grid, keys):
+        return {k: decompress(v) for k, v in grid.items() if k in keys and len(decompress(v)) == len(keys)}
+    primary_rows = rows(primary_grid, primary_keys)
+    secondary_rows = rows(secondary_grid, secondary_keys)
+    merged = {}
+    for i, row_key in enumerate(merged_keys):
+        row = []
+        for j, col_key in enumerate(merged_keys):
+            value = PLACEHOLDER_CHAR
+            if i == j:
+                value = DIAGONAL_CHAR
+            elif row_key in primary_rows and col_key in primary_keys and primary_rows[row_key][primary_keys.index(col_key)] != PLACEHOLDER_CHAR:
+                value = primary_rows[row_key][primary_keys.index(col_key)]
+            elif row_key in secondary_rows and col_key in secondary_keys and secondary_rows[row_key][secondary_keys.index(col_key)] != PLACEHOLDER_CHAR:
+                value = secondary_rows[row_key][secondary_keys.index(col_key)]
+            row.append(value)
+        merged[row_key] = compress("".join(row))
+    return merged
+
+
+def _random_grid(rng, keys):
+    grid = {}
+    for i, key in enumerate(keys):
+        row = [rng.choice(GRID_CHARS) for _ in keys]
+        row[i] = DIAGONAL_CHAR
+        grid[key] = compress("".join(row))
+    return grid
+
+
+def test_primary_takes_precedence_over_secondary():
+    keys = ["1A1", "1A2"]
+    merged = _merge_grids({"1A1": "o<", "1A2": ">o"}, {"1A1": "ox", "1A2": "do"}, keys, keys, keys)
+    assert merged == {"1A1": "o<", "1A2": ">o"}
+
+
+def test_primary_placeholder_falls_through_to_secondary():
+    keys = ["1A1", "1A2", "1A3"]
+    primary = {"1A1": "opp", "1A2": "pop", "1A3": "ppo"}
+    secondary = {"1A1": "o<p", "1A2": "pox", "1A3": "ppo"}
+    merged = _merge_grids(primary, secondary, keys, keys, keys)
+    assert {k: decompress(v) for k, v in merged.items()} == {"1A1": "o<p", "1A2": "pox", "1A3": "ppo"}
+
+
+def test_keys_from_either_tracker_and_diagonal():
+    # 1A1 only in primary, 1A3 only in secondary; the diagonal wins even over a non-'o' source cell
+    merged = _merge_grids({"1A1": "o<", "1A2": "do"}, {"1A2": "ox", "1A3": "xx"},
+                          ["1A1", "1A2"], ["1A2", "1A3"], ["1A1", "1A2", "1A3"])
+    assert {k: decompress(v) for k, v in merged.items()} == {"1A1": "o<p", "1A2": "dox", "1A3": "pxo"}
+
+
+def test_malformed_rows_are_skipped():
+    keys = ["1A1", "1A2"]
+    merged = _merge_grids({"1A1": "o<<", "1A2": ">o"}, {"1A1": "ox"}, keys, keys, keys)
+    assert merged == {"1A1": "ox", "1A2": ">o"}
+
+
+def test_matches_reference_merge_on_random_grids():
+    rng = random.Random(1234)
+    all_keys = [f"1A{i}" for i in range(1, 13)]
+    for _ in range(200):
+        primary_keys = sorted(rng.sample(all_keys, rng.randint(1, len(all_keys))), key=all_keys.index)
+        secondary_keys = sorted(rng.sample(all_keys, rng.randint(1, len(all_keys))), key=all_keys.index)
+        merged_keys = [k for k in all_keys if k in primary_keys or k in secondary_keys]
+        primary, secondary = _random_grid(rng, primary_keys), _random_grid(rng, secondary_keys)
+        for grid in (primary, secondary):
+            for key in list(grid):
+                if rng.random() < 0.1:
+                    del grid[key]  # Missing rows fall back to the other tracker
+        assert all(compress(decompress(row)) == row for row in primary.values())
+        assert _merge_grids(primary, secondary, primary_keys, secondary_keys, merged_keys) == \
+            _reference_merge(primary, secondary, primary_keys, secondary_keys, merged_keys)